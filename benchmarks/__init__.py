@@ -0,0 +1 @@
+"""Headless benchmarks for theta's hot paths, run with `python -m benchmarks --help`"""
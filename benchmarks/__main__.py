@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+# must be set before pygame (and so theta) is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+DEFAULT_SCALES = "100,1000,10000"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Times theta's hot paths on synthetic data across scale points",
+    )
+    parser.add_argument("--scales", default=DEFAULT_SCALES)
+    parser.add_argument("--cases", default="", help="comma separated case names")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--out", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="also record the peak memory allocated by one call of each case",
+    )
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from . import runner
+    from .cases import CASES
+    from .data import make_data_dir
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+
+    scales = [int(scale) for scale in args.scales.split(",") if scale]
+    names = [name for name in args.cases.split(",") if name]
+    out = os.path.abspath(args.out) if args.out else None
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="theta_bench_") as root:
+        os.chdir(root)  # theta's data paths are relative to the working directory
+        try:
+            import theta
+
+            make_data_dir(root, scales)
+            game = theta.Game(640, 480, fps=0)
+            results = runner.run(
+                game, scales, names, args.repeat, args.warmup, memory=args.memory
+            )
+        finally:
+            os.chdir(cwd)
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(results, f, indent=1)
+    if baseline is not None:
+        threshold = (
+            args.threshold if args.threshold is not None else runner.DEFAULT_THRESHOLD
+        )
+        if runner.compare(results, baseline, threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+import math
+import random
+
+import numpy as np
+import pygame
+
+import theta
+from theta.camera import CameraCutscene
+from theta.constraints import ConstraintSolver
+from theta.entity import Entity, EntityStore
+from theta.input import KEYDOWN, KeyDownEvent
+from theta.particle import Particle, ParticleBurst
+from theta.text import Font
+
+from .data import level_name
+
+CASES = {}
+
+
+def case(name: str):
+    """Registers a benchmark, which is called with (game, scale) and returns the function to time,
+    or a tuple of it and a function to run untimed before every call"""
+
+    def decorator(func):
+        CASES[name] = func
+        return func
+
+    return decorator
+
+
+def _reset_camera(game):
+    game.camera._queue.clear()
+    game.camera._the_dirty_rects.clear()
+
+
+@case("Level.update")
+def level_update(game, scale: int):
+    game.world.current_lvl = game.world.load_lvl(level_name(scale))
+    level = game.world.current_lvl
+    return lambda: level.update(1.0), lambda: _reset_camera(game)
+
+
+@case("Level.update.lod")
+def level_update_lod(game, scale: int):
+    game.world.current_lvl = game.world.load_lvl(level_name(scale))
+    level = game.world.current_lvl
+    level.active_radius = 64
+    level.band_radius = 256
+    view = game.camera.get_viewport()
+    return lambda: level.update(1.0, view), lambda: _reset_camera(game)
+
+
+@case("Level.update.moving")
+def level_update_moving(game, scale: int):
+    game.world.current_lvl = game.world.load_lvl(level_name(scale))
+    level = game.world.current_lvl
+    store = level.store
+    rows = np.array([e.row for e in level.entities], np.intp)
+    vel = np.random.default_rng(scale).uniform(-2, 2, (len(rows), 2))
+
+    def push():
+        _reset_camera(game)
+        store.prev_pos[rows] = store.pos[rows] - vel
+
+    return lambda: level.update(1.0), push
+
+
+@case("EntityStore.integrate")
+def store_integrate(game, scale: int):
+    rng = np.random.default_rng(scale)
+    store = EntityStore(scale)
+    rows = np.array([store.allocate() for _ in range(scale)], np.intp)
+    store.pos[rows] = rng.uniform(0, 1000, (scale, 2))
+    store.prev_pos[rows] = store.pos[rows] - 1
+    store.accel[rows] = 0, 0.1
+    return lambda: store.integrate(1 / 60)
+
+
+@case("Entity.create")
+def entity_create(game, scale: int):
+    store = EntityStore(scale)
+    return lambda: [
+        Entity(i % 640, i // 640, 12, 12, "bench", game, store=store)
+        for i in range(scale)
+    ]
+
+
+@case("Entity.attributes")
+def entity_attributes(game, scale: int):
+    entities = [Entity(i % 640, i // 640, 12, 12, "bench", game) for i in range(scale)]
+
+    def read():
+        for e in entities:
+            e.rect, e.name, e.action, e.img, e.is_real, e.uid
+
+    return read
+
+
+@case("Particle.create")
+def particle_create(game, scale: int):
+    colour = (255, 120, 0)
+    return lambda: [
+        Particle(colour, pygame.Vector2(i, 0), pygame.Vector2(0, 1), 3, 60)
+        for i in range(scale)
+    ]
+
+
+@case("Event.create")
+def event_create(game, scale: int):
+    return lambda: [
+        KeyDownEvent(KEYDOWN, pygame.K_a + i % 26, "a", 0, 4) for i in range(scale)
+    ]
+
+
+@case("Event.attributes")
+def event_attributes(game, scale: int):
+    events = [
+        KeyDownEvent(KEYDOWN, pygame.K_a + i % 26, "a", 0, 4) for i in range(scale)
+    ]
+
+    def read():
+        for event in events:
+            event.type, event.key, event.mod, event.unicode
+
+    return read
+
+
+@case("ConstraintSolver.ropes")
+def constraint_ropes(game, scale: int):
+    """`scale` points in ropes of 20 links, stiffened against bending"""
+    solver = ConstraintSolver((0, 0.3))
+    for i in range(max(1, scale // 21)):
+        solver.add_rope((i * 8, 0), (i * 8 + 100, 0), 20, bend=0.2)
+    solver.step(1 / 60)  # colours the constraints
+    return lambda: solver.step(1 / 60)
+
+
+@case("ConstraintSolver.cloth")
+def constraint_cloth(game, scale: int):
+    """`scale` points in 10 by 10 cloth patches with shear links, falling onto the level's tiles"""
+    level = game.world.load_lvl(level_name(scale))
+    solver = ConstraintSolver((0, 0.3), substeps=2, tiles=level.solid)
+    for i in range(max(1, scale // 100)):
+        solver.add_cloth((i % 40 * 48, i // 40 * 48), 10, 10, 4, shear=0.5)
+    solver.step(1 / 60)
+    return lambda: solver.step(1 / 60)
+
+
+@case("Camera.update")
+def camera_update(game, scale: int):
+    rng = random.Random(scale)
+    w, h = game.camera.screen.get_size()
+    surfs = [pygame.Surface((16, 16)) for _ in range(8)]
+    blits = [
+        (surfs[i % len(surfs)], (rng.randint(-32, w), rng.randint(-32, h)))
+        for i in range(scale)
+    ]
+
+    def submit():
+        _reset_camera(game)
+        for surf, pos in blits:
+            game.camera.render(surf, pos)
+
+    return lambda: game.camera.update(True), submit
+
+
+@case("ParticleBurst.update")
+def particle_update(game, scale: int):
+    burst = ParticleBurst(
+        pygame.Vector2(200, 200),
+        3,
+        scale,
+        [(255, 120, 0), (255, 200, 0), (200, 40, 0)],
+        -1,
+        1_000_000,
+        pygame.Vector2(3, 3),
+        shrink=True,
+        max_particles=scale,
+    )
+    return lambda: burst.update(1.0, (0, 0.01))
+
+
+@case("ParticleSystem.update")
+def particle_system_update(game, scale: int):
+    game.particles.clear()
+    for i in range(max(1, scale // 500)):
+        game.particles.emit(
+            pygame.Vector2(50 + i * 10 % 400, 200),
+            3,
+            min(scale, 500),
+            [(255, 120, 0), (255, 200, 0)],
+            -1,
+            1_000_000,
+            pygame.Vector2(3, 3),
+            fade=True,
+        )
+    return lambda: game.particles.update(1.0), lambda: _reset_camera(game)
+
+
+@case("Input.get")
+def input_get(game, scale: int):
+    def post():
+        for i in range(scale):
+            if i % 3 == 0:
+                pygame.event.post(
+                    pygame.event.Event(
+                        pygame.MOUSEMOTION,
+                        pos=(i % 300, 20),
+                        rel=(1, 0),
+                        buttons=(0, 0, 0),
+                    )
+                )
+            else:
+                pygame.event.post(
+                    pygame.event.Event(
+                        pygame.KEYDOWN if i % 3 == 1 else pygame.KEYUP,
+                        key=pygame.K_a + i // 3 % 26,
+                        mod=0,
+                        unicode="a",
+                        scancode=4 + i % 26,
+                    )
+                )
+
+    return game.input.get, post
+
+
+@case("Font.render")
+def font_render(game, scale: int):
+    fonts = theta.game.FONT_PATH
+    font = Font(f"{fonts}bench.png", f"{fonts}order")
+    text = ("Hello_World-0123456789\n" * math.ceil(scale / 23))[:scale].strip()
+    return lambda: font.render(text)
+
+
+@case("SpriteStack.render_to_game")
+def spritestack_render(game, scale: int):
+    stack = game.anim.get_spritestacks("bench")["idle"]
+    rng = random.Random(scale)
+    calls = [
+        ((rng.randint(0, 600), rng.randint(0, 400)), rng.randrange(0, 360, 6))
+        for _ in range(scale)
+    ]
+
+    def render():
+        for pos, rot in calls:
+            stack.render_to_game(game, pos, rot)
+
+    return render, lambda: _reset_camera(game)
+
+
+@case("CameraCutscene")
+def cutscene_load(game, scale: int):
+    path = f"{theta.game.CAMERA_PATH}bench_{scale % 16}.txt"
+    return lambda: CameraCutscene(path)
@@ -0,0 +1,171 @@
+import json
+import math
+import os
+import random
+
+import pygame
+
+TILE_SIZE = 16
+CHUNK_SIZE = 16
+TILE_TYPES = 8
+FONT_ORDER = "!-.0123456789:;?ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+
+
+def level_name(scale: int) -> str:
+    return f"tiles_{scale}"
+
+
+def _save_png(path: str, size: tuple[int, int], colour, alpha=False):
+    surf = pygame.Surface(size, pygame.SRCALPHA if alpha else 0)
+    surf.fill(colour)
+    pygame.image.save(surf, path)
+
+
+def _write(path: str, data: str):
+    with open(path, "w") as f:
+        f.write(data)
+
+
+def make_tiles(data: str):
+    os.makedirs(f"{data}{os.sep}tiles", exist_ok=True)
+    for i in range(TILE_TYPES + 1):
+        _save_png(
+            f"{data}{os.sep}tiles{os.sep}t{i}.png",
+            (TILE_SIZE, TILE_SIZE),
+            (30 * i % 256, 90, 200),
+        )
+
+
+def make_level(path: str, tiles: int, entities: int, rng: random.Random):
+    """A level with `tiles` tiles in an infinite, chunked, csv encoded map and `entities` entities"""
+    os.makedirs(path, exist_ok=True)
+    chunks = max(1, math.ceil(math.sqrt(tiles) / CHUNK_SIZE))
+    side = chunks * CHUNK_SIZE
+
+    _write(
+        f"{path}{os.sep}tileset.tsx",
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<tileset version="1.10" name="bench" tilewidth="{TILE_SIZE}" tileheight="{TILE_SIZE}" '
+        f'tilecount="{TILE_TYPES + 1}" columns="0">\n'
+        + "".join(
+            f' <tile id="{i}"><image width="{TILE_SIZE}" height="{TILE_SIZE}" source="tiles/t{i}.png"/></tile>\n'
+            for i in range(TILE_TYPES + 1)
+        )
+        + "</tileset>\n",
+    )
+
+    cells = [0] * (side * side)
+    for i in rng.sample(range(side * side), min(tiles, side * side)):
+        cells[i] = rng.randint(1, TILE_TYPES)
+    chunk_xml = []
+    for cy in range(chunks):
+        for cx in range(chunks):
+            rows = [
+                ",".join(
+                    str(cells[(cy * CHUNK_SIZE + y) * side + cx * CHUNK_SIZE + x])
+                    for x in range(CHUNK_SIZE)
+                )
+                for y in range(CHUNK_SIZE)
+            ]
+            chunk_xml.append(
+                f'   <chunk x="{cx * CHUNK_SIZE}" y="{cy * CHUNK_SIZE}" width="{CHUNK_SIZE}" height="{CHUNK_SIZE}">\n'
+                + ",\n".join(rows)
+                + "\n</chunk>\n"
+            )
+    _write(
+        f"{path}{os.sep}map.tmx",
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<map version="1.10" orientation="orthogonal" renderorder="right-down" width="{side}" height="{side}" '
+        f'tilewidth="{TILE_SIZE}" tileheight="{TILE_SIZE}" infinite="1" nextlayerid="2" nextobjectid="1">\n'
+        ' <tileset firstgid="1" source="tileset.tsx"/>\n'
+        f' <layer id="1" name="Tiles" width="{side}" height="{side}">\n'
+        '  <data encoding="csv">\n' + "".join(chunk_xml) + "  </data>\n"
+        " </layer>\n"
+        "</map>\n",
+    )
+
+    extent = side * TILE_SIZE - TILE_SIZE
+    _write(
+        f"{path}{os.sep}entities.json",
+        json.dumps(
+            [
+                {
+                    "name": "bench",
+                    "rect": [rng.randint(0, extent), rng.randint(0, extent), 12, 12],
+                    "real": True,
+                }
+                for _ in range(entities)
+            ]
+        ),
+    )
+
+
+def make_anims(data: str):
+    anims = f"{data}{os.sep}gfx{os.sep}anims"
+    for action in ("idle", "run"):
+        path = f"{anims}{os.sep}bench;{action}"
+        os.makedirs(path, exist_ok=True)
+        for i in range(4):
+            _save_png(f"{path}{os.sep}{i}.png", (12, 12), (200, 40 * i, 40), True)
+        _write(
+            f"{path}{os.sep}config.json",
+            json.dumps(
+                {"frames": [5] * 4, "speed": 1.0, "loop": True, "offset": [0, 0]}
+            ),
+        )
+
+
+def make_spritestacks(data: str):
+    path = f"{data}{os.sep}gfx{os.sep}spritestacks{os.sep}bench;idle"
+    os.makedirs(path, exist_ok=True)
+    for i in range(8):
+        _save_png(f"{path}{os.sep}{i:02}.png", (16, 16), (20 * i, 120, 60), True)
+
+
+def make_font(data: str) -> str:
+    fonts = f"{data}{os.sep}fonts"
+    os.makedirs(fonts, exist_ok=True)
+    width = 6
+    surf = pygame.Surface((width * len(FONT_ORDER), 8))
+    surf.fill((255, 255, 255))
+    for i in range(len(FONT_ORDER)):
+        surf.set_at(((i + 1) * width - 1, 0), (128, 128, 128))
+    pygame.image.save(surf, f"{fonts}{os.sep}bench.png")
+    _write(f"{fonts}{os.sep}order", FONT_ORDER)
+    return fonts
+
+
+def make_cutscenes(data: str, amount: int, rng: random.Random):
+    cutscenes = f"{data}{os.sep}cutscenes"
+    os.makedirs(cutscenes, exist_ok=True)
+    for i in range(amount):
+        points = "/".join(
+            f"{rng.uniform(-500, 500):.2f},{rng.uniform(-500, 500):.2f}"
+            for _ in range(4 + i % 16)
+        )
+        _write(f"{cutscenes}{os.sep}bench_{i}.txt", f"{points};0.005")
+
+
+def make_data_dir(root: str, scales: list[int], seed: int = 0) -> str:
+    """Writes a complete theta data folder under `root` and returns its path"""
+    rng = random.Random(seed)
+    data = f"{root}{os.sep}data"
+    for folder in ("ui", "sfx/sounds", "sfx/music", "levels/caches"):
+        os.makedirs(f"{data}{os.sep}{folder.replace('/', os.sep)}", exist_ok=True)
+
+    levels = f"{data}{os.sep}levels"
+    os.makedirs(f"{levels}{os.sep}0", exist_ok=True)
+    _write(f"{levels}{os.sep}0{os.sep}entities.json", "[]")
+    _write(f"{levels}{os.sep}0{os.sep}no_tiles", "")
+    _write(f"{levels}{os.sep}active", "0")
+
+    make_tiles(data)
+    for scale in scales:
+        make_level(
+            f"{levels}{os.sep}{level_name(scale)}", scale, max(1, scale // 10), rng
+        )
+    make_anims(data)
+    make_spritestacks(data)
+    make_font(data)
+    make_cutscenes(data, 16, rng)
+    return data
@@ -0,0 +1,106 @@
+import platform
+import statistics
+import time
+import tracemalloc
+from time import perf_counter
+
+import numpy as np
+import pygame
+
+from .cases import CASES
+
+DEFAULT_THRESHOLD = (
+    0.1  # a case is a regression if its median is this much slower than the baseline
+)
+
+
+def key(name: str, scale: int) -> str:
+    return f"{name}[{scale}]"
+
+
+def time_case(fn, before=None, repeat: int = 20, warmup: int = 2) -> dict[str, float]:
+    samples = []
+    for i in range(warmup + repeat):
+        if before is not None:
+            before()
+        start = perf_counter()
+        fn()
+        end = perf_counter()
+        if i >= warmup:
+            samples.append((end - start) * 1000)
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "mean_ms": statistics.fmean(samples),
+        "stdev_ms": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "runs": len(samples),
+    }
+
+
+def measure_memory(fn, before=None) -> float:
+    """:returns: the peak memory allocated during one call, in KiB"""
+    if before is not None:
+        before()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run(
+    game,
+    scales: list[int],
+    names: list[str] | None = None,
+    repeat: int = 20,
+    warmup: int = 2,
+    log=print,
+    memory: bool = False,
+) -> dict:
+    results = {}
+    for name, setup in CASES.items():
+        if names and name not in names:
+            continue
+        for scale in scales:
+            bench = setup(game, scale)
+            fn, before = bench if isinstance(bench, tuple) else (bench, None)
+            results[key(name, scale)] = stats = time_case(fn, before, repeat, warmup)
+            line = f"{key(name, scale):<40} {stats['median_ms']:>10.3f} ms"
+            if memory:
+                stats["peak_kib"] = measure_memory(fn, before)
+                line += f" {stats['peak_kib']:>12.1f} KiB"
+            log(line)
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD
+) -> list[str]:
+    """:returns: the keys of every case whose median got slower than the baseline by more than `threshold`"""
+    regressions = []
+    for name, stats in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+        old = baseline["results"][name]["median_ms"]
+        ratio = stats["median_ms"] / old if old else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "REGRESSION"
+        elif ratio < 1 - threshold:
+            flag = "faster"
+        print(
+            f"{name:<40} {old:>10.3f} -> {stats['median_ms']:>10.3f} ms  x{ratio:.2f} {flag}"
+        )
+    return regressions
@@ -0,0 +1,19 @@
+import os
+import shutil
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pytest
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture
+def game(tmp_path, monkeypatch):
+    """A Game running on a copy of the test data, so level caches are written to a temporary folder"""
+    from theta.game import Game
+
+    shutil.copytree(DATA, tmp_path / "data")
+    monkeypatch.chdir(tmp_path)
+    return Game(tick_rate=60)
@@ -0,0 +1,22 @@
+import json
+
+from benchmarks.__main__ import main
+from benchmarks.cases import CASES
+from benchmarks.runner import compare
+
+
+def test_every_case_runs_and_regressions_fail_the_run(tmp_path):
+    out = str(tmp_path / "results.json")
+    assert main(["--scales", "10", "--repeat", "1", "--warmup", "0", "--out", out]) == 0
+    with open(out) as f:
+        results = json.load(f)
+    assert set(results["results"]) == {f"{name}[10]" for name in CASES}
+
+    faster = {
+        "results": {
+            name: dict(stats, median_ms=stats["median_ms"] / 4)
+            for name, stats in results["results"].items()
+        }
+    }
+    assert sorted(compare(results, faster, 0.5)) == sorted(results["results"])
+    assert compare(results, results, 0.5) == []
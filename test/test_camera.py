@@ -0,0 +1,121 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import pytest
+
+from theta import camera
+from theta.camera import Camera, CameraCutscene
+
+
+@pytest.fixture
+def cam(tmp_path, monkeypatch):
+    os.makedirs(tmp_path / "data" / "cutscenes")
+    monkeypatch.chdir(tmp_path)
+    return Camera(64, 64)
+
+
+def queued(cam, layer=camera.ENTITIES):
+    return [item[2] for item in sorted(cam._queue[layer], key=camera._sort_key)]
+
+
+def test_truncated_cutscene_cache_is_rebuilt(tmp_path):
+    path = str(tmp_path / "pan.txt")
+    with open(path, "w") as f:
+        f.write("0,0/10,0/10,10;0.1")
+    cache_dir = str(tmp_path / "cache") + os.sep
+    cutscene = CameraCutscene(path, cache_dir)
+    with open(cutscene.cache_path, "rb") as f:
+        data = f.read()
+    with open(cutscene.cache_path, "wb") as f:
+        f.write(data[:-8])
+
+    reloaded = CameraCutscene(path, cache_dir)
+    assert reloaded.points == cutscene.points
+    assert (reloaded.curve == cutscene.curve).all()
+    with open(cutscene.cache_path, "rb") as f:
+        assert f.read() == data
+
+
+def test_touched_source_with_read_only_cache_still_loads(tmp_path, monkeypatch):
+    path = str(tmp_path / "pan.txt")
+    with open(path, "w") as f:
+        f.write("0,0/10,0/10,10;0.1")
+    cache_dir = str(tmp_path / "cache") + os.sep
+    cutscene = CameraCutscene(path, cache_dir)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def fail(*args):
+        raise OSError("read-only")
+
+    monkeypatch.setattr("theta.camera.write_file_atomic", fail)
+    reloaded = CameraCutscene(path, cache_dir)
+    assert reloaded.points == cutscene.points
+
+
+def test_same_z_surfaces_keep_their_submission_order(cam):
+    surfs = [pygame.Surface((4, 4)) for _ in range(50)]
+    for surf in surfs:
+        cam.render(surf, (0, 0))
+    back = pygame.Surface((4, 4))
+    cam.render(back, (0, 0), z=-1)
+    assert queued(cam) == [back] + surfs
+
+
+def test_only_dirty_regions_are_redrawn(cam, monkeypatch):
+    cam.update()
+    updated = []
+    monkeypatch.setattr(pygame.display, "update", updated.append)
+    monkeypatch.setattr(pygame.display, "flip", lambda: updated.append(None))
+    surf = pygame.Surface((4, 4))
+    surf.fill((255, 0, 0))
+    cam.render(surf, (10, 10))
+    cam.add_update_rect(pygame.Rect(10, 10, 4, 4))
+    cam.update(False)
+    assert updated == [[pygame.Rect(10, 10, 4, 4)]]
+    assert cam.screen.get_at((11, 11)) == (255, 0, 0)
+
+
+def test_many_dirty_rects_fall_back_to_a_full_redraw(cam, monkeypatch):
+    cam.update()
+    flipped = []
+    monkeypatch.setattr(pygame.display, "flip", lambda: flipped.append(True))
+    cam.add_update_rects(
+        [pygame.Rect(x, 0, 1, 1) for x in range(0, 4 * camera.MAX_DIRTY_RECTS, 3)]
+    )
+    cam.update(False)
+    assert flipped == [True]
+
+
+def test_render_culls_surfaces_outside_the_viewport(cam):
+    surf = pygame.Surface((8, 8))
+    cam.render(surf, (10, 10))
+    cam.render(surf, (64 + camera.CULL_MARGIN + 1, 0))
+    cam.move_by((-1000, 0))
+    cam.render(surf, (1010, 10))
+    cam.update()
+    assert cam.get_render_stats() == (2, 1)
+    assert cam.is_visible(pygame.Rect(1000, 0, 8, 8))
+    assert not cam.is_visible(pygame.Rect(0, 0, 8, 8))
+
+
+def test_bezier_points_match_de_casteljau():
+    points = [pygame.Vector2(0, 0), pygame.Vector2(30, 90), pygame.Vector2(100, 0)]
+    t = np.linspace(0, 1, 11)
+    expected = [camera._bezier_curve_point(points, value) for value in t]
+    assert camera.bezier_points(points, t) == pytest.approx(
+        np.array(expected), abs=1e-4
+    )
+
+
+def test_arc_length_table_is_evenly_spaced():
+    points = [(0, 0), (0, 100), (100, 100), (100, 0)]
+    table = camera.arc_length_table(points, 50)
+    steps = np.hypot(*np.diff(table, axis=0).T)
+    assert table[0] == pytest.approx((0, 0))
+    assert table[-1] == pytest.approx((100, 0))
+    assert steps.max() - steps.min() < 0.05 * steps.mean()
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pygame
+
+from theta import collision
+from theta.collision import (
+    SolidTiles,
+    find_pairs,
+    resolve_tiles,
+    resolve_tiles_many,
+    separate,
+)
+from theta.entity import Entity, VerletObject
+from theta.level import Level
+
+
+def box(x, y, prev_x, prev_y, w=8, h=8):
+    return VerletObject(
+        pygame.Vector2(x, y), pygame.Vector2(prev_x, prev_y), pygame.Vector2(), w, h
+    )
+
+
+def test_resolve_tiles_stops_at_the_first_solid_cell():
+    tiles = SolidTiles(16, 16, [(3, 0), (0, 2)])
+    obj = box(60, 4, 20, 4)
+    assert resolve_tiles(obj, tiles) == (True, False)
+    assert obj.pos == (40, 4) and obj.get_vel() == (0, 0)
+
+    falling = box(4, 30, 4, 10)
+    assert resolve_tiles(falling, tiles) == (False, True)
+    assert falling.pos == (4, 24)
+
+    clear = box(4, 4, 2, 2)
+    assert resolve_tiles(clear, tiles) == (False, False)
+    assert clear.pos == (4, 4)
+
+
+def test_resolve_tiles_many_matches_resolve_tiles():
+    rng = np.random.default_rng(2)
+    cells = {tuple(cell) for cell in rng.integers(0, 12, (40, 2)).tolist()}
+    tiles = SolidTiles(16, 16, cells)
+    pos = rng.uniform(0, 180, (400, 2))
+    prev = pos - rng.uniform(-40, 40, (400, 2))
+    size = rng.integers(4, 30, (400, 2)).astype(float)
+    objs = [box(*p, *q, *wh) for p, q, wh in zip(pos, prev, size)]
+    blocked = resolve_tiles_many(pos, prev, size, tiles)
+    assert blocked.any()
+    for i, obj in enumerate(objs):
+        assert resolve_tiles(obj, tiles) == tuple(blocked[i])
+        assert tuple(obj.pos) == tuple(pos[i]) and tuple(obj.prev_pos) == tuple(prev[i])
+
+
+def test_find_pairs_matches_brute_force():
+    rng = np.random.default_rng(1)
+    rects = np.column_stack(
+        (rng.integers(0, 200, (300, 2)), rng.integers(1, 20, (300, 2)))
+    ).astype(np.int32)
+    first, second = find_pairs(rects)
+    found = {tuple(sorted(pair)) for pair in zip(first.tolist(), second.tolist())}
+    expected = {
+        (i, j)
+        for i in range(len(rects))
+        for j in range(i + 1, len(rects))
+        if pygame.Rect(rects[i].tolist()).colliderect(rects[j].tolist())
+    }
+    assert found == expected
+
+
+def test_separate_pushes_along_the_smaller_overlap():
+    a, b = box(0, 0, 0, 0), box(6, 1, 6, 1)
+    assert separate(a, b)
+    assert (a.pos.x, b.pos.x) == (-1, 7)
+    assert not separate(a, b)
+
+
+def test_levels_without_solid_tiles_skip_tile_collision(monkeypatch):
+    calls = []
+    monkeypatch.setattr(collision, "sweep", lambda *args: calls.append(args))
+    game = SimpleNamespace(anim=SimpleNamespace(get_anims=lambda name: {}))
+    assert SolidTiles.from_tiles([]) is None
+    decor = SimpleNamespace(rect=pygame.Rect(0, 0, 16, 16), solid=False)
+    assert SolidTiles.from_tiles([decor]) is None
+
+    lvl = Level("empty", pygame.Vector2(256, 256), pygame.Vector2(64, 64))
+    assert lvl.solid is None
+    game.camera = SimpleNamespace(add_update_rect=lambda rect: None)
+    e = Entity(10, 10, 32, 32, "e", game)
+    lvl.add_entity(e)
+    assert e.collider is None
+    e.prev_pos = e.pos - pygame.Vector2(100, 0)
+    e.update(1)
+    assert calls == []
@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+import pygame
+import pytest
+
+from theta.collision import SolidTiles
+from theta.constraints import ConstraintSolver
+from theta.entity import EntityStore
+
+
+def link_lengths(solver: ConstraintSolver, points: np.ndarray) -> np.ndarray:
+    pos = solver.pos[points]
+    return np.hypot(*np.diff(pos, axis=0).T)
+
+
+def test_rope_keeps_its_length_and_pinned_start():
+    solver = ConstraintSolver(gravity=(0, 400), iterations=40, store=EntityStore())
+    points = solver.add_rope((100, 50), (200, 50), 10)
+    for _ in range(60):
+        solver.step(1 / 60)
+    assert solver.get_pos(points[0]) == (100, 50)
+    assert link_lengths(solver, points) == pytest.approx(np.full(10, 10), rel=0.05)
+    # it swung down from the pin
+    assert solver.get_pos(points[-1]).y > 100
+
+
+def test_pins_drag_points_and_unpinned_points_fall():
+    solver = ConstraintSolver(gravity=(0, 100), store=EntityStore())
+    held, loose = solver.add_point((0, 0)), solver.add_point((50, 0))
+    solver.pin(held, (20, 30))
+    solver.step(0.1)
+    assert solver.get_pos(held) == (20, 30)
+    assert solver.get_pos(loose).y > 0
+    solver.unpin(held)
+    solver.step(0.1)
+    assert solver.get_pos(held).y > 30
+
+
+def test_immovable_points_are_not_pulled_by_constraints():
+    solver = ConstraintSolver(store=EntityStore())
+    wall = solver.add_point((0, 0), mass=0)
+    ball = solver.add_point((30, 0))
+    solver.add_distance(wall, ball, 10)
+    solver.step(1 / 60)
+    assert solver.get_pos(wall) == (0, 0)
+    assert tuple(solver.get_pos(ball)) == pytest.approx((10, 0))
+
+
+def test_angle_constraints_hold_the_bend():
+    solver = ConstraintSolver(iterations=20, store=EntityStore())
+    a, b, c = solver.add_points([(10, 0), (0, 0), (0, 10)])
+    solver.add_distances([a, b], [b, c])
+    solver.add_angle(a, b, c, math.pi / 2)
+    solver.pin(b)
+    solver.pin(a)
+    # bend c flat against a
+    solver.store.pos[solver.rows[c]] = solver.store.prev_pos[solver.rows[c]] = (7, 7)
+    for _ in range(10):
+        solver.step(1 / 60)
+    corner = solver.get_pos(b)
+    ba, bc = solver.get_pos(a) - corner, solver.get_pos(c) - corner
+    assert abs(ba.angle_to(bc)) == pytest.approx(90, abs=1)
+
+
+def test_cloth_hangs_from_its_top_row():
+    solver = ConstraintSolver(gravity=(0, 200), store=EntityStore())
+    points = solver.add_cloth((0, 0), 5, 4, 8, shear=0.5)
+    assert points.shape == (4, 5) and len(solver) == 20
+    top = solver.pos[points[0]].copy()
+    for _ in range(30):
+        solver.step(1 / 60)
+    assert np.array_equal(solver.pos[points[0]], top)
+    assert (solver.pos[points[-1], 1] > 24).all()
+
+
+def test_points_land_on_solid_tiles():
+    tiles = SolidTiles(16, 16, [(x, 4) for x in range(8)])
+    solver = ConstraintSolver(
+        gravity=(0, 2000), substeps=4, tiles=tiles, store=EntityStore()
+    )
+    point = solver.add_point((40, 10))
+    for _ in range(60):
+        solver.step(1 / 60)
+    pos = solver.get_pos(point)
+    assert 60 < pos.y < 64 and pos.x == 40
+
+
+def test_clear_releases_the_points():
+    store = EntityStore(8)
+    solver = ConstraintSolver(store=store)
+    solver.add_rope(pygame.Vector2(), pygame.Vector2(30, 0), 3)
+    assert len(store) == 4
+    solver.clear()
+    assert len(store) == len(solver) == 0
@@ -0,0 +1,90 @@
+import gc
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from theta.constraints import ConstraintSolver
+from theta.entity import EntityStore, VerletObject
+
+
+def test_release_while_the_lock_is_held_is_queued():
+    store = EntityStore(2)
+    first, second = store.allocate(), store.allocate()
+    with store._lock:
+        # what a finalizer running during allocate() does
+        store.release(first)
+        assert store.alive[first]
+    assert store.allocate() == first
+    assert store.alive[second]
+
+
+def test_release_from_inside_grow_does_not_deadlock():
+    store = EntityStore(1)
+    row = store.allocate()
+    grow = store._grow
+
+    def grow_and_collect():
+        store.release(row)
+        grow()
+
+    store._grow = grow_and_collect
+    store.allocate()
+    store._grow = grow
+    assert store.allocate() == row
+    store.release(row)
+    store.release(row)
+    assert len(store._free) == store.capacity - len(store)
+
+
+def test_finalizers_collected_during_allocate_do_not_deadlock():
+    store = EntityStore(1)
+    obj = VerletObject(
+        pygame.Vector2(), pygame.Vector2(), pygame.Vector2(), store=store
+    )
+    solver = ConstraintSolver(store=store)
+    solver.add_rope((0, 0), (10, 0), 3)
+    # cycles, so only the collector can free them
+    obj_cycle, solver.cycle = [obj], solver
+    obj_cycle.append(obj_cycle)
+    rows = {obj.row, *solver.rows.tolist()}
+    del obj, solver, obj_cycle
+    grow = store._grow
+
+    def grow_and_collect():
+        gc.collect()
+        grow()
+
+    store._grow = grow_and_collect
+    gc.disable()
+    try:
+        while store._free:
+            store.allocate()
+        store.allocate()
+    finally:
+        gc.enable()
+        store._grow = grow
+    # queued while allocate() held the lock, and handed out again once it is free
+    assert set(store._released) == rows
+    assert {store.allocate() for _ in rows} == rows
+
+
+def test_integrating_several_steps_at_once_matches_single_steps():
+    stores = EntityStore(4), EntityStore(4)
+    for store in stores:
+        rows = np.array([store.allocate() for _ in range(3)])
+        store.pos[rows] = (0, 0), (5, 5), (1, 2)
+        store.prev_pos[rows] = (-3, 1), (5, 5), (0, 0)
+        store.accel[rows] = (2, 0), (0, 0), (0, -1)
+        store.decel[rows] = 0.1, 0.2, 0.0
+    single, batched = stores
+    for _ in range(4):
+        single.integrate(0.5, rows)
+    moved = batched.integrate(0.5, rows, 4)
+    assert moved.tolist() == [True, False, True]
+    assert np.allclose(batched.pos, single.pos)
+    assert np.allclose(batched.prev_pos, single.prev_pos)
+    assert not batched.accel.any()
@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+import pytest
+
+
+def test_fixed_timestep_catches_up_and_draws_only_the_last_tick(game, monkeypatch):
+    now = [game._last_time]
+    monkeypatch.setattr("theta.game.perf_counter", lambda: now[0])
+    game.clock = SimpleNamespace(tick=lambda fps: 0)
+    muted = []
+    game.ua_entities.append(
+        type(
+            "Probe", (), {"update": lambda self, dt: muted.append(game.camera.muted)}
+        )()
+    )
+
+    now[0] += 2.5 / game.tick_rate
+    game.update()
+    assert muted == [True, False]
+    assert game.get_ticks() == 2
+    assert game.camera.interpolation == pytest.approx(0.5)
+    assert not game.camera.muted
+
+    # a frame shorter than a tick only redraws the last one
+    now[0] += 0.25 / game.tick_rate
+    game.update()
+    assert game.get_ticks() == 2
+    assert game.camera.interpolation == pytest.approx(0.75)
+
+
+def test_a_long_frame_is_capped_at_max_ticks(game, monkeypatch):
+    now = [game._last_time]
+    monkeypatch.setattr("theta.game.perf_counter", lambda: now[0])
+    game.clock = SimpleNamespace(tick=lambda fps: 0)
+    now[0] += 1.0
+    game.update()
+    assert game.get_ticks() == game.max_ticks
@@ -0,0 +1,36 @@
+import os
+
+import pygame
+
+from theta.gfx import RAW, ImageCache
+
+
+def save_image(tmp_path, name, colour=(255, 0, 0)):
+    surf = pygame.Surface((2, 2))
+    surf.fill(colour)
+    path = str(tmp_path / name)
+    pygame.image.save(surf, path)
+    return path
+
+
+def test_image_cache_shares_surfaces_by_normalised_path(tmp_path):
+    cache = ImageCache()
+    path = save_image(tmp_path, "a.png")
+    first = cache.load(path, RAW)
+    assert cache.load(os.path.join(str(tmp_path), ".", "a.png"), RAW) is first
+    assert cache.load(path, RAW, (255, 0, 0)) is not first
+    assert cache.get_stats() == {"size": 2, "hits": 1, "misses": 2, "evictions": 0}
+
+
+def test_image_cache_evicts_and_discards(tmp_path):
+    cache = ImageCache(max_size=2)
+    paths = [save_image(tmp_path, f"{i}.png") for i in range(3)]
+    kept = cache.load(paths[0], RAW)
+    cache.load(paths[1], RAW)
+    cache.load(paths[0], RAW)
+    cache.load(paths[2], RAW)
+    assert cache.evictions == 1
+    assert cache.load(paths[0], RAW) is kept
+
+    cache.discard(paths[0])
+    assert cache.load(paths[0], RAW) is not kept
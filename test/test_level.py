@@ -0,0 +1,167 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from theta import collision, level
+from theta.entity import Entity, EntityStore
+from theta.level import Level, LevelManager
+
+
+class OwnUpdateEntity(Entity):
+    """Takes the per-entity path instead of the level's batch"""
+
+    def update(self, dt, decel=None):
+        super().update(dt, decel)
+
+
+def stub_game():
+    camera = SimpleNamespace(
+        culling=False,
+        muted=False,
+        add_update_rect=lambda rect: None,
+        render=lambda *args, **kwargs: None,
+    )
+    return SimpleNamespace(
+        camera=camera, anim=SimpleNamespace(get_anims=lambda name: {})
+    )
+
+
+def make_level(entities, **kwargs):
+    return Level(
+        "test",
+        pygame.Vector2(1024, 1024),
+        pygame.Vector2(64, 64),
+        [],
+        entities,
+        **kwargs,
+    )
+
+
+def test_remove_entity_removes_that_entity_not_an_equal_one():
+    game = stub_game()
+    a, b = (Entity(10, 10, 8, 8, name, game) for name in "ab")
+    assert a == b
+    lvl = make_level([a, b])
+    lvl.remove_entity(b)
+    assert lvl.entities == [a] and lvl.entities[0] is a
+    assert [obj for obj in lvl.objs if obj is b] == []
+    assert lvl.query_point((12, 12)) == [a]
+
+
+def test_spatial_queries():
+    game = stub_game()
+    near = Entity(100, 100, 8, 8, "near", game)
+    wide = Entity(60, 300, 200, 8, "wide", game)
+    far = Entity(900, 900, 8, 8, "far", game)
+    lvl = make_level([near, wide, far])
+    assert lvl.query_point((104, 104)) == [near]
+    assert {e.name for e in lvl.query_rect(pygame.Rect(0, 0, 400, 400))} == {
+        "near",
+        "wide",
+    }
+    assert lvl.query_radius((250, 304), 20) == [wide]
+    assert lvl.query_radius((120, 104), 12) == [near]
+    assert lvl.query_radius((120, 104), 11) == []
+    assert set(lvl.fully_index(wide)) == {
+        lvl.index_at_pos((x, 300)) for x in range(60, 260)
+    }
+
+    far.rect.topleft = (10, 10)
+    lvl.grid.move(far)
+    assert lvl.query_point((12, 12)) == [far]
+    assert lvl.query_point((904, 904)) == []
+
+
+def test_reloading_the_same_level_waits_for_its_save(monkeypatch):
+    manager = LevelManager.__new__(LevelManager)
+    manager._executor = ThreadPoolExecutor(1)
+    manager._preloaded = OrderedDict()
+    manager._saving = {}
+    manager.current_lvl = SimpleNamespace(name="0", meta={}, close=lambda: None)
+    monkeypatch.setattr(level, "encode_state", lambda lvl: b"state")
+
+    release = threading.Event()
+    written = []
+
+    def write_cache(name, data):
+        release.wait(1)
+        written.append(name)
+
+    def load_lvl(name):
+        assert written == [name]
+        return SimpleNamespace(name=name, meta={}, close=lambda: None)
+
+    manager._write_cache = write_cache
+    manager.load_lvl = load_lvl
+    threading.Timer(0.05, release.set).start()
+    manager.switch_lvl("0")
+    assert manager.current_lvl.name == "0"
+    manager._executor.shutdown()
+
+
+def test_band_entities_follow_the_active_path():
+    game = stub_game()
+    camera = game.camera
+    store = EntityStore()
+    # uids 0 and 2 are in the band and, with a band rate of 4, step on ticks 4, 8 and 2, 6
+    band = Entity(1000, 100, 8, 8, "band", game, store=store)
+    active = Entity(100, 100, 8, 8, "active", game, store=store)
+    own = OwnUpdateEntity(1000, 300, 8, 8, "own", game, store=store)
+    entities = [band, active, own]
+    for e in entities:
+        e.prev_pos = e.pos - pygame.Vector2(3, -2)
+    start = [pygame.Vector2(e.pos) for e in entities]
+    lvl = Level(
+        "lod",
+        pygame.Vector2(2048, 2048),
+        pygame.Vector2(256, 256),
+        [],
+        entities,
+        active_radius=50,
+        band_radius=2000,
+        band_rate=4,
+        store=store,
+    )
+    for _ in range(8):
+        lvl.update(1, pygame.Rect(0, 0, 200, 200))
+    assert lvl.lod_stats == (1, 1, 1)
+    assert not camera.muted
+    moved = [tuple(e.pos - p) for e, p in zip(entities, start)]
+    assert moved[0] == pytest.approx(moved[1])
+    assert moved[2] == pytest.approx(moved[1])
+
+
+def test_band_entities_do_not_tunnel_through_walls():
+    game = stub_game()
+    store = EntityStore()
+    e = Entity(100, 100, 8, 8, "band", game, store=store)
+    e.prev_pos = e.pos - pygame.Vector2(10, -2)
+    lvl = make_level([e], active_radius=10, band_radius=2000, band_rate=4, store=store)
+    lvl.solid = collision.SolidTiles(16, 16, [(8, 6)])
+    e.collider = lvl._handle_collisions
+    for _ in range(4):
+        lvl.update(1, pygame.Rect(0, 0, 20, 20))
+    # four steps cover about 31px, the wall is 20px away
+    assert e.pos.x == 120 and e.get_vel().x == 0
+    assert e.get_vel().y == pytest.approx(-2 * 0.9**4)
+    assert e.rect.topleft == (120, int(e.pos.y))
+
+
+def test_entities_teleported_at_rest_are_refiled():
+    game = stub_game()
+    store = EntityStore()
+    e = Entity(100, 100, 8, 8, "still", game, store=store)
+    lvl = make_level([e], store=store)
+    e.teleport(pygame.Vector2(500.5, 700))
+    lvl.update(1)
+    assert e.rect.topleft == (500, 700)
+    assert lvl.query_point((504, 704)) == [e]
+    assert lvl.query_point((104, 104)) == []
@@ -0,0 +1,110 @@
+import json
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from theta.levelcache import CompiledLevel, apply_state, encode_state
+from theta.tilemap import TileLayer
+
+
+def make_level(names, tileset_path=None, digest=bytes(20)):
+    game = SimpleNamespace(camera=SimpleNamespace(add_update_rect=lambda rect: None))
+    layer = TileLayer(
+        16,
+        16,
+        np.zeros((4, 4), np.int32),
+        [None] * len(names),
+        names,
+        game,
+        tileset_path=tileset_path,
+    )
+    return SimpleNamespace(
+        entities=[], authored={}, tile_layer=layer, unknown_tiles={}, digest=digest
+    )
+
+
+def test_tile_edits_of_unknown_types_survive_a_resave():
+    saved = make_level([None, "grass", "stone"])
+    saved.tile_layer.set_tile(1, 2, 1)
+    saved.tile_layer.set_tile(3, 0, 2)
+
+    loaded = make_level([None, "grass"])
+    assert apply_state(loaded, encode_state(saved), None)
+    assert loaded.tile_layer.edits == {(1, 2): 1}
+    assert loaded.unknown_tiles == {(3, 0): "stone"}
+
+    restored = make_level([None, "grass", "stone"])
+    assert apply_state(restored, encode_state(loaded), None)
+    assert restored.tile_layer.edits == {(1, 2): 1, (3, 0): 2}
+    assert restored.unknown_tiles == {}
+
+
+def write_level(folder, entities):
+    os.makedirs(folder)
+    with open(os.path.join(folder, "tileset.tsx"), "w") as f:
+        f.write(
+            '<tileset tilewidth="8" tileheight="8">'
+            '<tile id="0"><image source="tiles/grass.png"/></tile>'
+            '<tile id="1"><image source="tiles/stone.png"/></tile></tileset>'
+        )
+    with open(os.path.join(folder, "map.tmx"), "w") as f:
+        f.write(
+            '<map tilewidth="8" tileheight="8"><tileset firstgid="1" source="tileset.tsx"/>'
+            '<layer width="3" height="2"><data encoding="csv">1,0,1,\n0,0,1</data></layer></map>'
+        )
+    with open(os.path.join(folder, "entities.json"), "w") as f:
+        json.dump(entities, f)
+    return folder + os.sep
+
+
+def test_compiled_level_round_trips_float_rects(tmp_path):
+    entities = [
+        {"name": "a", "rect": [1.5, 2, 8, 8.25], "real": True},
+        {"name": "b", "rect": [3, 4, 5, 6], "real": False},
+    ]
+    folder = write_level(str(tmp_path / "lvl"), entities)
+    cache = str(tmp_path / "caches" / "lvl.lvl")
+    compiled = CompiledLevel(folder, cache)
+    assert os.path.exists(cache)
+    cached = CompiledLevel(folder, cache)
+    assert cached.entities == entities
+    assert [type(v) for v in cached.entities[1]["rect"]] == [int] * 4
+    assert cached.ids.tolist() == compiled.ids.tolist()
+    assert cached.tile_sources == compiled.tile_sources
+
+
+def test_tile_edits_resolve_against_the_whole_tileset(tmp_path, monkeypatch):
+    folder = write_level(str(tmp_path / "lvl"), [])
+    os.makedirs(tmp_path / "data" / "tiles")
+    pygame.display.set_mode((1, 1))
+    for name in ("grass", "stone"):
+        pygame.image.save(
+            pygame.Surface((8, 8)), str(tmp_path / "data" / "tiles" / f"{name}.png")
+        )
+    monkeypatch.chdir(tmp_path)
+
+    saved = make_level([None, "grass", "stone"])
+    saved.tile_layer.set_tile(3, 0, 2)
+    # the map only uses grass, stone is in the tileset alone
+    loaded = make_level([None, "grass"], folder + "tileset.tsx")
+    assert apply_state(loaded, encode_state(saved), None)
+    layer = loaded.tile_layer
+    assert loaded.unknown_tiles == {}
+    assert layer.get_name(layer.get(3, 0)) == "stone"
+    assert layer.images[layer.get(3, 0)] is not None
+
+
+def test_states_of_other_sources_are_discarded():
+    saved = make_level([None, "grass"], digest=b"a" * 20)
+    saved.tile_layer.set_tile(1, 1, 1)
+    assert apply_state(
+        make_level([None, "grass"], digest=b"a" * 20), encode_state(saved), None
+    )
+    edited = make_level([None, "grass"], digest=b"b" * 20)
+    assert not apply_state(edited, encode_state(saved), None)
+    assert edited.tile_layer.edits == {}
@@ -0,0 +1,162 @@
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from theta.particle import (
+    DROP_NEWEST,
+    DROP_OLDEST,
+    GROW,
+    ParticleBurst,
+    ParticlePool,
+    ParticleSystem,
+    SpriteCache,
+)
+
+
+def test_infinite_lifetime_keeps_full_size_and_alpha():
+    burst = ParticleBurst(
+        pygame.Vector2(0, 0),
+        4,
+        8,
+        [(255, 0, 0)],
+        -1,
+        -1,
+        pygame.Vector2(1, 1),
+        shrink=True,
+        fade=True,
+    )
+    for _ in range(10):
+        burst.update(1)
+    assert burst.pool.count == 8
+    assert (burst.sizes == 4).all()
+    assert (burst.alphas == 255).all()
+    assert len(burst.get_blits()) == 8
+
+
+def test_finite_lifetime_fades_and_expires():
+    burst = ParticleBurst(
+        pygame.Vector2(0, 0),
+        4,
+        8,
+        [(255, 0, 0)],
+        -1,
+        4,
+        pygame.Vector2(1, 1),
+        shrink=True,
+        fade=True,
+    )
+    for _ in range(2):
+        burst.update(1)
+    assert (burst.alphas < 255).all()
+    assert (burst.sizes < 4).all()
+    for _ in range(4):
+        burst.update(1)
+    assert burst.pool.count == 0
+
+
+def test_burst_speed_is_independent_of_spawn_position():
+    burst = ParticleBurst(
+        pygame.Vector2(0, 0),
+        2,
+        2000,
+        [(255, 0, 0)],
+        1,
+        10,
+        pygame.Vector2(8, 8),
+        spread=0,
+    )
+    jitter_y = burst.pos[:, 1] + 1
+    speed = abs(burst.vel[:, 1])
+    assert abs(np.corrcoef(jitter_y, speed)[0, 1]) < 0.1
+
+
+def test_sprite_cache_shares_surfaces_per_alpha_bucket():
+    cache = SpriteCache(max_size=2, alpha_step=32)
+    first = cache.get("circle", (255, 0, 0), 4, alpha=70)
+    assert cache.get("circle", [255, 0, 0], 4, alpha=90) is first
+    assert first.get_alpha() == 64
+    assert cache.get("circle", (255, 0, 0), 4) is not first
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_sprite_cache_evicts_least_recently_used():
+    cache = SpriteCache(max_size=2)
+    kept = cache.get("circle", (255, 0, 0), 4)
+    evicted = cache.get("circle", (0, 255, 0), 4)
+    cache.get("circle", (255, 0, 0), 4)
+    cache.get("circle", (0, 0, 255), 4)
+    assert len(cache) == 2
+    assert cache.get("circle", (255, 0, 0), 4) is kept
+    assert cache.get("circle", (0, 255, 0), 4) is not evicted
+
+
+def test_pool_kill_keeps_the_live_rows():
+    pool = ParticlePool(8)
+    rows = pool.spawn(5)
+    pool.timer[rows] = [0, 1, 2, 3, 4]
+    pool.kill(np.array([False, True, False, True, True]))
+    assert pool.count == 3
+    assert sorted(pool.timer[: pool.count].tolist()) == [1, 3, 4]
+
+
+def test_pool_overflow_policies():
+    oldest = ParticlePool(4, DROP_OLDEST, 4)
+    oldest.timer[oldest.spawn(3)] = [0, 1, 2]
+    oldest.timer[oldest.spawn(3)] = [3, 4, 5]
+    assert oldest.count == 4 and oldest.dropped == 2
+    assert sorted(oldest.timer[:4].tolist()) == [2, 3, 4, 5]
+
+    newest = ParticlePool(4, DROP_NEWEST, 4)
+    newest.spawn(3)
+    assert newest.spawn(3) == slice(3, 4)
+    assert newest.dropped == 2
+
+    grow = ParticlePool(4, GROW, 4)
+    grow.spawn(3)
+    grow.spawn(3)
+    assert grow.count == 6 and grow.dropped == 0
+
+
+class RecordingCamera:
+    muted = False
+
+    def __init__(self):
+        self.batches = []
+        self.dirty = []
+        self.culled = 0
+
+    def is_visible(self, rect):
+        return rect.x < 1000
+
+    def render_batch(self, blits):
+        self.batches.append(blits)
+
+    def add_update_rects(self, rects):
+        self.dirty.extend(rects)
+
+    def add_culled(self, count):
+        self.culled += count
+
+
+def test_particle_system_submits_one_batch_and_drops_dead_emitters():
+    camera = RecordingCamera()
+    system = ParticleSystem(SimpleNamespace(camera=camera))
+    args = (4, 6, [(255, 0, 0)], 1, 3, pygame.Vector2(1, 1))
+    system.emit(pygame.Vector2(0, 0), *args)
+    system.emit(pygame.Vector2(100, 0), *args)
+    system.emit(pygame.Vector2(5000, 0), *args)
+    system.update(1)
+    assert len(camera.batches) == 1
+    assert len(camera.batches[0]) == 12
+    assert camera.culled == 6
+
+    for _ in range(5):
+        system.update(1)
+    assert system.emitters == []
+    # the area the last particles covered is redrawn once they are gone
+    assert camera.dirty and system._bounds == {}
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from theta.profiler import Profiler, _null_span
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler(8)
+    assert profiler.span("frame") is _null_span
+    with profiler.span("frame"):
+        pass
+    assert len(profiler) == 0
+
+
+def test_ring_buffer_keeps_the_newest_spans():
+    profiler = Profiler(4, enabled=True)
+    for i in range(6):
+        profiler._record(profiler.span("a" if i % 2 else "b").name_id, i, i + 0.001 * i)
+    assert len(profiler) == 4
+    assert profiler.get_durations("a") == pytest.approx([0.003, 0.005])
+    assert profiler.summary()["b"]["count"] == 2
+
+
+def test_chrome_trace_export(tmp_path):
+    profiler = Profiler(8, enabled=True)
+
+    @profiler.profile("work")
+    def work():
+        with profiler.span("inner"):
+            pass
+
+    work()
+    profiler.next_frame()
+    work()
+    path = str(tmp_path / "trace.json")
+    profiler.export_chrome_trace(path)
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    assert [e["name"] for e in events] == ["inner", "work", "inner", "work"]
+    assert {e["args"]["frame"] for e in events} == {0, 1}
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
@@ -0,0 +1,122 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pygame
+
+from theta import tilemap
+from theta.tilemap import CHUNK_SIZE, EMPTY, StreamingTileLayer, TileLayer, stream_tmx
+
+
+def make_layer(ids, tile_size=4, solid=None):
+    camera = SimpleNamespace(add_update_rect=lambda rect: None)
+    images = [None, pygame.Surface((tile_size, tile_size))]
+    images[1].fill((0, 255, 0))
+    return TileLayer(
+        tile_size,
+        tile_size,
+        np.asarray(ids, np.int32),
+        images,
+        [None, "grass"],
+        SimpleNamespace(camera=camera),
+        solid,
+    )
+
+
+def test_layer_lookups_respect_its_origin():
+    ids = np.zeros((4, 6))
+    ids[1, 2] = 1
+    layer = make_layer(ids, solid=[False, True])
+    layer.col0, layer.row0 = -2, 3
+    assert layer.get(0, 4) == 1
+    assert layer.get(-3, 3) == EMPTY
+    assert layer.tile_at((1, 17)) == 1
+    assert layer.is_solid(0, 4) and not layer.is_solid(1, 4)
+    assert layer.are_solid([0, 1, 100], [4, 4, 4]).tolist() == [True, False, False]
+    assert layer.rect == pygame.Rect(-8, 12, 24, 16)
+    assert layer.get_blits(layer.rect) == [(layer.images[1], (0, 16))]
+    assert len(layer) == 1
+
+
+def test_set_tile_records_the_edit_and_rebakes_its_chunk():
+    layer = make_layer(np.zeros((CHUNK_SIZE, CHUNK_SIZE)))
+    assert layer.get_chunk(0, 0) is None
+    layer.set_tile(3, 5, 1)
+    assert layer.edits == {(3, 5): 1}
+    chunk = layer.get_chunk(0, 0)
+    assert chunk.get_at((13, 21)) == (0, 255, 0)
+    assert layer.get_id("grass") == 1 and layer.get_id(None) == EMPTY
+
+
+def test_visible_chunks_are_not_rebaked_when_more_than_the_cache_size_are_on_screen(
+    monkeypatch,
+):
+    side = 20  # 400 chunks, more than MAX_BAKED_CHUNKS
+    layer = make_layer(np.ones((side * CHUNK_SIZE, side * CHUNK_SIZE)), 1)
+    assert side * side > tilemap.MAX_BAKED_CHUNKS
+    baked = []
+    bake = layer._bake_chunk
+    monkeypatch.setattr(
+        layer, "_bake_chunk", lambda x, y: baked.append(1) or bake(x, y)
+    )
+    for _ in range(3):
+        assert len(layer.get_chunk_blits(layer.rect)) == side * side
+    assert len(baked) == side * side
+
+    # once the view shrinks back, the cache shrinks to its normal size
+    layer.get_chunk_blits(pygame.Rect(0, 0, CHUNK_SIZE, CHUNK_SIZE))
+    assert len(layer._chunks) == tilemap.MAX_BAKED_CHUNKS
+
+
+def write_infinite_map(tmp_path, chunks_x=4, chunk=4):
+    """A row of `chunks_x` chunks, every cell of chunk x holds gid x + 1"""
+    with open(tmp_path / "tileset.tsx", "w") as f:
+        f.write(
+            '<tileset tilewidth="8" tileheight="8">'
+            + "".join(
+                f'<tile id="{i}"><image source="tiles/t{i}.png"/></tile>'
+                for i in range(chunks_x)
+            )
+            + "</tileset>"
+        )
+    body = "".join(
+        f'<chunk x="{x * chunk}" y="0" width="{chunk}" height="{chunk}">\n'
+        + ",\n".join(",".join([str(x + 1)] * chunk) for _ in range(chunk))
+        + "\n</chunk>\n"
+        for x in range(chunks_x)
+    )
+    with open(tmp_path / "map.tmx", "w") as f:
+        f.write(
+            '<map tilewidth="8" tileheight="8" infinite="1">'
+            '<tileset firstgid="1" source="tileset.tsx"/>'
+            f'<layer><data encoding="csv">\n{body}</data></layer></map>'
+        )
+    return str(tmp_path / "map.tmx"), str(tmp_path / "tileset.tsx")
+
+
+def test_streaming_layer_loads_chunks_near_the_view(tmp_path):
+    game = SimpleNamespace(camera=SimpleNamespace(add_update_rect=lambda rect: None))
+    layer = stream_tmx(*write_infinite_map(tmp_path), game, radius=0)
+    try:
+        assert isinstance(layer, StreamingTileLayer)
+        assert layer.rect == pygame.Rect(0, 0, 128, 32)
+        layer.load_area(pygame.Rect(0, 0, 32, 32))
+        assert [layer.is_loaded(x, 0) for x in range(4)] == [True, False, False, False]
+        assert layer.get(1, 1) == 1 and layer.get(5, 1) == EMPTY
+
+        view = pygame.Rect(96, 0, 32, 32)
+        deadline = time.monotonic() + 5
+        while not layer.is_loaded(3, 0) and time.monotonic() < deadline:
+            layer.stream(view)
+            time.sleep(0.001)
+        assert layer.get(13, 2) == 4
+        # more than a chunk away from the view, so it was unloaded
+        assert not layer.is_loaded(0, 0)
+
+        layer.set_tile(1, 1, 3)
+        layer.stream(view)
+        assert layer.is_loaded(0, 0) and layer.get(1, 1) == 3
+        assert layer.edits == {(1, 1): 3}
+        assert layer.get_name(3) == "t2" and layer.get_id("t2") == 3
+    finally:
+        layer.close()
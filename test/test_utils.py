@@ -0,0 +1,16 @@
+import pygame
+
+from theta.utils import merge_rects
+
+
+def test_merge_rects_joins_touching_rects_and_drops_empty_ones():
+    merged = merge_rects(
+        [(0, 0, 10, 10), (10, 0, 10, 10), (100, 100, 5, 5), (50, 50, 0, 10)]
+    )
+    assert sorted(map(tuple, merged)) == [(0, 0, 20, 10), (100, 100, 5, 5)]
+
+
+def test_merge_rects_chains_merges():
+    # the middle rect joins the outer two, which don't touch each other
+    merged = merge_rects([(0, 0, 10, 10), (40, 0, 10, 10), (8, 0, 34, 10)])
+    assert merged == [pygame.Rect(0, 0, 50, 10)]
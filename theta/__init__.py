@@ -1,7 +1,24 @@
 from os import sep as _sep
 
-from . import camera, game, gfx, input, level, particle, sfx, text, ui, utils
-from .entity import Entity, SpriteStackEntity
+from . import (
+    camera,
+    collision,
+    constraints,
+    game,
+    gfx,
+    input,
+    level,
+    levelcache,
+    particle,
+    profiler,
+    sfx,
+    spatial,
+    tilemap,
+    text,
+    ui,
+    utils,
+)
+from .entity import Entity, EntityStore, SpriteStackEntity
 from .game import Game
 
 
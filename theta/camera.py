@@ -1,45 +1,176 @@
+import hashlib
+import math
 import os
+import struct
+from operator import itemgetter
 
+import numpy as np
 import pygame
 
+from .utils import merge_rects, read_file, write_file_atomic
+
 MIN_ZOOM = 0.1
+# past this many merged dirty rects, or this fraction of the screen, the whole screen is redrawn instead
+MAX_DIRTY_RECTS = 16
+FULL_REDRAW_RATIO = 0.6
+CULL_MARGIN = 64  # pixels around the viewport in which surfaces are still drawn
+MAX_LAYER_CACHE_AREA = 4096 * 4096  # cached layers larger than this are drawn normally
+
+CUTSCENE_CACHE_DIR = (
+    ".cache"  # inside the cutscene folder, hidden from the cutscene listing
+)
+CUTSCENE_CACHE_EXT = ".curve"
+CUTSCENE_CACHE_MAGIC = b"THCS"
+CUTSCENE_CACHE_VERSION = 1
+
+# render layers, drawn in ascending order
+LAYERS = (BACKGROUND, TILES, ENTITIES, PARTICLES, UI) = tuple(range(5))
+
+# queued items are (z, special_flags, surf, pos, prev_pos), sorted stably by the first two,
+# so surfaces with the same z and blend mode are drawn in the order they were submitted
+_sort_key = itemgetter(0, 1)
 
 
 def _bezier_curve_point(point_list: list[pygame.Vector2], t: float) -> pygame.Vector2:
-    if len(point_list) == 1:
-        return point_list[0]
-    return round(
-        _bezier_curve_point(point_list[:-1], t) * (1 - t)
-        + _bezier_curve_point(point_list[1:], t) * t,
-        5,
+    points = [pygame.Vector2(point) for point in point_list]
+    for n in range(len(points) - 1, 0, -1):  # De Casteljau, O(n^2) for a single point
+        for i in range(n):
+            points[i] = points[i] * (1 - t) + points[i + 1] * t
+    return round(points[0], 5)
+
+
+def bezier_points(def_points, t: np.ndarray) -> np.ndarray:
+    """:returns: the points of the bezier curve at every value of `t` at once, using the Bernstein basis"""
+    def_points = np.asarray(def_points, np.float64).reshape(-1, 2)
+    n = len(def_points) - 1
+    t = np.asarray(t, np.float64)[:, None]
+    i = np.arange(n + 1)
+    coefficients = np.array([math.comb(n, k) for k in i], np.float64)
+    basis = coefficients * t**i * (1 - t) ** (n - i)
+    return basis @ def_points
+
+
+def arc_length_table(def_points, count: int, samples_per_point: int = 8) -> np.ndarray:
+    """:returns: `count` points along the bezier curve, spaced at equal distances rather than equal steps of t"""
+    dense = bezier_points(
+        def_points, np.linspace(0, 1, max(count * samples_per_point, 2))
+    )
+    lengths = np.concatenate(([0], np.cumsum(np.hypot(*np.diff(dense, axis=0).T))))
+    if not lengths[-1]:
+        return np.repeat(dense[:1], count, axis=0)
+    distances = np.linspace(0, lengths[-1], count)
+    return np.column_stack(
+        (
+            np.interp(distances, lengths, dense[:, 0]),
+            np.interp(distances, lengths, dense[:, 1]),
+        )
     )
 
 
 def bezier_curve(def_points: list[pygame.Vector2], speed=0.01) -> list[pygame.Vector2]:
-    points = []
-    for t in [_ * speed for _ in range(int((1 + speed * 2) // speed))]:
-        points.append(_bezier_curve_point(def_points, t))
-    return points
+    return [
+        pygame.Vector2(point)
+        for point in bezier_points(
+            def_points, np.linspace(0, 1, int(round(1 / speed)) + 1)
+        ).tolist()
+    ]
 
 
 class CameraCutscene:
-    def __init__(self, path: str):
+    _header = struct.Struct(
+        "<4sHq20sdII"
+    )  # magic, version, mtime, sha1, speed, points, curve length
+
+    def __init__(self, path: str, cache_dir: str | None = None):
         self.path = path
         self.name = path.split(os.sep)[-1].split(".")[0]
-        self.points = []
-        with open(
-            self.path, "r"
-        ) as data:  # stored as: num1x,num1y/num2x,num2y...;speed
-            for p in data.read().split(";")[0].split("/"):
-                self.points.append(
-                    pygame.Vector2(float(p.split(",")[0]), float(p.split(",")[1]))
+        self.cache_path = (
+            None if cache_dir is None else cache_dir + self.name + CUTSCENE_CACHE_EXT
+        )
+        if not self._read_cache():
+            with open(
+                self.path, "rb"
+            ) as data:  # stored as: num1x,num1y/num2x,num2y...;speed, points are relative to the scroll the cutscene starts at
+                source = data.read()
+            points, speed = source.decode().split(";")
+            self.points = [
+                pygame.Vector2(float(p.split(",")[0]), float(p.split(",")[1]))
+                for p in points.strip().split("/")
+            ]
+            self.speed = float(speed)
+            self.curve = arc_length_table(self.points, int(round(1 / self.speed)) + 1)
+            self._write_cache(source)
+
+    def _read_cache(self) -> bool:
+        """Loads the sampled curve from the cache if it was built from the current source file"""
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return False
+        data = read_file(self.cache_path, True)
+        if len(data) < self._header.size:
+            return False
+        magic, version, mtime, digest, speed, n_points, n_curve = (
+            self._header.unpack_from(data)
+        )
+        if magic != CUTSCENE_CACHE_MAGIC or version != CUTSCENE_CACHE_VERSION:
+            return False
+        if len(data) < self._header.size + 16 * (n_points + n_curve):
+            return False  # truncated
+        if mtime != os.stat(self.path).st_mtime_ns:
+            source = read_file(self.path, True)
+            if hashlib.sha1(source).digest() != digest:
+                return False
+            self._header.pack_into(  # contents are unchanged, only the file was touched
+                data := bytearray(data),
+                0,
+                magic,
+                version,
+                os.stat(self.path).st_mtime_ns,
+                digest,
+                speed,
+                n_points,
+                n_curve,
+            )
+            # a read-only cache folder only means the mtime is refreshed again next time
+            try:
+                write_file_atomic(self.cache_path, bytes(data), True)
+            except OSError:
+                pass
+        arrays = np.frombuffer(
+            data, np.float64, 2 * (n_points + n_curve), self._header.size
+        ).reshape(-1, 2)
+        self.points = [pygame.Vector2(point) for point in arrays[:n_points].tolist()]
+        self.speed = speed
+        self.curve = arrays[n_points:].copy()
+        return True
+
+    def _write_cache(self, source: bytes):
+        if self.cache_path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            write_file_atomic(
+                self.cache_path,
+                self._header.pack(
+                    CUTSCENE_CACHE_MAGIC,
+                    CUTSCENE_CACHE_VERSION,
+                    os.stat(self.path).st_mtime_ns,
+                    hashlib.sha1(source).digest(),
+                    self.speed,
+                    len(self.points),
+                    len(self.curve),
                 )
-            self.speed = float(data.read().split(";")[-1])
-            self.curve = bezier_curve(self.points, self.speed)
+                + np.asarray(self.points, np.float64).tobytes()
+                + np.ascontiguousarray(self.curve, np.float64).tobytes(),
+                True,
+            )
+        except OSError:  # a read-only data folder just means no cache
+            pass
 
 
 class Camera:  # TODO: better camera (GMTK-recommended)
-    def __init__(self, w: int, h: int, bg_colour=(0, 0, 0)):
+    def __init__(
+        self, w: int, h: int, bg_colour=(0, 0, 0), cull_margin: int = CULL_MARGIN
+    ):
         self.display = pygame.display.set_mode((w, h), pygame.RESIZABLE)
         self.screen = pygame.Surface((w, h))
         self.scroll = pygame.Vector2(0, 0)
@@ -51,61 +182,191 @@ class Camera:  # TODO: better camera (GMTK-recommended)
         self.cutscenes = {}
         self._zoom_inv = 1.0
         self.current_points = None
+        self._cutscene_frame = 0
 
         self._the_dirty_rects = []
-        self._to_blit = []
-
+        self._full_redraw = True
+        self._queue = {}
+        self._last_queue = {}
+        self._cached_layers = set()
+        self._layer_cache = {}
+        self._view = None
+
+        self.culling = True
+        self.cull_margin = cull_margin
+        self.interpolation = (
+            1.0  # how far between prev_pos and pos interpolated surfaces are drawn
+        )
+        self.muted = False  # while muted, nothing can be submitted
+        self._viewport = pygame.Rect(0, 0, w, h)
+        self._last_scroll = self.scroll.copy()
+        self._drawn = 0
+        self._culled = 0
+        self._render_stats = (0, 0)
+        self._update_viewport()
+
+        self.cutscene_cache_path = self.cutscene_path + CUTSCENE_CACHE_DIR + os.sep
+        self._cutscene_files = {}
         for file in os.listdir(self.cutscene_path):
             if file[0] != ".":
-                cutscene = CameraCutscene(file)
-                self.cutscenes[cutscene.name] = cutscene
+                self._cutscene_files[file.split(".")[0]] = self.cutscene_path + file
 
     def update(self, full_screen=True):
-        if full_screen:
-            self.screen.fill(self._bgc)
+        if self.scroll != self._last_scroll:
+            self._full_redraw = True
+
+        batches = self._flush_queue()
 
+        if self._zoom_inv == 1.0 and self.screen.get_size() == self.display.get_size():
+            self._composite(batches, full_screen or self._full_redraw)
+        else:
+            view_size = (
+                round(self.screen.get_width() * self._zoom_inv),
+                round(self.screen.get_height() * self._zoom_inv),
+            )
+            if self._view is None or self._view.get_size() != view_size:
+                self._view = pygame.Surface(view_size)
+            self._view.fill(self._bgc)
+            for batch in batches:
+                self._view.blits(batch, 0)
+            pygame.transform.scale(self._view, self.display.get_size(), self.display)
+            pygame.display.flip()
+            self._full_redraw = True  # the back buffer is stale once we leave this path
+        self._the_dirty_rects *= 0
+        self._render_stats = (self._drawn, self._culled)
+        self._drawn = self._culled = 0
+
+        # the next frame's surfaces are culled as they are submitted, so the scroll has to advance first
         if self.current_points is not None:
-            try:
-                self.scroll = pygame.Vector2(next(self.current_points))
-                self._the_dirty_rects.append(
-                    pygame.Rect(0, 0, *self.display.get_size())
+            if self._cutscene_frame < len(self.current_points):
+                self.scroll = pygame.Vector2(
+                    self.current_points[self._cutscene_frame].tolist()
                 )
-            except StopIteration:
+                self._cutscene_frame += 1
+                self._full_redraw = True
+            else:
                 self.unlock()
                 self.current_points = None
-
-        screen = pygame.transform.scale_by(self.screen, self._zoom_inv)
-        for i, (img, pos) in enumerate(self._to_blit):
-            self._to_blit[i] = (
-                img,
-                pos + self.scroll,
+        self._update_viewport()
+
+    def _update_viewport(self):
+        self._last_scroll = self.scroll.copy()
+        self._viewport = pygame.Rect(
+            -self.scroll[0],
+            -self.scroll[1],
+            self.screen.get_width() * self._zoom_inv,
+            self.screen.get_height() * self._zoom_inv,
+        ).inflate(2 * self.cull_margin, 2 * self.cull_margin)
+
+    def _flush_queue(self) -> list[list]:
+        """Sorts every layer and turns it into one list for Surface.blits, in screen coordinates"""
+        scroll_x, scroll_y = self.scroll
+        alpha = self.interpolation
+        batches = []
+        for layer in sorted(self._queue.keys() | self._cached_layers):
+            items = self._queue.get(layer, [])
+            if layer in self._cached_layers:
+                if self._layer_cache.get(layer) is None:
+                    self._layer_cache[layer] = self._bake_layer(items)
+                if self._layer_cache[layer]:
+                    surf, (x, y) = self._layer_cache[layer]
+                    batches.append([(surf, (x + scroll_x, y + scroll_y))])
+                    continue
+            if items:
+                items.sort(key=_sort_key)
+                batches.append(
+                    [
+                        (
+                            surf,
+                            (
+                                (pos[0] + scroll_x, pos[1] + scroll_y)
+                                if prev is None
+                                else (
+                                    prev[0] + (pos[0] - prev[0]) * alpha + scroll_x,
+                                    prev[1] + (pos[1] - prev[1]) * alpha + scroll_y,
+                                )
+                            ),
+                            None,
+                            flags,
+                        )
+                        for _, flags, surf, pos, prev in items
+                    ]
+                )
+        self._last_queue = self._queue
+        self._queue = {}
+        return batches
+
+    @staticmethod
+    def _bake_layer(items: list) -> tuple[pygame.Surface, tuple[int, int]] | bool:
+        """Composites a layer into one surface, returning it and its world position, or False if it can't be cached"""
+        if not items:
+            return False
+        bounds = pygame.Rect(items[0][3], items[0][2].get_size()).unionall(
+            [pygame.Rect(pos, surf.get_size()) for _, _, surf, pos, _ in items]
+        )
+        if bounds.w * bounds.h > MAX_LAYER_CACHE_AREA:
+            return False
+        items.sort(key=_sort_key)
+        surf = pygame.Surface(bounds.size, pygame.SRCALPHA)
+        surf.blits(
+            [
+                (img, (pos[0] - bounds.x, pos[1] - bounds.y), None, flags)
+                for _, flags, img, pos, _ in items
+            ],
+            0,
+        )
+        return surf, bounds.topleft
+
+    def _composite(self, batches: list[list], full: bool):
+        """Redraws the dirty regions of the back buffer and copies only those to the display"""
+        if not full:
+            screen_rect = self.screen.get_rect()
+            rects = merge_rects(
+                [
+                    screen_rect.clip(pygame.Rect(rect).move(self.scroll))
+                    for rect in self._the_dirty_rects
+                ]
             )
-        screen.blits(self._to_blit, 0)
-        self._to_blit *= 0
-        pygame.transform.scale(screen, self.display.get_size(), self.display)
-
-        if (
-            full_screen
-            or self._zoom_inv != 1.0
-            or self.screen.get_size() != self.display.get_size()
-        ):
+            full = (
+                len(rects) > MAX_DIRTY_RECTS
+                or sum(rect.w * rect.h for rect in rects)
+                > FULL_REDRAW_RATIO * screen_rect.w * screen_rect.h
+            )
+
+        if full:
+            self.screen.fill(self._bgc)
+            for batch in batches:
+                self.screen.blits(batch, 0)
+            self.display.blit(self.screen, (0, 0))
             pygame.display.flip()
-        else:
-            pygame.display.update(self._the_dirty_rects)
-        self._the_dirty_rects *= 0
+        elif rects:
+            for rect in rects:
+                self.screen.set_clip(rect)
+                self.screen.fill(self._bgc, rect)
+                for batch in batches:
+                    self.screen.blits(batch, 0)
+            self.screen.set_clip(None)
+            self.display.blits([(self.screen, rect, rect) for rect in rects], 0)
+            pygame.display.update(rects)
+        self._full_redraw = False
 
     def play_cutscene(self, name: str) -> list[pygame.Vector2]:
-        return_points = []
-        last_point = self.scroll
-
-        for point in self.cutscenes[name].curve:
-            last_point += point
-            return_points.append(last_point)
-
-        self.current_points = iter(return_points)
+        self.current_points = self.get_cutscene(name).curve + tuple(self.scroll)
+        self._cutscene_frame = 0
         self.lock()
-        self._the_dirty_rects.append(pygame.Rect(0, 0, *self.display.get_size()))
-        return return_points
+        self._full_redraw = True
+        return [pygame.Vector2(point) for point in self.current_points.tolist()]
+
+    def get_cutscene(self, name: str) -> CameraCutscene:
+        """Cutscenes are only parsed (or read from the cache) the first time they are needed"""
+        if name not in self.cutscenes:
+            self.cutscenes[name] = CameraCutscene(
+                self._cutscene_files[name], self.cutscene_cache_path
+            )
+        return self.cutscenes[name]
+
+    def get_cutscene_names(self) -> list[str]:
+        return list(self._cutscene_files)
 
     def add_update_rects(self, rects: list[pygame.Rect]):
         self._the_dirty_rects.extend(rects)
@@ -117,35 +378,113 @@ class Camera:  # TODO: better camera (GMTK-recommended)
         self,
         surf: pygame.Surface,
         pos: tuple[int, int] | list[int, int] | pygame.Vector2,
+        layer: int = ENTITIES,
+        z: float = 0,
+        special_flags: int = 0,
+        prev_pos: tuple[int, int] | list[int, int] | pygame.Vector2 | None = None,
+    ):
+        """Queues `surf` to be drawn at `pos`, or between `prev_pos` and `pos` when the game interpolates"""
+        if self.muted:
+            return
+        if layer in self._cached_layers:
+            cache = self._layer_cache.get(layer)
+            if cache:
+                return
+            if cache is None:  # the layer is being baked, so nothing is culled
+                self._queue.setdefault(layer, []).append(
+                    (z, special_flags, surf, pos, None)
+                )
+                return
+        if self.culling and not self._viewport.colliderect(
+            (pos[0], pos[1], *surf.get_size())
+        ):
+            self._culled += 1
+            return
+        self._drawn += 1
+        self._queue.setdefault(layer, []).append(
+            (z, special_flags, surf, pos, prev_pos)
+        )
+
+    def render_batch(
+        self,
+        blits: list[tuple[pygame.Surface, tuple[int, int] | pygame.Vector2]],
+        layer: int = PARTICLES,
+        z: float = 0,
+        special_flags: int = 0,
     ):
-        self._to_blit.append((surf, pos))
+        """Queues many surfaces at once without culling them individually, see is_visible()"""
+        if self.muted:
+            return
+        self._drawn += len(blits)
+        self._queue.setdefault(layer, []).extend(
+            [(z, special_flags, surf, pos, None) for surf, pos in blits]
+        )
+
+    def repeat_frame(self):
+        """Queues everything that was drawn last frame again, for frames in which nothing was simulated"""
+        for layer, items in self._last_queue.items():
+            self._queue.setdefault(layer, []).extend(items)
+
+    def set_layer_cached(self, layer: int, cached: bool = True):
+        """Cached layers are composited once from the next frame's submissions and reused until invalidated"""
+        if cached:
+            self._cached_layers.add(layer)
+        else:
+            self._cached_layers.discard(layer)
+        self._layer_cache.pop(layer, None)
+        self._full_redraw = True
+
+    def invalidate_layer(self, layer: int):
+        self._layer_cache.pop(layer, None)
+        self._full_redraw = True
+
+    def is_visible(self, rect: pygame.Rect) -> bool:
+        """Checks if a world-space rect is inside the viewport (plus the cull margin)"""
+        return not self.culling or self._viewport.colliderect(rect)
+
+    def add_culled(self, amount: int):
+        """Counts surfaces that were culled before being submitted, e.g. by is_visible()"""
+        self._culled += amount
+
+    def get_viewport(self) -> pygame.Rect:
+        """:returns: the visible area in world coordinates, without the cull margin"""
+        return self._viewport.inflate(-2 * self.cull_margin, -2 * self.cull_margin)
+
+    def get_render_stats(self) -> tuple[int, int]:
+        """:returns: the number of surfaces drawn and culled in the last frame"""
+        return self._render_stats
 
     def zoom_to(self, flt: float):
         if not self._locked:
             if flt >= MIN_ZOOM:
                 self._zoom_inv = 1 / flt
+                self._full_redraw = True
+                self._update_viewport()
 
     def get_zoom(self) -> float:
         return self._zoom_inv
 
     def move_by(self, pos: tuple[int, int] | list[int, int] | pygame.Vector2):
         if not self._locked:
-            self._the_dirty_rects.append(pygame.Rect(0, 0, *self.display.get_size()))
+            self._full_redraw = True
             self.scroll[0] += pos[0]
             self.scroll[1] += pos[1]
+            self._update_viewport()
 
     def move_to(self, pos: tuple[int, int] | list[int, int] | pygame.Vector2):
         if not self._locked:
-            self._the_dirty_rects.append(pygame.Rect(0, 0, *self.display.get_size()))
+            self._full_redraw = True
             self.scroll = pygame.Vector2(pos[:2])
+            self._update_viewport()
 
     def center(self, pos: tuple[int, int] | list[int, int] | pygame.Vector2):
         if not self._locked:
-            self._the_dirty_rects.append(pygame.Rect(0, 0, *self.display.get_size()))
+            self._full_redraw = True
             self.scroll = pygame.Vector2(
                 self.screen.get_width() // 2 - pos[0],
                 self.screen.get_height() // 2 - pos[1],
             )
+            self._update_viewport()
 
     def get_centre(self) -> tuple[int, int]:
         return (
@@ -158,7 +497,7 @@ class Camera:  # TODO: better camera (GMTK-recommended)
 
     def set_background(self, colour):
         self._bgc = colour
-        self._the_dirty_rects.append(pygame.Rect(0, 0, *self.display.get_size()))
+        self._full_redraw = True
 
     def lock(self):
         self._locked = True
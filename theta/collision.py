@@ -0,0 +1,226 @@
+import math
+
+import numpy as np
+import pygame
+
+EPSILON = 1e-6
+
+
+class SolidTiles:
+    """The solid cells of a tile grid, any object with `tile_w`, `tile_h` and `is_solid(col, row)` can be used instead"""
+
+    def __init__(self, tile_w: int, tile_h: int, cells=()):
+        self.tile_w = tile_w
+        self.tile_h = tile_h
+        self.cells = set(cells)
+
+    @classmethod
+    def from_tiles(cls, tiles: list):
+        """:returns: the solid cells of `tiles`, or None if none of them is solid, so nothing has to be collided"""
+        solid = [tile for tile in tiles if tile.solid]
+        if not solid:
+            return None
+        tile_w, tile_h = solid[0].rect.size
+        return cls(
+            tile_w,
+            tile_h,
+            ((tile.rect.x // tile_w, tile.rect.y // tile_h) for tile in solid),
+        )
+
+    def is_solid(self, col: int, row: int) -> bool:
+        return (col, row) in self.cells
+
+    def add(self, col: int, row: int):
+        self.cells.add((col, row))
+
+    def discard(self, col: int, row: int):
+        self.cells.discard((col, row))
+
+
+def _span(start: float, length: float, cell: int) -> range:
+    """:returns: the cells a segment overlaps, touching edges excluded"""
+    return range(
+        math.floor(start / cell + EPSILON), math.ceil((start + length) / cell - EPSILON)
+    )
+
+
+def sweep(
+    tiles, start: float, end: float, length: float, side: range, axis: int
+) -> float | None:
+    """Moves a box of `length` along `axis` from `start` to `end` through the cells `side` covers on the other axis,
+    :returns: the position it stops at against the first solid cell, or None if the path is clear
+    """
+    cell = tiles.tile_w if axis == 0 else tiles.tile_h
+
+    def blocked(i: int) -> bool:
+        if axis == 0:
+            return any(tiles.is_solid(i, j) for j in side)
+        return any(tiles.is_solid(j, i) for j in side)
+
+    if end > start:
+        first = math.ceil((start + length) / cell - EPSILON)
+        last = math.ceil((end + length) / cell - EPSILON)
+        for i in range(first, last):
+            if blocked(i):
+                return i * cell - length
+    elif end < start:
+        first = math.floor(start / cell + EPSILON) - 1
+        last = math.floor(end / cell + EPSILON) - 1
+        for i in range(first, last, -1):
+            if blocked(i):
+                return (i + 1) * cell
+    return None
+
+
+def resolve_tiles(obj, tiles) -> tuple[bool, bool]:
+    """Sweeps a verlet object from `prev_pos` to `pos` one axis at a time, stopping it at solid tiles;
+    the velocity on a blocked axis is zeroed by moving `prev_pos` onto `pos`
+    :returns: whether it was blocked along x and along y"""
+    pos, prev = obj.pos, obj.prev_pos
+    w, h = obj.w, obj.h
+
+    x = sweep(tiles, prev.x, pos.x, w, _span(prev.y, h, tiles.tile_h), 0)
+    if x is not None:
+        pos.x = prev.x = x
+    y = sweep(tiles, prev.y, pos.y, h, _span(pos.x, w, tiles.tile_w), 1)
+    if y is not None:
+        pos.y = prev.y = y
+    if x is not None or y is not None:
+        # entity positions are copies of their store rows
+        obj.pos, obj.prev_pos = pos, prev
+    return x is not None, y is not None
+
+
+def are_solid(tiles, cols: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """is_solid() over arrays of cells, through the tiles' own are_solid() if they have one, :returns: a bool array"""
+    if hasattr(tiles, "are_solid"):
+        return tiles.are_solid(cols, rows)
+    return np.fromiter(
+        (tiles.is_solid(col, row) for col, row in zip(cols.tolist(), rows.tolist())),
+        bool,
+        len(cols),
+    )
+
+
+def sweep_many(
+    tiles,
+    start: np.ndarray,
+    end: np.ndarray,
+    length: np.ndarray,
+    side: tuple[np.ndarray, np.ndarray],
+    axis: int,
+) -> np.ndarray:
+    """sweep() over arrays of boxes, `side` is the first and end cell each covers on the other axis,
+    every pass checks the next cell along for all the boxes still moving,
+    :returns: the positions they stop at, NaN where the path is clear"""
+    cell = tiles.tile_w if axis == 0 else tiles.tile_h
+    forward = end > start
+    first = np.where(
+        forward,
+        np.ceil((start + length) / cell - EPSILON),
+        np.floor(start / cell + EPSILON) - 1,
+    ).astype(np.intp)
+    last = np.where(
+        forward,
+        np.ceil((end + length) / cell - EPSILON),
+        np.floor(end / cell + EPSILON) - 1,
+    ).astype(np.intp)
+    step = np.where(forward, 1, -1)
+    count = (last - first) * step
+    low, high = side
+
+    stop = np.full(len(start), np.nan)
+    moving = np.flatnonzero(count > 0)
+    k = 0
+    while len(moving):
+        i = first[moving] + step[moving] * k
+        j, end_j = low[moving], high[moving]
+        hit = np.zeros(len(moving), bool)
+        for offset in range(int((end_j - j).max(initial=0))):
+            inside = np.flatnonzero(j + offset < end_j)
+            cells = (i[inside], j[inside] + offset)
+            hit[inside] |= are_solid(tiles, *(cells if axis == 0 else cells[::-1]))
+        stopped = moving[hit]
+        stop[stopped] = np.where(
+            forward[stopped], i[hit] * cell - length[stopped], (i[hit] + 1) * cell
+        )
+        k += 1
+        moving = moving[~hit & (count[moving] > k)]
+    return stop
+
+
+def _spans(start: np.ndarray, length: np.ndarray, cell: int) -> tuple:
+    """_span() over arrays, :returns: the first and end cells"""
+    return (
+        np.floor(start / cell + EPSILON).astype(np.intp),
+        np.ceil((start + length) / cell - EPSILON).astype(np.intp),
+    )
+
+
+def resolve_tiles_many(
+    pos: np.ndarray, prev: np.ndarray, size: np.ndarray, tiles
+) -> np.ndarray:
+    """resolve_tiles() over (n, 2) arrays of positions, previous positions and sizes, which are changed in place,
+    :returns: an (n, 2) mask of the axes each was blocked along"""
+    blocked = np.zeros(pos.shape, bool)
+    x = sweep_many(
+        tiles,
+        prev[:, 0],
+        pos[:, 0],
+        size[:, 0],
+        _spans(prev[:, 1], size[:, 1], tiles.tile_h),
+        0,
+    )
+    blocked[:, 0] = hit = ~np.isnan(x)
+    pos[hit, 0] = prev[hit, 0] = x[hit]
+    y = sweep_many(
+        tiles,
+        prev[:, 1],
+        pos[:, 1],
+        size[:, 1],
+        _spans(pos[:, 0], size[:, 0], tiles.tile_w),
+        1,
+    )
+    blocked[:, 1] = hit = ~np.isnan(y)
+    pos[hit, 1] = prev[hit, 1] = y[hit]
+    return blocked
+
+
+def find_pairs(rects: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Sweep and prune over an (n, 4) array of x, y, w, h rects,
+    :returns: two index arrays, the overlapping pairs (i[k], j[k])"""
+    if len(rects) < 2:
+        return np.empty(0, np.intp), np.empty(0, np.intp)
+    order = np.argsort(rects[:, 0], kind="stable")
+    left = rects[order, 0]
+    right = left + rects[order, 2]
+    top = rects[order, 1]
+    bottom = top + rects[order, 3]
+
+    # every box after i in x order that starts before i ends overlaps it on x
+    ends = np.searchsorted(left, right, side="left")
+    counts = np.maximum(ends - np.arange(len(left)) - 1, 0)
+    total = int(counts.sum())
+    if not total:
+        return np.empty(0, np.intp), np.empty(0, np.intp)
+    a = np.repeat(np.arange(len(left)), counts)
+    b = a + 1 + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    overlap = (top[a] < bottom[b]) & (top[b] < bottom[a])
+    return order[a[overlap]], order[b[overlap]]
+
+
+def separate(a, b) -> bool:
+    """Pushes two overlapping verlet objects apart along the axis they overlap least on,
+    :returns: whether they were overlapping"""
+    dx = min(a.pos.x + a.w, b.pos.x + b.w) - max(a.pos.x, b.pos.x)
+    dy = min(a.pos.y + a.h, b.pos.y + b.h) - max(a.pos.y, b.pos.y)
+    if dx <= 0 or dy <= 0:
+        return False
+    if dx < dy:
+        push = pygame.Vector2(dx / 2 if a.pos.x < b.pos.x else -dx / 2, 0)
+    else:
+        push = pygame.Vector2(0, dy / 2 if a.pos.y < b.pos.y else -dy / 2)
+    a.pos -= push
+    b.pos += push
+    return True
@@ -0,0 +1,393 @@
+import math
+
+import numpy as np
+import pygame
+
+from .collision import are_solid
+from .entity import EntityStore
+
+EPSILON = 1e-9
+ITERATIONS = 8  # relaxation passes over every constraint per substep
+# pushed off a tile edge by this much, so a point is never left exactly on a solid cell
+SKIN = 1e-3
+
+
+def _colour(*ends: np.ndarray) -> np.ndarray:
+    """Greedy colouring of constraints so no point appears twice in a colour,
+    which lets each colour be solved as one vectorised pass, :returns: the colour of every constraint
+    """
+    used = {}  # point: bitmask of the colours it is already in
+    colours = np.empty(len(ends[0]), np.intp)
+    for k, points in enumerate(zip(*(end.tolist() for end in ends))):
+        mask = 0
+        for point in points:
+            mask |= used.get(point, 0)
+        colour = (~mask & (mask + 1)).bit_length() - 1  # the lowest free colour
+        colours[k] = colour
+        for point in points:
+            used[point] = used.get(point, 0) | 1 << colour
+    return colours
+
+
+def _batches(colours: np.ndarray) -> list[np.ndarray]:
+    return [np.flatnonzero(colours == colour) for colour in np.unique(colours)]
+
+
+def _angles(
+    ax: np.ndarray, ay: np.ndarray, cx: np.ndarray, cy: np.ndarray
+) -> np.ndarray:
+    """:returns: the signed angles from the vectors a to the vectors c"""
+    return np.arctan2(ax * cy - ay * cx, ax * cx + ay * cy)
+
+
+def _shares(
+    stiffness: np.ndarray, wa: np.ndarray, wb: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """:returns: how much of a correction each end of a constraint takes, by inverse mass"""
+    total = wa + wb
+    scale = np.divide(stiffness, total, out=np.zeros_like(total), where=total > 0)
+    return scale * wa, scale * wb
+
+
+def _solve_distances(x: np.ndarray, y: np.ndarray, batches: list[tuple]):
+    for a, b, length, share_a, share_b in batches:
+        ax, ay, bx, by = x.take(a), y.take(a), x.take(b), y.take(b)
+        dx, dy = bx - ax, by - ay
+        dist = np.hypot(dx, dy)
+        error = (dist - length) / np.maximum(dist, EPSILON)
+        dx *= error
+        dy *= error
+        x[a] = ax + dx * share_a
+        y[a] = ay + dy * share_a
+        x[b] = bx - dx * share_b
+        y[b] = by - dy * share_b
+
+
+def _solve_angles(x: np.ndarray, y: np.ndarray, batches: list[tuple]):
+    for a, b, c, angle, share_a, share_c in batches:
+        bx, by = x.take(b), y.take(b)
+        ax, ay = x.take(a) - bx, y.take(a) - by
+        cx, cy = x.take(c) - bx, y.take(c) - by
+        error = (_angles(ax, ay, cx, cy) - angle + math.pi) % math.tau - math.pi
+        # turning a towards c and c towards a both close the angle
+        turn = error * share_a
+        cos, sin = np.cos(turn), np.sin(turn)
+        x[a] = bx + ax * cos - ay * sin
+        y[a] = by + ax * sin + ay * cos
+        turn = -error * share_c
+        cos, sin = np.cos(turn), np.sin(turn)
+        x[c] = bx + cx * cos - cy * sin
+        y[c] = by + cx * sin + cy * cos
+
+
+class ConstraintSolver:
+    """Verlet points held together by distance, pin and angle constraints, relaxed over a few vectorised passes;
+    the points are rows of an EntityStore, and are kept out of solid tiles if `tiles` is given, e.g. Level.solid
+    """
+
+    def __init__(
+        self,
+        gravity: pygame.Vector2 | tuple[float, float] = (0, 0),
+        iterations: int = ITERATIONS,
+        substeps: int = 1,
+        tiles=None,
+        decel: float = 0.0,
+        store: EntityStore | None = None,
+    ):
+        self.gravity = pygame.Vector2(gravity)
+        self.iterations = iterations
+        self.substeps = substeps
+        self.tiles = tiles
+        self.decel = decel
+        self.store = store if store is not None else EntityStore()
+        self.rows = np.empty(0, np.intp)  # the store row of every point
+        self.clear()
+
+    def clear(self):
+        """Removes every point and constraint"""
+        for row in self.rows.tolist():
+            self.store.release(row)
+        self.rows = np.empty(0, np.intp)
+        self._index = self.rows
+        self.inv_mass = np.empty(0)
+        # point: position it is held at
+        self.pins = {}
+        # distance constraints: point a, point b, rest length, stiffness
+        self._dist = (
+            np.empty(0, np.intp),
+            np.empty(0, np.intp),
+            np.empty(0),
+            np.empty(0),
+        )
+        # angle constraints: point a, the point b the angle is at, point c, rest angle, stiffness
+        self._angle = (
+            np.empty(0, np.intp),
+            np.empty(0, np.intp),
+            np.empty(0, np.intp),
+            np.empty(0),
+            np.empty(0),
+        )
+        self._dist_batches = None
+        self._angle_batches = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __del__(self):
+        for row in self.rows.tolist():
+            self.store.release(row)
+
+    @property
+    def pos(self) -> np.ndarray:
+        """:returns: an (n, 2) array of the position of every point"""
+        return self.store.pos[self.rows]
+
+    def get_pos(self, point: int) -> pygame.Vector2:
+        return pygame.Vector2(self.store.pos[self.rows[point]].tolist())
+
+    def add_points(
+        self, positions: np.ndarray | list, mass: float | np.ndarray = 1.0
+    ) -> np.ndarray:
+        """Adds points at rest, a mass of 0 or less makes them immovable by constraints,
+        :returns: their indices"""
+        positions = np.asarray(positions, float).reshape(-1, 2)
+        rows = np.array([self.store.allocate() for _ in range(len(positions))], np.intp)
+        self.store.pos[rows] = self.store.prev_pos[rows] = positions
+        self.store.accel[rows] = 0.0
+        self.store.size[rows] = 1.0
+        self.store.decel[rows] = self.decel
+        mass = np.broadcast_to(np.asarray(mass, float), len(positions))
+        first = len(self.rows)
+        self.rows = np.concatenate((self.rows, rows))
+        self._index = self.store.select(self.rows)
+        self.inv_mass = np.concatenate(
+            (self.inv_mass, np.where(mass > 0, 1 / np.maximum(mass, EPSILON), 0.0))
+        )
+        return np.arange(first, len(self.rows))
+
+    def add_point(
+        self, pos: pygame.Vector2 | tuple[float, float], mass: float = 1.0
+    ) -> int:
+        return int(self.add_points([pos], mass)[0])
+
+    def add_distances(
+        self,
+        a: np.ndarray | list,
+        b: np.ndarray | list,
+        length: float | np.ndarray | None = None,
+        stiffness: float | np.ndarray = 1.0,
+    ):
+        """Keeps the points a[k] and b[k] `length` apart, their current distance by default;
+        a stiffness below 1 lets them stretch"""
+        a = np.asarray(a, np.intp).ravel()
+        b = np.asarray(b, np.intp).ravel()
+        if length is None:
+            pos = self.pos
+            length = np.hypot(*(pos[b] - pos[a]).T)
+        length = np.broadcast_to(np.asarray(length, float), len(a))
+        stiffness = np.broadcast_to(np.asarray(stiffness, float), len(a))
+        self._dist = tuple(
+            np.concatenate(pair) for pair in zip(self._dist, (a, b, length, stiffness))
+        )
+        self._dist_batches = None
+
+    def add_distance(
+        self,
+        a: int,
+        b: int,
+        length: float | None = None,
+        stiffness: float = 1.0,
+    ):
+        self.add_distances([a], [b], length, stiffness)
+
+    def add_angles(
+        self,
+        a: np.ndarray | list,
+        b: np.ndarray | list,
+        c: np.ndarray | list,
+        angle: float | np.ndarray | None = None,
+        stiffness: float | np.ndarray = 1.0,
+    ):
+        """Keeps the angle at b[k] from a[k] to c[k] at `angle` radians, their current angle by default"""
+        a, b, c = (np.asarray(points, np.intp).ravel() for points in (a, b, c))
+        if angle is None:
+            pos = self.pos
+            ba, bc = pos[a] - pos[b], pos[c] - pos[b]
+            angle = _angles(ba[:, 0], ba[:, 1], bc[:, 0], bc[:, 1])
+        angle = np.broadcast_to(np.asarray(angle, float), len(a))
+        stiffness = np.broadcast_to(np.asarray(stiffness, float), len(a))
+        self._angle = tuple(
+            np.concatenate(pair)
+            for pair in zip(self._angle, (a, b, c, angle, stiffness))
+        )
+        self._angle_batches = None
+
+    def add_angle(
+        self,
+        a: int,
+        b: int,
+        c: int,
+        angle: float | None = None,
+        stiffness: float = 1.0,
+    ):
+        self.add_angles([a], [b], [c], angle, stiffness)
+
+    def pin(self, point: int, pos: pygame.Vector2 | tuple[float, float] | None = None):
+        """Holds a point at `pos`, where it is now by default; pin it again every frame to drag it around"""
+        self.pins[int(point)] = (
+            self.get_pos(point) if pos is None else pygame.Vector2(pos)
+        )
+
+    def unpin(self, point: int):
+        self.pins.pop(int(point), None)
+
+    def add_rope(
+        self,
+        start: pygame.Vector2 | tuple[float, float],
+        end: pygame.Vector2 | tuple[float, float],
+        segments: int,
+        mass: float = 1.0,
+        stiffness: float = 1.0,
+        bend: float = 0.0,
+        pin_start: bool = True,
+    ) -> np.ndarray:
+        """A straight rope of `segments` links, stiffened against bending by `bend`,
+        :returns: the indices of its points from start to end"""
+        t = np.linspace(0, 1, segments + 1)[:, None]
+        start, end = np.asarray(start, float), np.asarray(end, float)
+        points = self.add_points(start + (end - start) * t, mass)
+        self.add_distances(points[:-1], points[1:], stiffness=stiffness)
+        if bend > 0 and segments > 1:
+            self.add_angles(points[:-2], points[1:-1], points[2:], stiffness=bend)
+        if pin_start:
+            self.pin(points[0])
+        return points
+
+    def add_cloth(
+        self,
+        topleft: pygame.Vector2 | tuple[float, float],
+        cols: int,
+        rows: int,
+        spacing: float,
+        mass: float = 1.0,
+        stiffness: float = 1.0,
+        shear: float = 0.0,
+        pin_top: bool = True,
+    ) -> np.ndarray:
+        """A grid of points linked to their neighbours, and diagonally if `shear` is above 0,
+        :returns: the indices of its points as a (rows, cols) array"""
+        y, x = np.mgrid[0:rows, 0:cols]
+        positions = np.stack((x.ravel(), y.ravel()), 1) * spacing + np.asarray(
+            topleft, float
+        )
+        points = self.add_points(positions, mass).reshape(rows, cols)
+        self.add_distances(points[:, :-1], points[:, 1:], stiffness=stiffness)
+        self.add_distances(points[:-1], points[1:], stiffness=stiffness)
+        if shear > 0:
+            self.add_distances(points[:-1, :-1], points[1:, 1:], stiffness=shear)
+            self.add_distances(points[:-1, 1:], points[1:, :-1], stiffness=shear)
+        if pin_top:
+            for point in points[0].tolist():
+                self.pin(point)
+        return points
+
+    def _prepare(self):
+        if self._dist_batches is None:
+            a, b, length, stiffness = self._dist
+            self._dist_batches = [
+                (a[k], b[k], length[k], stiffness[k]) for k in _batches(_colour(a, b))
+            ]
+        if self._angle_batches is None:
+            a, b, c, angle, stiffness = self._angle
+            self._angle_batches = [
+                (a[k], b[k], c[k], angle[k], stiffness[k])
+                for k in _batches(_colour(a, b, c))
+            ]
+
+    def step(self, dt: float):
+        """Integrates every point and relaxes the constraints, `substeps` times over `dt`"""
+        if not len(self.rows):
+            return
+        self._prepare()
+        weights = self.inv_mass.copy()
+        pinned = np.fromiter(self.pins, np.intp, len(self.pins))
+        targets = np.array([tuple(pos) for pos in self.pins.values()]).reshape(-1, 2)
+        weights[pinned] = 0.0
+        # the shares only change with the pins, so they are worked out once per step
+        distances = [
+            (a, b, length, *_shares(stiffness, weights[a], weights[b]))
+            for a, b, length, stiffness in self._dist_batches
+        ]
+        angles = [
+            (a, b, c, angle, *_shares(stiffness, weights[a], weights[c]))
+            for a, b, c, angle, stiffness in self._angle_batches
+        ]
+        free = weights > 0
+
+        store, index = self.store, self._index
+        h = dt / self.substeps
+        for _ in range(self.substeps):
+            store.accel[index] += tuple(self.gravity)
+            store.integrate(h, self.rows)
+            # solved one axis per array, as gathers and scatters of 1D arrays are far cheaper
+            x, y = store.pos[index, 0], store.pos[index, 1]
+            prev_x, prev_y = store.prev_pos[index, 0], store.prev_pos[index, 1]
+            if len(pinned):
+                x[pinned] = prev_x[pinned] = targets[:, 0]
+                y[pinned] = prev_y[pinned] = targets[:, 1]
+            for _ in range(self.iterations):
+                _solve_distances(x, y, distances)
+                _solve_angles(x, y, angles)
+            if self.tiles is not None:
+                self._collide(x, y, prev_x, prev_y, free)
+            store.pos[index, 0], store.pos[index, 1] = x, y
+            store.prev_pos[index, 0], store.prev_pos[index, 1] = prev_x, prev_y
+
+    def _collide(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        prev_x: np.ndarray,
+        prev_y: np.ndarray,
+        free: np.ndarray,
+    ):
+        """Stops points at the edge of a solid tile they moved into, one axis at a time like collision.resolve_tiles();
+        a point crossing more than a tile per substep can tunnel, which more substeps prevent
+        """
+        tile_w, tile_h = self.tiles.tile_w, self.tiles.tile_h
+        prev_col = np.floor(prev_x / tile_w).astype(np.intp)
+        prev_row = np.floor(prev_y / tile_h).astype(np.intp)
+
+        col = np.floor(x / tile_w).astype(np.intp)
+        moved = np.flatnonzero(free & (col != prev_col))
+        hit = moved[are_solid(self.tiles, col[moved], prev_row[moved])]
+        if len(hit):
+            x[hit] = prev_x[hit] = np.where(
+                x[hit] > prev_x[hit],
+                col[hit] * tile_w - SKIN,
+                (col[hit] + 1) * tile_w + SKIN,
+            )
+            col[hit] = prev_col[hit]
+
+        row = np.floor(y / tile_h).astype(np.intp)
+        moved = np.flatnonzero(free & (row != prev_row))
+        hit = moved[are_solid(self.tiles, col[moved], row[moved])]
+        if len(hit):
+            y[hit] = prev_y[hit] = np.where(
+                y[hit] > prev_y[hit],
+                row[hit] * tile_h - SKIN,
+                (row[hit] + 1) * tile_h + SKIN,
+            )
+
+    def render(
+        self,
+        surf: pygame.Surface,
+        colour=(255, 255, 255),
+        offset=(0, 0),
+        width: int = 1,
+    ):
+        """Draws every distance constraint as a line"""
+        a, b = self._dist[0], self._dist[1]
+        pos = self.pos + offset
+        for start, end in zip(pos[a].tolist(), pos[b].tolist()):
+            pygame.draw.line(surf, colour, start, end, width)
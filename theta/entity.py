@@ -1,7 +1,156 @@
+import threading
+from collections import deque
+
+import numpy as np
 import pygame
 
+STORE_CAPACITY = (
+    256  # rows an entity store starts with, it doubles whenever it runs out
+)
+
+
+class EntityStore:
+    """Verlet state of many objects kept in contiguous arrays, one row per object,
+    so every live row can be integrated with a few vectorised operations"""
+
+    def __init__(self, capacity: int = STORE_CAPACITY):
+        capacity = max(1, capacity)
+        self.pos = np.zeros((capacity, 2))
+        self.prev_pos = np.zeros((capacity, 2))
+        self.accel = np.zeros((capacity, 2))
+        self.size = np.ones((capacity, 2))
+        self.decel = np.zeros(capacity)
+        self.alive = np.zeros(capacity, bool)
+        self._free = list(range(capacity - 1, -1, -1))
+        self._lock = threading.Lock()
+        # rows are released from __del__, which can run on any thread or in the middle of allocate(),
+        # so a release that can't take the lock straight away is queued here instead of waiting for it
+        self._released = deque()
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive))
+
+    @property
+    def capacity(self) -> int:
+        return len(self.alive)
+
+    def allocate(self) -> int:
+        """:returns: a free row, whose values are left over from its last owner"""
+        with self._lock:
+            if self._released:
+                self._drain()
+            if not self._free:
+                self._grow()
+            row = self._free.pop()
+            self.alive[row] = True
+            return row
+
+    def release(self, row: int):
+        """Never blocks, so it is safe to call from a finalizer"""
+        if not self._lock.acquire(blocking=False):
+            self._released.append(row)
+            return
+        try:
+            if self.alive[row]:
+                self.alive[row] = False
+                self._free.append(row)
+            if self._released:
+                self._drain()
+        finally:
+            self._lock.release()
+
+    def _drain(self):
+        """Frees the queued rows, the lock must be held"""
+        while self._released:
+            row = self._released.popleft()
+            if self.alive[row]:
+                self.alive[row] = False
+                self._free.append(row)
+
+    def _grow(self):
+        old = self.capacity
+        for name in ("pos", "prev_pos", "accel", "size", "decel", "alive"):
+            array = getattr(self, name)
+            grown = np.zeros((old * 2,) + array.shape[1:], array.dtype)
+            grown[:old] = array
+            setattr(self, name, grown)
+        self._free.extend(range(old * 2 - 1, old - 1, -1))
+
+    @staticmethod
+    def select(rows: np.ndarray) -> np.ndarray | slice:
+        """:returns: an index for the rows, a slice if they are consecutive, which is how rows are usually allocated"""
+        if not len(rows):
+            return rows
+        first, last = int(rows[0]), int(rows[-1])
+        if last - first == len(rows) - 1 and (
+            len(rows) < 2 or np.all(np.diff(rows) == 1)
+        ):
+            return slice(first, last + 1)
+        return rows
+
+    def integrate(
+        self, dt: float, rows: np.ndarray | None = None, steps: int = 1
+    ) -> np.ndarray:
+        """Steps `rows` (every live row by default) and clears their acceleration,
+        `steps` steps of `dt` are taken at once, with the acceleration only applied to the first
+        :returns: a mask over `rows` of the ones that moved"""
+        if rows is None:
+            rows = np.flatnonzero(self.alive)
+        if not len(rows):
+            return np.zeros(0, bool)
+        rows = self.select(rows)
+        if isinstance(rows, slice):
+            pos, prev, accel = self.pos[rows], self.prev_pos[rows], self.accel[rows]
+            decel = self.decel[rows]
+        else:  # take() gathers far faster than fancy indexing
+            pos, prev, accel = (
+                np.take(array, rows, 0)
+                for array in (self.pos, self.prev_pos, self.accel)
+            )
+            decel = np.take(self.decel, rows)
+        vel = pos - prev
+        vel = vel + (accel - vel * decel[:, None]) * (dt * dt)
+        if steps > 1:
+            # every later step scales the velocity by the same ratio, so the path is a geometric series
+            ratio = 1.0 - decel * (dt * dt)
+            last = ratio ** (steps - 1)
+            flat = ratio == 1.0
+            series = np.where(
+                flat, steps, (1.0 - last * ratio) / np.where(flat, 0.5, 1.0 - ratio)
+            )
+            new = pos + vel * series[:, None]
+            vel = vel * last[:, None]
+        else:
+            new = pos + vel
+        # compares both axes at once, as one complex number per row
+        moved = (new.view(complex) != pos.view(complex))[:, 0]
+        self.prev_pos[rows] = new - vel
+        self.pos[rows] = new
+        self.accel[rows] = 0.0
+        return moved
+
+    def integrate_row(self, row: int, dt: float, decel: float):
+        """The same step as integrate() for a single row, without the overhead of fancy indexing"""
+        pos, prev, accel = self.pos[row], self.prev_pos[row], self.accel[row]
+        x, y = float(pos[0]), float(pos[1])
+        vx, vy = x - float(prev[0]), y - float(prev[1])
+        dt2 = dt * dt
+        prev[0], prev[1] = x, y
+        pos[0] = x + vx + (float(accel[0]) - vx * decel) * dt2
+        pos[1] = y + vy + (float(accel[1]) - vy * decel) * dt2
+        accel[0] = accel[1] = 0.0
+
+
+# objects that aren't given a store share this one
+default_store = EntityStore()
+
 
 class VerletObject:
+    """A view onto one row of an EntityStore; `pos`, `prev_pos` and `accel` are copies,
+    so they have to be assigned to, not changed in place, to take effect"""
+
+    __slots__ = ("store", "row")
+
     def __init__(
         self,
         curr_pos: pygame.Vector2,
@@ -9,12 +158,19 @@ class VerletObject:
         accel: pygame.Vector2,
         w=1,
         h=1,
+        decel: float = 0.0,
+        store: EntityStore | None = None,
     ):
+        self.store = store if store is not None else default_store
+        self.row = self.store.allocate()
         self.pos = curr_pos
         self.prev_pos = prev_pos
         self.accel = accel
-        self.w = w
-        self.h = h
+        self.store.size[self.row] = w, h
+        self.store.decel[self.row] = decel
+
+    def __del__(self):
+        self.store.release(self.row)
 
     def __eq__(self, other):
         return (self.pos, self.prev_pos, self.accel) == (
@@ -23,28 +179,87 @@ class VerletObject:
             other.accel,
         )
 
+    @property
+    def pos(self) -> pygame.Vector2:
+        return pygame.Vector2(self.store.pos[self.row].tolist())
+
+    @pos.setter
+    def pos(self, pos: pygame.Vector2 | tuple[float, float]):
+        self.store.pos[self.row] = pos[0], pos[1]
+
+    @property
+    def prev_pos(self) -> pygame.Vector2:
+        return pygame.Vector2(self.store.prev_pos[self.row].tolist())
+
+    @prev_pos.setter
+    def prev_pos(self, pos: pygame.Vector2 | tuple[float, float]):
+        self.store.prev_pos[self.row] = pos[0], pos[1]
+
+    @property
+    def accel(self) -> pygame.Vector2:
+        return pygame.Vector2(self.store.accel[self.row].tolist())
+
+    @accel.setter
+    def accel(self, accel: pygame.Vector2 | tuple[float, float]):
+        self.store.accel[self.row] = accel[0], accel[1]
+
+    @property
+    def w(self) -> float:
+        return float(self.store.size[self.row, 0])
+
+    @w.setter
+    def w(self, w: float):
+        self.store.size[self.row, 0] = w
+
+    @property
+    def h(self) -> float:
+        return float(self.store.size[self.row, 1])
+
+    @h.setter
+    def h(self, h: float):
+        self.store.size[self.row, 1] = h
+
+    @property
+    def decel(self) -> float:
+        return float(self.store.decel[self.row])
+
+    @decel.setter
+    def decel(self, decel: float):
+        self.store.decel[self.row] = decel
+
     def update(self, dt: float):
-        vel = self.pos - self.prev_pos
-        self.prev_pos = self.pos.copy()
-        self.pos += vel + self.accel * dt * dt
-        self.accel = pygame.Vector2(0, 0)
+        self.store.integrate_row(self.row, dt, 0.0)
 
     def accelerate(self, acc: pygame.Vector2, max_vel: float = float("inf")):
         if (
             self.get_vel().magnitude_squared() <= max_vel**2
             or self.get_vel().normalize().dot(acc.normalize()) <= 0.0
         ):
-            self.accel += acc
+            self.store.accel[self.row] += acc[0], acc[1]
 
     def teleport(self, pos: pygame.Vector2, keep_vel: bool = False):
         self.prev_pos = self.prev_pos + (pos - self.pos) if keep_vel else pos
         self.pos = pos
 
     def get_vel(self) -> pygame.Vector2:
-        return self.pos - self.prev_pos
+        return pygame.Vector2(
+            (self.store.pos[self.row] - self.store.prev_pos[self.row]).tolist()
+        )
 
 
 class Entity(VerletObject):
+    __slots__ = (
+        "game",
+        "anims",
+        "rect",
+        "name",
+        "action",
+        "img",
+        "is_real",
+        "uid",
+        "collider",
+    )
+
     def __init__(
         self,
         x: int,
@@ -55,9 +270,17 @@ class Entity(VerletObject):
         game,
         unattached=False,
         real=True,
+        decel: float = 0.1,
+        store: EntityStore | None = None,
     ):
         super().__init__(
-            pygame.Vector2(x, y), pygame.Vector2(x, y), pygame.Vector2(0, 0), w, h
+            pygame.Vector2(x, y),
+            pygame.Vector2(x, y),
+            pygame.Vector2(0, 0),
+            w,
+            h,
+            decel,
+            store,
         )
         self.game = game
         self.anims = game.anim.get_anims(name)
@@ -66,25 +289,33 @@ class Entity(VerletObject):
         self.action = "idle" if self.anims else None
         self.img = self.anims[self.action].get_img() if self.anims else None
         self.is_real = real
+        self.uid = None  # set by the level the entity belongs to
+        # called with the entity after it moves, before it is drawn
+        self.collider = None
         if unattached:
             self.game.ua_entities.append(self)
 
-    def update(self, dt, decel: float = 0.1):
+    def update(self, dt, decel: float | None = None):
+        """`decel` overrides the entity's own deceleration for this step"""
         old_rect = self.rect.copy()
-        vel = self.pos - self.prev_pos
+        self.store.integrate_row(self.row, dt, self.decel if decel is None else decel)
+        self.settle(old_rect)
+        if self.action is not None and self.img is not None:
+            self.anims[self.action].play(dt)
+            self.draw()
 
-        # if self.accel == pygame.Vector2(0, 0):
-        self.accel += vel * -decel
-        self.prev_pos = self.pos.copy()
-        self.pos += vel + self.accel * dt * dt
+    def settle(self, old_rect: pygame.Rect, collide: bool = True):
+        """Collides the entity after it moved from `old_rect` and moves its rect along,
+        `collide` is False when it was already collided, e.g. with the rest of a batch
+        """
+        if collide and self.collider is not None:
+            self.collider(self)
         self.rect.topleft = self.pos
         self.game.camera.add_update_rect(self.rect.union(old_rect).inflate(1, 1))
 
-        self.accel = pygame.Vector2(0, 0)
-        if self.action is not None and self.img is not None:
-            self.anims[self.action].play(dt)
-            self.img = self.anims[self.action].get_img()
-            self.game.camera.render(self.img, self.pos)
+    def draw(self):
+        self.img = self.anims[self.action].get_img()
+        self.game.camera.render(self.img, self.pos, prev_pos=self.prev_pos)
 
     def to_json_object(self) -> dict:
         return {
@@ -105,9 +336,25 @@ class Entity(VerletObject):
 
 
 class SpriteStackEntity(VerletObject):
-    def __init__(self, x: int, y: int, w: int, h: int, name: str, game):
+    __slots__ = ("rot", "game", "spritestacks", "rect", "name", "action")
+
+    def __init__(
+        self,
+        x: int,
+        y: int,
+        w: int,
+        h: int,
+        name: str,
+        game,
+        store: EntityStore | None = None,
+    ):
         super().__init__(
-            pygame.Vector2(x, y), pygame.Vector2(x, y), pygame.Vector2(0, 0), w, h
+            pygame.Vector2(x, y),
+            pygame.Vector2(x, y),
+            pygame.Vector2(0, 0),
+            w,
+            h,
+            store=store,
         )
         self.rot = 0
         self.game = game
@@ -118,22 +365,19 @@ class SpriteStackEntity(VerletObject):
 
     def update(self, dt, decel: float = 0.1):
         old_rect = self.rect.copy()
-        vel = self.pos - self.prev_pos
-
-        self.accelerate(vel * -decel)
-
-        self.prev_pos = self.pos
-        self.pos += vel + self.accel * dt * dt
-        self.rect.topleft = self.pos
+        self.accelerate(self.get_vel() * -decel)
+        self.store.integrate_row(self.row, dt, 0.0)
+        pos, prev_pos = self.pos, self.prev_pos
+        self.rect.topleft = pos
         self.rot %= 360
         self.game.camera.add_update_rect(self.rect.union(old_rect).inflate(3, 3))
 
-        self.accel = pygame.Vector2(0, 0)
         if self.action is not None:
             self.spritestacks[self.action].render_to_game(
                 self.game,
-                (self.pos.x + self.w // 2, self.pos.y + self.h // 2),
+                (pos.x + self.w // 2, pos.y + self.h // 2),
                 self.rot,
+                prev_pos=(prev_pos.x + self.w // 2, prev_pos.y + self.h // 2),
             )
 
     def rotate(self, angle: float):
@@ -1,9 +1,9 @@
 from os import sep
-from time import time
+from time import perf_counter
 
 import pygame
 
-from . import camera, gfx, input, level, sfx, ui
+from . import camera, gfx, input, level, particle, profiler, sfx, ui
 
 CAMERA_PATH = f".{sep}data{sep}cutscenes{sep}"
 FONT_PATH = f".{sep}data{sep}fonts{sep}"
@@ -15,41 +15,99 @@ SS_PATH = f".{sep}data{sep}gfx{sep}spritestacks{sep}"
 
 
 class Game:
-    def __init__(self, width=512, height=512, fps=60, sfx_channels=63):
+    def __init__(
+        self,
+        width=512,
+        height=512,
+        fps=60,
+        sfx_channels=63,
+        tick_rate: int | None = None,
+        max_ticks: int = 5,
+        profile: bool = False,
+    ):
+        self.profiler = profiler.default_profiler
+        if profile:
+            self.profiler.enable()
         self.ui = ui.UIManager(self)
         self.input = input.Input()
         self.camera = camera.Camera(width, height)
         self.anim = gfx.AnimationManager()
         self.world = level.LevelManager(self)
+        self.particles = particle.ParticleSystem(self)
         self.sfx = sfx.SFXManager(sfx_channels)
 
         self.clock = pygame.time.Clock()
         self.fps = fps
         self.dt = 1.0
-        self._last_time = time()
+        self.tick_rate = (
+            tick_rate  # simulation ticks per second, or None to step once per frame
+        )
+        self.max_ticks = max_ticks  # the most ticks one frame can catch up on
+        self._accumulator = 0.0
+        self._last_time = perf_counter()
         self._t = 0
+        self._ticks = 0
         self.events = []
 
         self.ua_entities = []
 
     def update(self, full_screen=True):
-        self.dt = (time() - self._last_time) * self.fps
-        self._last_time = time()
-
-        m_clicked = False
-        self.events = self.input.get()
-        for event in self.events:
-            if event.type == input.MOUSEDOWN:
-                m_clicked = True
-
-        self.ui.update(self.camera.screen, self.input.m_pos, m_clicked)
-        self.world.update(self.dt)
-        for entity in self.ua_entities:
-            entity.update(self.dt)
-        self.camera.update(full_screen)
-
-        self.clock.tick(self.fps)
+        now = perf_counter()
+        elapsed = now - self._last_time
+        self._last_time = now
+        span = self.profiler.span
+
+        with span("frame"):
+            m_clicked = False
+            with span("input"):
+                self.events = self.input.get()
+            for event in self.events:
+                if event.type == input.MOUSEDOWN:
+                    m_clicked = True
+
+            with span("ui"):
+                self.ui.update(self.camera.screen, self.input.m_pos, m_clicked)
+            self.world.handle_events()
+            if self.tick_rate is None:
+                self.dt = elapsed * self.fps
+                self._step(self.dt)
+            else:
+                tick = 1 / self.tick_rate
+                self._accumulator = min(
+                    self._accumulator + elapsed, self.max_ticks * tick
+                )
+                ticks = int(self._accumulator / tick)
+                self._accumulator -= ticks * tick
+                self.dt = self.fps * tick
+                self.camera.interpolation = self._accumulator / tick
+                for i in range(ticks):
+                    self.camera.muted = i < ticks - 1  # only the last tick is drawn
+                    self._step(self.dt)
+                self.camera.muted = False
+                if not ticks:
+                    self.camera.repeat_frame()
+                self._ticks += ticks
+            with span("camera"):
+                self.camera.update(full_screen)
+
+        with span("clock"):
+            self.clock.tick(self.fps)
         self._t += 1
+        self.profiler.next_frame()
+
+    def _step(self, dt: float):
+        span = self.profiler.span
+        with span("world"):
+            self.world.step(dt)
+        with span("entities"):
+            for entity in self.ua_entities:
+                entity.update(dt)
+        with span("particles"):
+            self.particles.update(dt)
+
+    def get_ticks(self) -> int:
+        """Returns the number of simulation steps taken, which is the number of frames unless tick_rate is set."""
+        return self._ticks if self.tick_rate is not None else self._t
 
     def get_frames(self) -> int:
         """Returns the number of frames that have elapsed since update() has started being called."""
@@ -61,5 +119,4 @@ class Game:
 
     @staticmethod
     def set_icon(path: str):
-        surf = pygame.image.load(path)
-        pygame.display.set_icon(surf)
+        pygame.display.set_icon(gfx.load_image(path, gfx.RAW))
@@ -1,9 +1,99 @@
 import os
+import threading
+from collections import OrderedDict
 
 import pygame
 
 from .utils import FileTypeError, LengthError, read_json, sum_list, write_json
 
+IMAGE_CACHE_SIZE = 1024
+# how a loaded image is converted for the display
+RAW = "raw"
+CONVERT = "convert"
+CONVERT_ALPHA = "convert_alpha"
+
+
+class ImageCache:
+    """LRU cache of decoded images, keyed by normalised path, conversion mode and colourkey;
+    the surfaces are shared, so they shouldn't be drawn on"""
+
+    def __init__(self, max_size: int = IMAGE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    @staticmethod
+    def _key(path: str, mode: str, colorkey) -> tuple:
+        return (
+            os.path.normcase(os.path.abspath(path)),
+            mode,
+            None if colorkey is None else tuple(colorkey),
+        )
+
+    def load(self, path: str, mode: str = CONVERT, colorkey=None) -> pygame.Surface:
+        key = self._key(path, mode, colorkey)
+        with self._lock:
+            surf = self._cache.get(key)
+            if surf is not None:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return surf
+            self.misses += 1
+
+        surf = pygame.image.load(path)
+        match mode:
+            case "convert":
+                surf = surf.convert()
+            case "convert_alpha":
+                surf = surf.convert_alpha()
+        if colorkey is not None:
+            surf.set_colorkey(colorkey)
+
+        with self._lock:
+            # another thread may have loaded it meanwhile, keep the first copy
+            surf = self._cache.setdefault(key, surf)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+        return surf
+
+    def discard(self, path: str):
+        """Forgets every cached version of an image, e.g. after it changed on disk"""
+        path = os.path.normcase(os.path.abspath(path))
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == path]:
+                del self._cache[key]
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+image_cache = ImageCache()
+
+
+def load_image(path: str, mode: str = CONVERT, colorkey=None) -> pygame.Surface:
+    """Loads an image through the shared image cache"""
+    return image_cache.load(path, mode, colorkey)
+
 
 class Animation:
     def __init__(self, path: str):
@@ -26,9 +116,9 @@ class Animation:
         self.frames = []
         for frame in self.frame_paths:
             if frame.split(".")[-1] == "png":
-                frame = pygame.image.load(f"{self.path}{os.sep}{frame}").convert_alpha()
-                frame.set_colorkey((1, 1, 1))
-                self.frames.append(frame)
+                self.frames.append(
+                    load_image(f"{self.path}{os.sep}{frame}", CONVERT_ALPHA, (1, 1, 1))
+                )
             elif frame.split(".")[-1] == "json":
                 pass
             else:
@@ -86,8 +176,7 @@ class SpriteStack:
         folder.sort()
         for f in folder:
             if f[0] != "." and f != "config.json":
-                surf = pygame.image.load(path + os.sep + f).convert_alpha()
-                self.frames.append(surf)
+                self.frames.append(load_image(path + os.sep + f, CONVERT_ALPHA))
 
         self._cache = {}
         self.cache_rotation(0)
@@ -152,27 +241,39 @@ class SpriteStack:
                     ),
                 )
 
-    def render_to_game(self, game, pos, rot: float, spread=1):
+    def render_to_game(self, game, pos, rot: float, spread=1, prev_pos=None):
         rot %= 360
         if rot in self._cache:
             image = self._cache[rot]
             image.set_colorkey((1, 1, 1))
+            offset = (
+                -(image.get_width() // 2),
+                -(image.get_height() // 2) - (len(self.frames) // 2) * spread,
+            )
             game.camera.render(
                 image,
-                (
-                    pos[0] - image.get_width() // 2,
-                    pos[1] - image.get_height() // 2 - (len(self.frames) // 2) * spread,
+                (pos[0] + offset[0], pos[1] + offset[1]),
+                prev_pos=(
+                    None
+                    if prev_pos is None
+                    else (prev_pos[0] + offset[0], prev_pos[1] + offset[1])
                 ),
             )
         else:
             for i, img in enumerate(self.frames):
                 img = pygame.transform.rotate(img, rot)
                 img.set_colorkey((1, 1, 1))
+                offset = (
+                    -(img.get_width() // 2),
+                    -(img.get_height() // 2) - i * spread,
+                )
                 game.camera.render(
                     img,
-                    (
-                        pos[0] - img.get_width() // 2,
-                        pos[1] - img.get_height() // 2 - i * spread,
+                    (pos[0] + offset[0], pos[1] + offset[1]),
+                    prev_pos=(
+                        None
+                        if prev_pos is None
+                        else (prev_pos[0] + offset[0], prev_pos[1] + offset[1])
                     ),
                 )
 
@@ -1,4 +1,5 @@
 import time
+from collections import deque
 
 import pygame
 
@@ -65,6 +66,8 @@ TYPENAMES = [
     "MOUSEUP2",
     "MOUSEDOWN2",
     "WINDOWMOVED",
+    "KEYHOLD",
+    "MOUSEHOLD",
     "NONEEVENT",
 ]
 KEYS = (
@@ -382,31 +385,149 @@ def custom_event_type() -> int:
 
 
 class Event:
+    """An input event with its attributes in a dict, used for custom event types;
+    the built-in types are fixed-layout subclasses, see EVENT_CLASSES"""
+
+    __slots__ = ("type", "_attr")
+    fields = ()
+
     def __init__(self, type: int, attributes: dict | None = None, **kwargs):
-        self.attr = {}
-        self.attr.update(attributes if attributes is not None else {})
-        self.attr.update(kwargs)
         self.type = type
+        self._attr = {}
+        self._attr.update(attributes if attributes is not None else {})
+        self._attr.update(kwargs)
+
+    @property
+    def attr(self) -> dict:
+        return self._attr
+
+    def copy(self, type: int | None = None):
+        """:returns: the same event, as `type` if it is given"""
+        return Event(self.type if type is None else type, self._attr)
 
     def __getitem__(self, item):
         return self.attr[item]
 
     def __eq__(self, other):
+        if not isinstance(other, Event):
+            return NotImplemented
         return (self.attr, self.type) == (other.attr, other.type)
 
     def __repr__(self):
-        return f"Event({TYPENAMES[self.type]}), {self.attr}"
+        name = TYPENAMES[self.type] if self.type < len(TYPENAMES) else self.type
+        return f"Event({name}), {self.attr}"
 
     def __getattr__(self, item):
-        return self.attr[item]
+        # only reached when item isn't a slot, so `_attr` is missing on fixed-layout events
+        if item == "_attr":
+            raise AttributeError(item)
+        try:
+            return self._attr[item]
+        except KeyError:
+            raise AttributeError(item) from None
+
+
+class _FixedEvent(Event):
+    """An event whose attributes are slots, named by `fields` and given positionally after the type"""
+
+    __slots__ = ()
+
+    def __init__(self, type: int, *values):
+        self.type = type
+        for field, value in zip(self.fields, values):
+            setattr(self, field, value)
+
+    @property
+    def attr(self) -> dict:
+        return {field: getattr(self, field) for field in self.fields}
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.fields)
+
+    def copy(self, type: int | None = None):
+        return self.__class__(self.type if type is None else type, *self.values())
+
+    def __eq__(self, other):
+        if other.__class__ is self.__class__:
+            return self.type == other.type and self.values() == other.values()
+        return super().__eq__(other)
+
+
+def _event_class(name: str, fields: tuple[str, ...]) -> type:
+    return type(name, (_FixedEvent,), {"__slots__": fields, "fields": fields})
+
+
+KeyDownEvent = _event_class("KeyDownEvent", ("key", "unicode", "mod", "scancode"))
+KeyUpEvent = _event_class("KeyUpEvent", ("key", "mod"))
+KeyHoldEvent = _event_class("KeyHoldEvent", ("key", "time"))
+MouseButtonEvent = _event_class("MouseButtonEvent", ("pos", "button"))
+MouseMoveEvent = _event_class("MouseMoveEvent", ("pos", "buttons", "rel"))
+MouseWheelEvent = _event_class("MouseWheelEvent", ("flipped", "x", "y"))
+MouseHoldEvent = _event_class("MouseHoldEvent", ("button", "time"))
+JoyAxisEvent = _event_class("JoyAxisEvent", ("instance_id", "axis", "value"))
+JoyBallEvent = _event_class("JoyBallEvent", ("instance_id", "ball", "rel"))
+JoyHatEvent = _event_class("JoyHatEvent", ("instance_id", "hat", "value"))
+JoyButtonEvent = _event_class("JoyButtonEvent", ("instance_id", "button"))
+DeviceEvent = _event_class("DeviceEvent", ("device_id",))
+WindowMovedEvent = _event_class("WindowMovedEvent", ("x", "y"))
+ResizeEvent = _event_class("ResizeEvent", ("size", "w", "h"))
+DropFileEvent = _event_class("DropFileEvent", ("file",))
+FingerEvent = _event_class(
+    "FingerEvent", ("touch_id", "finger_id", "x", "y", "dx", "dy")
+)
+QuitEvent = _event_class("QuitEvent", ())
+
+
+def _finger_event(type: int, event: pygame.event.Event) -> Event:
+    return FingerEvent(
+        type, event.touch_id, event.finger_id, event.x, event.y, event.dx, event.dy
+    )
+
+
+# the class events of each built-in type are made with
+EVENT_CLASSES = {
+    QUIT: QuitEvent,
+    KEYDOWN: KeyDownEvent,
+    KEYDOWN2: KeyDownEvent,
+    KEYUP: KeyUpEvent,
+    KEYUP2: KeyUpEvent,
+    KEYHOLD: KeyHoldEvent,
+    MOUSEMOVE: MouseMoveEvent,
+    MOUSEWHEEL: MouseWheelEvent,
+    MOUSEDOWN: MouseButtonEvent,
+    MOUSEDOWN2: MouseButtonEvent,
+    MOUSEUP: MouseButtonEvent,
+    MOUSEUP2: MouseButtonEvent,
+    MOUSEHOLD: MouseHoldEvent,
+    JOYAXISMOTION: JoyAxisEvent,
+    JOYBALLMOTION: JoyBallEvent,
+    JOYHATMOTION: JoyHatEvent,
+    JOYBUTTONDOWN: JoyButtonEvent,
+    JOYBUTTONUP: JoyButtonEvent,
+    CONTROLLERADDED: DeviceEvent,
+    CONTROLLERREMOVED: DeviceEvent,
+    WINDOWMOVED: WindowMovedEvent,
+    VIDEORESIZE: ResizeEvent,
+    DROPFILE: DropFileEvent,
+    FINGERMOTION: FingerEvent,
+    FINGERUP: FingerEvent,
+    FINGERUP2: FingerEvent,
+    FINGERDOWN: FingerEvent,
+    FINGERDOWN2: FingerEvent,
+}
 
 
 class Input:
     def __init__(self, cache_length=128):
         self.controllers = []
-        self.cache = [[], []]  # time, event
+        self.cache = [
+            deque(maxlen=cache_length),
+            deque(maxlen=cache_length),
+        ]  # time, event
         self.length = cache_length
         self.posted_events = []
+        # (type, values): when an event that can be doubled was last cached
+        self._last_seen = {}
         self._held_keys = {"keys": [], "mouse": []}
         self._hold_start = {"keys": {}, "mouse": {}}
         self.mx = 0
@@ -416,6 +537,37 @@ class Input:
     def post(self, event: Event):
         self.posted_events.append(event)
 
+    def _is_repeat(self, event: Event, cur_time: float) -> bool:
+        """:returns: whether an equal event was cached less than LAG_TIME ago"""
+        seen = self._last_seen.get((event.type, event.values()))
+        return seen is not None and seen >= cur_time - LAG_TIME
+
+    def _forget_stale(self, cur_time: float):
+        if len(self._last_seen) > self.length:
+            since = cur_time - LAG_TIME
+            self._last_seen = {
+                key: t for key, t in self._last_seen.items() if t >= since
+            }
+
+    def _emit(
+        self,
+        events: list[Event],
+        event: Event,
+        cur_time: float,
+        double_type: int | None = None,
+    ):
+        """Returns and caches `event`, preceded by a copy of it as `double_type` if it repeats a recent one"""
+        if double_type is not None:
+            if self._is_repeat(event, cur_time):
+                double = event.copy(double_type)
+                events.append(double)
+                self.cache[0].append(cur_time)
+                self.cache[1].append(double)
+            self._last_seen[event.type, event.values()] = cur_time
+        events.append(event)
+        self.cache[0].append(cur_time)
+        self.cache[1].append(event)
+
     def get(self) -> list[Event]:
         self.controllers = [
             pygame.joystick.Joystick(c) for c in range(pygame.joystick.get_count())
@@ -424,651 +576,157 @@ class Input:
 
         return_list = []
         cur_time = time.time()
-        while len(self.cache[0]) >= self.length:
-            del self.cache[1][0]
-            del self.cache[0][0]
+        self._forget_stale(cur_time)
         for event in pygame.event.get():
             match event.type:
                 case pygame.KEYDOWN:
-                    if len(
-                        [
-                            cache_event
-                            for t, cache_event in zip(self.cache[0], self.cache[1])
-                            if t >= cur_time - LAG_TIME
-                            and cache_event
-                            == Event(
-                                KEYDOWN,
-                                {
-                                    "key": event.key,
-                                    "unicode": event.unicode,
-                                    "mod": event.mod,
-                                    "scancode": event.scancode,
-                                },
-                            )
-                        ]
-                    ):
-                        return_list.append(
-                            Event(
-                                KEYDOWN2,
-                                {
-                                    "key": event.key,
-                                    "unicode": event.unicode,
-                                    "mod": event.mod,
-                                    "scancode": event.scancode,
-                                },
-                            )
-                        )
-                        self.cache[1].append(
-                            Event(
-                                KEYDOWN2,
-                                {
-                                    "key": event.key,
-                                    "unicode": event.unicode,
-                                    "mod": event.mod,
-                                    "scancode": event.scancode,
-                                },
-                            )
-                        )
-                        self.cache[0].append(cur_time)
-                        return_list.append(
-                            Event(
-                                KEYDOWN,
-                                {
-                                    "key": event.key,
-                                    "unicode": event.unicode,
-                                    "mod": event.mod,
-                                    "scancode": event.scancode,
-                                },
-                            )
-                        )
-                        self.cache[1].append(
-                            Event(
-                                KEYDOWN,
-                                {
-                                    "key": event.key,
-                                    "unicode": event.unicode,
-                                    "mod": event.mod,
-                                    "scancode": event.scancode,
-                                },
-                            )
-                        )
-                        self.cache[0].append(cur_time)
-                        if event.key not in self._held_keys["keys"]:
-                            self._held_keys["keys"].append(event.key)
-                            self._hold_start["keys"][
-                                event.key
-                            ] = cur_time  # must always set this!!!
-                    else:
-                        return_list.append(
-                            Event(
-                                KEYDOWN,
-                                {
-                                    "key": event.key,
-                                    "unicode": event.unicode,
-                                    "mod": event.mod,
-                                    "scancode": event.scancode,
-                                },
-                            )
-                        )
-                        self.cache[1].append(
-                            Event(
-                                KEYDOWN,
-                                {
-                                    "key": event.key,
-                                    "unicode": event.unicode,
-                                    "mod": event.mod,
-                                    "scancode": event.scancode,
-                                },
-                            )
-                        )
-                        self.cache[0].append(cur_time)
-                        if event.key not in self._held_keys["keys"]:
-                            self._held_keys["keys"].append(event.key)
-                            self._hold_start["keys"][event.key] = cur_time
+                    self._emit(
+                        return_list,
+                        KeyDownEvent(
+                            KEYDOWN, event.key, event.unicode, event.mod, event.scancode
+                        ),
+                        cur_time,
+                        KEYDOWN2,
+                    )
+                    if event.key not in self._held_keys["keys"]:
+                        self._held_keys["keys"].append(event.key)
+                        self._hold_start["keys"][event.key] = cur_time
                 case pygame.MOUSEBUTTONDOWN:
-                    if len(
-                        [
-                            cache_event
-                            for t, cache_event in zip(self.cache[0], self.cache[1])
-                            if t >= cur_time - LAG_TIME
-                            and cache_event
-                            == Event(
-                                MOUSEDOWN, {"pos": event.pos, "button": event.button}
-                            )
-                        ]
-                    ):
-                        return_list.append(
-                            Event(
-                                MOUSEDOWN2, {"pos": event.pos, "button": event.button}
-                            )
-                        )
-                        self.cache[1].append(
-                            Event(
-                                MOUSEDOWN2, {"pos": event.pos, "button": event.button}
-                            )
-                        )
-                        self.cache[0].append(cur_time)
-                        return_list.append(
-                            Event(MOUSEDOWN, {"pos": event.pos, "button": event.button})
-                        )
-                        self.cache[1].append(
-                            Event(MOUSEDOWN, {"pos": event.pos, "button": event.button})
-                        )
-                        self.cache[0].append(cur_time)
-                        if event.button not in self._held_keys["mouse"]:
-                            self._held_keys["mouse"].append(event.button)
-                            self._hold_start["mouse"][event.button] = cur_time
-                    else:
-                        return_list.append(
-                            Event(MOUSEDOWN, {"pos": event.pos, "button": event.button})
-                        )
-                        self.cache[1].append(
-                            Event(MOUSEDOWN, {"pos": event.pos, "button": event.button})
-                        )
-                        self.cache[0].append(cur_time)
-                        if event.button not in self._held_keys["mouse"]:
-                            self._held_keys["mouse"].append(event.button)
-                            self._hold_start["mouse"][event.button] = cur_time
+                    self._emit(
+                        return_list,
+                        MouseButtonEvent(MOUSEDOWN, event.pos, event.button),
+                        cur_time,
+                        MOUSEDOWN2,
+                    )
+                    if event.button not in self._held_keys["mouse"]:
+                        self._held_keys["mouse"].append(event.button)
+                        self._hold_start["mouse"][event.button] = cur_time
                 case pygame.MOUSEBUTTONUP:
-                    if len(
-                        [
-                            cache_event
-                            for t, cache_event in zip(self.cache[0], self.cache[1])
-                            if t >= cur_time - LAG_TIME
-                            and cache_event
-                            == Event(
-                                MOUSEUP, {"pos": event.pos, "button": event.button}
-                            )
-                        ]
-                    ):
-                        return_list.append(
-                            Event(MOUSEUP2, {"pos": event.pos, "button": event.button})
-                        )
-                        self.cache[1].append(
-                            Event(MOUSEUP2, {"pos": event.pos, "button": event.button})
-                        )
-                        self.cache[0].append(cur_time)
-                        return_list.append(
-                            Event(MOUSEUP, {"pos": event.pos, "button": event.button})
-                        )
-                        self.cache[1].append(
-                            Event(MOUSEUP, {"pos": event.pos, "button": event.button})
-                        )
-                        self.cache[0].append(cur_time)
-                        self._held_keys["mouse"].remove(event.button)
-                    else:
-                        return_list.append(
-                            Event(MOUSEUP, {"pos": event.pos, "button": event.button})
-                        )
-                        self.cache[1].append(
-                            Event(MOUSEUP, {"pos": event.pos, "button": event.button})
-                        )
-                        self.cache[0].append(cur_time)
-                        self._held_keys["mouse"].remove(event.button)
+                    self._emit(
+                        return_list,
+                        MouseButtonEvent(MOUSEUP, event.pos, event.button),
+                        cur_time,
+                        MOUSEUP2,
+                    )
+                    self._held_keys["mouse"].remove(event.button)
                 case pygame.KEYUP:
-                    if len(
-                        [
-                            cache_event
-                            for t, cache_event in zip(self.cache[0], self.cache[1])
-                            if t >= cur_time - LAG_TIME
-                            and cache_event
-                            == Event(KEYUP, {"key": event.key, "mod": event.mod})
-                        ]
-                    ):
-                        return_list.append(
-                            Event(KEYUP2, {"key": event.key, "mod": event.mod})
-                        )
-                        self.cache[1].append(
-                            Event(KEYUP2, {"key": event.key, "mod": event.mod})
-                        )
-                        self.cache[0].append(cur_time)
-                        return_list.append(
-                            Event(KEYUP, {"key": event.key, "mod": event.mod})
-                        )
-                        self.cache[1].append(
-                            Event(KEYUP, {"key": event.key, "mod": event.mod})
-                        )
-                        self.cache[0].append(cur_time)
-                        self._held_keys["keys"].remove(event.key)
-                    else:
-                        return_list.append(
-                            Event(KEYUP, {"key": event.key, "mod": event.mod})
-                        )
-                        self.cache[1].append(
-                            Event(KEYUP, {"key": event.key, "mod": event.mod})
-                        )
-                        self.cache[0].append(cur_time)
-                        self._held_keys["keys"].remove(event.key)
+                    self._emit(
+                        return_list,
+                        KeyUpEvent(KEYUP, event.key, event.mod),
+                        cur_time,
+                        KEYUP2,
+                    )
+                    self._held_keys["keys"].remove(event.key)
                 case pygame.QUIT:
-                    return_list.append(Event(QUIT))
-                    self.cache[1].append(Event(QUIT))
-                    self.cache[0].append(cur_time)
+                    self._emit(return_list, QuitEvent(QUIT), cur_time)
                 case pygame.MOUSEMOTION:
-                    return_list.append(
-                        Event(
-                            MOUSEMOVE,
-                            {
-                                "pos": event.pos,
-                                "buttons": event.buttons,
-                                "rel": event.rel,
-                            },
-                        )
-                    )
-                    self.cache[1].append(
-                        Event(
-                            MOUSEMOVE,
-                            {
-                                "pos": event.pos,
-                                "buttons": event.buttons,
-                                "rel": event.rel,
-                            },
-                        )
+                    self._emit(
+                        return_list,
+                        MouseMoveEvent(MOUSEMOVE, event.pos, event.buttons, event.rel),
+                        cur_time,
                     )
-                    self.cache[0].append(cur_time)
                 case pygame.JOYAXISMOTION:
-                    return_list.append(
-                        Event(
-                            JOYAXISMOTION,
-                            {
-                                "instance_id": event.instance_id,
-                                "axis": event.axis,
-                                "value": event.value,
-                            },
-                        )
+                    self._emit(
+                        return_list,
+                        JoyAxisEvent(
+                            JOYAXISMOTION, event.instance_id, event.axis, event.value
+                        ),
+                        cur_time,
                     )
-                    self.cache[1].append(
-                        Event(
-                            JOYAXISMOTION,
-                            {
-                                "instance_id": event.instance_id,
-                                "axis": event.axis,
-                                "value": event.value,
-                            },
-                        )
-                    )
-                    self.cache[0].append(cur_time)
                 case pygame.JOYBALLMOTION:
-                    return_list.append(
-                        Event(
-                            JOYBALLMOTION,
-                            {
-                                "instance_id": event.instance_id,
-                                "ball": event.ball,
-                                "rel": event.rel,
-                            },
-                        )
-                    )
-                    self.cache[1].append(
-                        Event(
-                            JOYBALLMOTION,
-                            {
-                                "instance_id": event.instance_id,
-                                "ball": event.ball,
-                                "rel": event.rel,
-                            },
-                        )
+                    self._emit(
+                        return_list,
+                        JoyBallEvent(
+                            JOYBALLMOTION, event.instance_id, event.ball, event.rel
+                        ),
+                        cur_time,
                     )
-                    self.cache[0].append(cur_time)
                 case pygame.JOYHATMOTION:
-                    return_list.append(
-                        Event(
-                            JOYHATMOTION,
-                            {
-                                "instance_id": event.instance_id,
-                                "hat": event.hat,
-                                "value": event.value,
-                            },
-                        )
-                    )
-                    self.cache[1].append(
-                        Event(
-                            JOYHATMOTION,
-                            {
-                                "instance_id": event.instance_id,
-                                "hat": event.hat,
-                                "value": event.value,
-                            },
-                        )
+                    self._emit(
+                        return_list,
+                        JoyHatEvent(
+                            JOYHATMOTION, event.instance_id, event.hat, event.value
+                        ),
+                        cur_time,
                     )
-                    self.cache[0].append(cur_time)
                 case pygame.JOYBUTTONUP:
-                    return_list.append(
-                        Event(
-                            JOYBUTTONUP,
-                            {"instance_id": event.instance_id, "button": event.button},
-                        )
+                    self._emit(
+                        return_list,
+                        JoyButtonEvent(JOYBUTTONUP, event.instance_id, event.button),
+                        cur_time,
                     )
-                    self.cache[1].append(
-                        Event(
-                            JOYBUTTONUP,
-                            {"instance_id": event.instance_id, "button": event.button},
-                        )
-                    )
-                    self.cache[0].append(cur_time)
                 case pygame.JOYBUTTONDOWN:
-                    return_list.append(
-                        Event(
-                            JOYBUTTONDOWN,
-                            {"instance_id": event.instance_id, "button": event.button},
-                        )
-                    )
-                    self.cache[1].append(
-                        Event(
-                            JOYBUTTONDOWN,
-                            {"instance_id": event.instance_id, "button": event.button},
-                        )
+                    self._emit(
+                        return_list,
+                        JoyButtonEvent(JOYBUTTONDOWN, event.instance_id, event.button),
+                        cur_time,
                     )
-                    self.cache[0].append(cur_time)
                 case pygame.MOUSEWHEEL:
-                    return_list.append(
-                        Event(
-                            MOUSEWHEEL,
-                            {"flipped": event.flipped, "x": event.x, "y": event.y},
-                        )
-                    )
-                    self.cache[1].append(
-                        Event(
-                            MOUSEWHEEL,
-                            {"flipped": event.flipped, "x": event.x, "y": event.y},
-                        )
+                    self._emit(
+                        return_list,
+                        MouseWheelEvent(MOUSEWHEEL, event.flipped, event.x, event.y),
+                        cur_time,
                     )
-                    self.cache[0].append(cur_time)
                 case pygame.JOYDEVICEADDED:
-                    return_list.append(
-                        Event(CONTROLLERADDED, {"device_id": event.device_id})
-                    )
                     self.controllers = [
                         pygame.joystick.Joystick(c)
                         for c in range(pygame.joystick.get_count())
                     ]
-                    self.cache[1].append(
-                        Event(CONTROLLERADDED, {"device_id": event.device_id})
+                    self._emit(
+                        return_list,
+                        DeviceEvent(CONTROLLERADDED, event.device_id),
+                        cur_time,
                     )
-                    self.cache[0].append(cur_time)
                 case pygame.JOYDEVICEREMOVED:
-                    return_list.append(
-                        Event(CONTROLLERREMOVED, {"device_id": event.device_id})
-                    )
                     self.controllers = [
                         pygame.joystick.Joystick(c)
                         for c in range(pygame.joystick.get_count())
                     ]
-                    self.cache[1].append(
-                        Event(CONTROLLERREMOVED, {"device_id": event.device_id})
+                    self._emit(
+                        return_list,
+                        DeviceEvent(CONTROLLERREMOVED, event.device_id),
+                        cur_time,
                     )
-                    self.cache[0].append(cur_time)
                 case pygame.WINDOWMOVED:
-                    return_list.append(Event(WINDOWMOVED, {"x": event.x, "y": event.y}))
-                    self.cache[1].append(
-                        Event(WINDOWMOVED, {"x": event.x, "y": event.y})
+                    self._emit(
+                        return_list,
+                        WindowMovedEvent(WINDOWMOVED, event.x, event.y),
+                        cur_time,
                     )
-                    self.cache[0].append(cur_time)
                 case pygame.VIDEORESIZE:
-                    return_list.append(
-                        Event(
-                            VIDEORESIZE,
-                            {"size": event.size, "w": event.w, "h": event.h},
-                        )
-                    )
-                    self.cache[1].append(
-                        Event(
-                            VIDEORESIZE,
-                            {"size": event.size, "w": event.w, "h": event.h},
-                        )
+                    self._emit(
+                        return_list,
+                        ResizeEvent(VIDEORESIZE, event.size, event.w, event.h),
+                        cur_time,
                     )
-                    self.cache[0].append(cur_time)
                 case pygame.DROPFILE:
-                    return_list.append(Event(DROPFILE, {"file": event.file}))
-                    self.cache[1].append(Event(DROPFILE, {"file": event.file}))
-                    self.cache[0].append(cur_time)
-                case pygame.FINGERMOTION:
-                    return_list.append(
-                        Event(
-                            FINGERMOTION,
-                            {
-                                "touch_id": event.touch_id,
-                                "finger_id": event.finger_id,
-                                "x": event.x,
-                                "y": event.y,
-                                "dx": event.dx,
-                                "dy": event.dy,
-                            },
-                        )
+                    self._emit(
+                        return_list, DropFileEvent(DROPFILE, event.file), cur_time
                     )
-                    self.cache[1].append(
-                        Event(
-                            FINGERMOTION,
-                            {
-                                "touch_id": event.touch_id,
-                                "finger_id": event.finger_id,
-                                "x": event.x,
-                                "y": event.y,
-                                "dx": event.dx,
-                                "dy": event.dy,
-                            },
-                        )
+                case pygame.FINGERMOTION:
+                    self._emit(
+                        return_list, _finger_event(FINGERMOTION, event), cur_time
                     )
-                    self.cache[0].append(cur_time)
                 case pygame.FINGERUP:
-                    if len(
-                        [
-                            cache_event
-                            for t, cache_event in zip(self.cache[0], self.cache[1])
-                            if t >= cur_time - LAG_TIME
-                            and cache_event
-                            == Event(
-                                FINGERUP,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        ]
-                    ):
-                        return_list.append(
-                            Event(
-                                FINGERUP2,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        )
-                        self.cache[1].append(
-                            Event(
-                                FINGERUP2,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        )
-                        self.cache[0].append(cur_time)
-                        return_list.append(
-                            Event(
-                                FINGERUP,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        )
-                        self.cache[1].append(
-                            Event(
-                                FINGERUP,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        )
-                        self.cache[0].append(cur_time)
-                    else:
-                        return_list.append(
-                            Event(
-                                FINGERUP,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        )
-                        self.cache[1].append(
-                            Event(
-                                FINGERUP,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        )
-                        self.cache[0].append(cur_time)
+                    self._emit(
+                        return_list, _finger_event(FINGERUP, event), cur_time, FINGERUP2
+                    )
                 case pygame.FINGERDOWN:
-                    if len(
-                        [
-                            cache_event
-                            for t, cache_event in zip(self.cache[0], self.cache[1])
-                            if t >= cur_time - LAG_TIME
-                            and cache_event
-                            == Event(
-                                FINGERDOWN,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        ]
-                    ):
-                        return_list.append(
-                            Event(
-                                FINGERDOWN2,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        )
-                        self.cache[1].append(
-                            Event(
-                                FINGERDOWN2,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        )
-                        self.cache[0].append(cur_time)
-                        return_list.append(
-                            Event(
-                                FINGERDOWN,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        )
-                        self.cache[1].append(
-                            Event(
-                                FINGERDOWN,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        )
-                        self.cache[0].append(cur_time)
-                    else:
-                        return_list.append(
-                            Event(
-                                FINGERDOWN,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        )
-                        self.cache[1].append(
-                            Event(
-                                FINGERDOWN,
-                                {
-                                    "touch_id": event.touch_id,
-                                    "finger_id": event.finger_id,
-                                    "x": event.x,
-                                    "y": event.y,
-                                    "dx": event.dx,
-                                    "dy": event.dy,
-                                },
-                            )
-                        )
-                        self.cache[0].append(cur_time)
+                    self._emit(
+                        return_list,
+                        _finger_event(FINGERDOWN, event),
+                        cur_time,
+                        FINGERDOWN2,
+                    )
 
         for key in self._held_keys["keys"]:
             self.posted_events.append(
-                Event(
-                    KEYHOLD,
-                    {"key": key, "time": cur_time - self._hold_start["keys"][key]},
-                )
+                KeyHoldEvent(KEYHOLD, key, cur_time - self._hold_start["keys"][key])
             )
         for button in self._held_keys["mouse"]:
             self.posted_events.append(
-                Event(
-                    MOUSEHOLD,
-                    {
-                        "button": button,
-                        "time": cur_time - self._hold_start["mouse"][button],
-                    },
+                MouseHoldEvent(
+                    MOUSEHOLD, button, cur_time - self._hold_start["mouse"][button]
                 )
             )
         for event in self.posted_events:
@@ -1,18 +1,49 @@
-import csv
-import xml.etree.ElementTree as ET
+import json
+import math
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain
+from operator import attrgetter
 from os import mkdir, sep
-from os.path import exists, isdir
+from os.path import exists
 
+import numpy as np
 import pygame
 
-from .entity import Entity
+from . import camera, collision
+from .entity import Entity, EntityStore, default_store
+from .gfx import load_image
 from .input import custom_event_type
-from .utils import FileTypeError, read_json, write_json
+from .levelcache import (
+    LEVEL_CACHE_EXT,
+    LEVEL_STATE_EXT,
+    CompiledLevel,
+    apply_state,
+    digest_sources,
+    encode_state,
+)
+from .spatial import SpatialGrid
+from .tilemap import (
+    STREAM_RADIUS,
+    StreamingTileLayer,
+    TileLayer,
+    make_layer,
+    stream_tmx,
+)
+from .utils import read_file, read_json, write_file_atomic
 
 SWITCH_LVL = custom_event_type()
+GRID_CELL_TILES = 4  # width and height of a spatial grid cell, in tiles
+MAX_PRELOADED = 4  # ready levels kept around, the least recently used are dropped first
+BAND_RATE = (
+    4  # entities in the band around the active region update once every this many ticks
+)
+
+_topleft = attrgetter("rect.topleft")
 
 
 class Tile:
+    __slots__ = ("rect", "name", "solid", "img_path", "img", "game", "pos", "size")
 
     def __init__(
         self,
@@ -23,11 +54,13 @@ class Tile:
         name: str,
         img_path: str,
         game,
+        solid: bool = True,
     ):
         self.rect = pygame.Rect(x, y, w, h)
         self.name = name
+        self.solid = solid
         self.img_path = img_path
-        self.img = pygame.image.load(f"data{sep}{img_path}").convert()
+        self.img = load_image(f"data{sep}{img_path}")
         self.game = game
         self.pos = pygame.Vector2(x, y)
         self.size = pygame.Vector2(self.rect.x, self.rect.y)
@@ -43,8 +76,7 @@ class Tile:
         if surf is not None:
             surf.blit(self.img, self.rect.topleft)
         else:
-            self.game.camera.add_update_rects([self.rect])
-            self.game.camera.render(self.img, self.rect.topleft)
+            self.game.camera.render(self.img, self.rect.topleft, camera.TILES)
 
     def collides(self, rect: pygame.Rect) -> bool:
         return self.rect.colliderect(rect)
@@ -59,103 +91,300 @@ class Level:
         cell_size: pygame.Vector2,
         tiles: list[Tile] = None,
         entities: list[Entity] = None,
+        separate_entities: bool = False,
+        tile_layer: TileLayer | StreamingTileLayer | None = None,
+        meta: dict | None = None,
+        active_radius: float | None = None,
+        band_radius: float | None = None,
+        band_rate: int = BAND_RATE,
+        store: EntityStore | None = None,
+        digest: bytes = bytes(20),
     ):
         self.size = size
         self.cell_size = cell_size
         self.name = name
-
-        self.entities = entities
-        self.tiles = tiles
+        self.meta = meta if meta is not None else {}
+
+        # entities in this store are integrated together, see _update_entities()
+        self.store = store if store is not None else default_store
+        self.entities = entities if entities is not None else []
+        self.tiles = tiles if tiles is not None else []
+        # uid: (x, y, action) of every entity the level was built with, saved states are the difference from it
+        self.authored = {}
+        for uid, entity in enumerate(self.entities):
+            entity.uid = uid
+            self.authored[uid] = (entity.pos.x, entity.pos.y, entity.action)
+        self._next_uid = len(self.entities)
+        # of the files the level was authored from, a saved state only applies to the same sources
+        self.digest = digest
 
         assert not (
             (size.y % cell_size.y) or (size.x % cell_size.x)
         ), f"Cell size doesn't match level size!\n\t-> Cellsize: {cell_size}\tLevelsize: {size}"
 
-        self.objs = (tiles if tiles is not None else []) + (
-            entities if entities is not None else []
+        self.objs = self.tiles + self.entities
+        self.grid = SpatialGrid(size, cell_size)
+        self.cells = self.grid.cells
+        self.tile_layer = tile_layer
+        # (col, row): tile name of saved edits whose type the tile layer doesn't have,
+        # kept so saving the level again doesn't lose them, see levelcache.apply_state()
+        self.unknown_tiles = {}
+        # None when nothing in the level is solid, then entities skip tile collision entirely
+        self.solid = (
+            tile_layer
+            if tile_layer is not None
+            else collision.SolidTiles.from_tiles(self.tiles)
         )
-        self.cells = [[]] * int((size.x // cell_size.x) * (size.y // cell_size.y))
+        self.separate_entities = separate_entities
+        self.collisions = []  # (entity, entity) pairs overlapping after the last update
+
+        # simulation levels of detail, in pixels around the focus; None simulates everything every tick
+        self.active_radius = active_radius
+        self.band_radius = band_radius
+        self.band_rate = band_rate
+        self.lod_stats = (
+            0,
+            0,
+            0,
+        )  # entities updated at full rate, at the band rate, and asleep
+        self._tick = 0
 
         for obj in self.objs:
             self.insert(obj)
 
-    def update(self, dt: float):
-        for cell in self.cells:
-            for obj in cell:
-                if isinstance(obj, Entity):
-                    prev_i = self.index(obj)
-                    obj.update(dt)
-                    if prev_i != self.index(obj):
-                        self.remove(obj)
-                        self.insert(obj)
-                else:
-                    obj.update()
+    def update(self, dt: float, focus: pygame.Rect | None = None):
+        """`focus` is the area the player sees, usually the camera viewport, which the simulation LOD is centred on"""
+        if self.tile_layer is not None:
+            self.tile_layer.update()
+        for tile in self.tiles:
+            tile.update()
+
+        if focus is None or self.active_radius is None:
+            self._update_entities(self.entities, dt)
+            self._find_collisions(self.entities)
+            self.lod_stats = (len(self.entities), 0, 0)
+            return
 
-    def _handle_collisions(self, e: Entity):
-        if not e.is_real:
+        active, band = self._lod_regions(focus)
+        self._tick += 1
+        band = [e for e in band if (e.uid + self._tick) % self.band_rate == 0]
+        self._update_entities(active, dt)
+        self._update_entities(band, dt, self.band_rate)
+        self._find_collisions(active + band)
+        self.lod_stats = (
+            len(active),
+            len(band),
+            len(self.entities) - len(active) - len(band),
+        )
+
+    def _update_entities(self, entities: list[Entity], dt: float, steps: int = 1):
+        """Plain entities in the level's store are integrated in one batch, and only the ones that moved
+        are collided and re-filed; anything else, like a subclass with its own update(), updates itself.
+        `steps` ordinary steps of `dt` are taken, so entities updated less often still follow the same path,
+        the batch takes them in one go and is collided once over the whole distance
+        """
+        batch = []
+        for entity in entities:
+            if entity.store is self.store and type(entity).update is Entity.update:
+                batch.append(entity)
+            elif steps == 1:
+                entity.update(dt)
+                self.grid.move(entity)
+            else:
+                camera = entity.game.camera
+                muted = camera.muted
+                try:
+                    for i in range(steps):
+                        # only the last step is drawn
+                        camera.muted = muted or i < steps - 1
+                        entity.update(dt)
+                finally:
+                    camera.muted = muted
+                self.grid.move(entity)
+        if not batch:
             return
-        for i in self.fully_index(e):
-            for t in self.cells[i]:
-                if isinstance(t, Tile):
-                    pass
+        rows = np.fromiter((e.row for e in batch), np.intp, len(batch))
+        store = self.store
+        if steps > 1:
+            start = store.pos[rows]
+        moved = store.integrate(dt, rows, steps)
+        if steps > 1:
+            # colliders sweep from prev_pos, so it is pointed back at the start to cover the whole distance
+            vel = store.pos[rows] - store.prev_pos[rows]
+            store.prev_pos[rows] = start
+        swept = self._collide_batch(batch, rows, moved)
+        # an entity teleported while at rest doesn't move when stepped, so any rect not at its row's position is synced
+        rects = np.fromiter(
+            chain.from_iterable(map(_topleft, batch)), np.int64, 2 * len(batch)
+        ).reshape(-1, 2)
+        stale = moved | (store.pos[rows].astype(np.int64) != rects).any(1)
+        for i in np.flatnonzero(stale).tolist():
+            entity = batch[i]
+            entity.settle(entity.rect.copy(), not swept[i])
+            self.grid.move(entity)
+        if steps > 1:
+            # a blocked axis had prev_pos moved onto pos, every other axis gets its velocity back
+            pos, prev = store.pos[rows], store.prev_pos[rows]
+            store.prev_pos[rows] = np.where(prev == pos, pos, pos - vel)
+        self._draw_batch(batch, rows, stale, dt * steps)
+
+    def _collide_batch(
+        self, batch: list[Entity], rows: np.ndarray, moved: np.ndarray
+    ) -> np.ndarray:
+        """Sweeps the moved entities the level collides itself against the tiles all at once,
+        :returns: a mask over the batch of the ones that were"""
+        swept = np.zeros(len(batch), bool)
+        if self.solid is None:
+            return swept
+        handle = self._handle_collisions
+        index = np.array(
+            [
+                i
+                for i in np.flatnonzero(moved).tolist()
+                if batch[i].is_real and batch[i].collider == handle
+            ],
+            np.intp,
+        )
+        if not len(index):
+            return swept
+        swept[index] = True
+        rows = rows[index]
+        pos, prev = self.store.pos[rows], self.store.prev_pos[rows]
+        collision.resolve_tiles_many(pos, prev, self.store.size[rows], self.solid)
+        self.store.pos[rows] = pos
+        self.store.prev_pos[rows] = prev
+        return swept
+
+    def _draw_batch(
+        self, batch: list[Entity], rows: np.ndarray, moved: np.ndarray, dt: float
+    ):
+        """Culls a batch against the viewport in one pass, and plays each animation they share once"""
+        camera = batch[0].game.camera
+        if camera.culling:
+            view = camera.get_viewport().inflate(
+                2 * camera.cull_margin, 2 * camera.cull_margin
+            )
+            pos = self.store.pos[rows]
+            end = pos + self.store.size[rows]
+            visible = np.flatnonzero(
+                (pos[:, 0] < view.right)
+                & (end[:, 0] > view.left)
+                & (pos[:, 1] < view.bottom)
+                & (end[:, 1] > view.top)
+            ).tolist()
+            camera.add_culled(len(batch) - len(visible))
+        else:
+            visible = range(len(batch))
+        played = set()
+        for i in visible:
+            entity = batch[i]
+            if entity.action is None or entity.img is None:
+                continue
+            anim = entity.anims[entity.action]
+            if id(anim) not in played:
+                played.add(id(anim))
+                anim.play(dt)
+            if not moved[i]:
+                camera.add_update_rect(entity.rect.inflate(1, 1))
+            entity.draw()
+
+    def _lod_regions(self, focus: pygame.Rect) -> tuple[list[Entity], list[Entity]]:
+        """:returns: the entities in the active region and those in the band around it,
+        found through the spatial grid, so everything further away costs nothing"""
+        focus = pygame.Rect(focus)
+        active = {
+            id(obj): obj
+            for obj in self.grid.query_rect(
+                focus.inflate(2 * self.active_radius, 2 * self.active_radius)
+            )
+            if isinstance(obj, Entity)
+        }
+        band = []
+        if self.band_radius is not None and self.band_radius > self.active_radius:
+            band = [
+                obj
+                for obj in self.grid.query_rect(
+                    focus.inflate(2 * self.band_radius, 2 * self.band_radius)
+                )
+                if isinstance(obj, Entity) and id(obj) not in active
+            ]
+        return list(active.values()), band
+
+    def _handle_collisions(self, e: Entity):
+        if e.is_real:
+            collision.resolve_tiles(e, self.solid)
+
+    def _find_collisions(self, entities: list[Entity]):
+        real = [e for e in entities if e.is_real]
+        rects = np.array(
+            [(e.rect.x, e.rect.y, e.rect.w, e.rect.h) for e in real], np.int32
+        ).reshape(-1, 4)
+        first, second = collision.find_pairs(rects)
+        self.collisions = [(real[i], real[j]) for i, j in zip(first, second)]
+        if self.separate_entities:
+            for a, b in self.collisions:
+                if collision.separate(a, b):
+                    a.rect.topleft = a.pos
+                    b.rect.topleft = b.pos
+                    self.grid.move(a)
+                    self.grid.move(b)
+
+    def close(self):
+        """Releases what the level holds outside of Python, like the tile streaming thread"""
+        if self.tile_layer is not None:
+            self.tile_layer.close()
+
+    def add_entity(self, entity: Entity):
+        if entity.uid is None:
+            entity.uid = self._next_uid
+        self._next_uid = max(self._next_uid, entity.uid + 1)
+        self.entities.append(entity)
+        self.objs.append(entity)
+        self.insert(entity)
+
+    def remove_entity(self, entity: Entity):
+        # list.remove() would use Entity.__eq__, which compares positions, not identity
+        _remove_identical(self.entities, entity)
+        _remove_identical(self.objs, entity)
+        self.remove(entity)
 
     def insert(self, obj: Tile | Entity):
-        if obj not in self.cells[i := self.index(obj)]:
-            self.cells[i].append(obj)
+        self.grid.insert(obj)
+        if isinstance(obj, Entity) and self.solid is not None:
+            obj.collider = self._handle_collisions
 
     def remove(self, obj: Tile | Entity):
-        self.cells[self.index(obj)].remove(obj)
+        self.grid.remove(obj)
+        if isinstance(obj, Entity):
+            obj.collider = None
 
     def index(self, obj: Tile | Entity) -> int:
         return self.index_at_pos(pygame.Vector2(obj.rect.center))
 
     def index_at_pos(self, pos: pygame.Vector2) -> int:
-        x = min(
-            (pos.x - (pos.x % self.cell_size.x)) // self.cell_size.x,
-            self.size.x // self.cell_size.x - 1,
-        )
-        y = min(
-            (pos.y - (pos.y % self.cell_size.y)) // self.cell_size.y,
-            self.size.y // self.cell_size.y - 1,
-        )
+        return self.grid.index_at_pos(pos)
 
-        return int(x + (self.size.x // self.cell_size.x - 1) * y)
+    def fully_index(self, obj: Tile | Entity) -> list[int]:
+        """:returns: the indices of every cell the object overlaps"""
+        return self.grid.indices_in_rect(obj.rect)
+
+    def query_rect(self, rect: pygame.Rect) -> list[Tile | Entity]:
+        return self.grid.query_rect(rect)
+
+    def query_point(self, pos: pygame.Vector2) -> list[Tile | Entity]:
+        return self.grid.query_point(pos)
+
+    def query_radius(self, pos: pygame.Vector2, radius: float) -> list[Tile | Entity]:
+        return self.grid.query_radius(pos, radius)
+
+
+def _remove_identical(items: list, obj):
+    del items[next(i for i, item in enumerate(items) if item is obj)]
 
-    def fully_index(
-        self, obj: Tile | Entity
-    ) -> list[int]:  # TODO: fix, dont assume there is always a cell at i-1, i+1, etc
-        indices = [i := self.index(obj)]
-        left = (
-            obj.rect.centerx - (obj.rect.centerx % self.cell_size.x) + obj.rect.w // 2
-        )
-        right = left + self.size.x - obj.rect.w
-        top = obj.rect.centery - (obj.rect.centery % self.cell_size.y) + obj.rect.h // 2
-        bottom = top + self.size.y - obj.rect.h
-
-        if obj.rect.centerx < left:
-            indices.append(i - 1)
-            if obj.rect.centery < top:
-                indices.append(i - self.size.x // self.cell_size.x)
-                indices.append(i - self.size.x // self.cell_size.x - 1)
-            elif obj.rect.centery > bottom:
-                indices.append(i + self.size.x // self.cell_size.x)
-                indices.append(i + self.size.x // self.cell_size.x - 1)
-
-        elif obj.rect.centerx > right:
-            indices.append(i + 1)
-            if obj.rect.centery < top:
-                indices.append(i - self.size.x // self.cell_size.x)
-                indices.append(i - self.size.x // self.cell_size.x + 1)
-            elif obj.rect.centery > bottom:
-                indices.append(i + self.size.x // self.cell_size.x)
-                indices.append(i + self.size.x // self.cell_size.x + 1)
-
-        elif obj.rect.centery < top:
-            indices.append(i - self.size.x // self.cell_size.x)
-        elif obj.rect.centery > bottom:
-            indices.append(i + self.size.x // self.cell_size.x)
-
-        return indices
+
+def _close_level(future: Future):
+    if future.exception() is None:
+        future.result().close()
 
 
 class LevelManager:
@@ -168,6 +397,11 @@ class LevelManager:
             mkdir(LVL_PATH + "caches")
         self.current_lvl = None
         self.game = game
+        # a single worker runs saves and loads in the order they were asked for,
+        # so a level is never read back before its state has been written
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="theta-levels")
+        self._preloaded = OrderedDict()  # name: Future[Level]
+        self._saving = {}  # name: Future of the latest queued state write
 
         if not exists(LVL_PATH + "active"):
             with open(LVL_PATH + "active", "w") as f:
@@ -176,92 +410,171 @@ class LevelManager:
             self.switch_lvl(f.read())
 
     def update(self, dt: float):
+        self.handle_events()
+        self.step(dt)
+
+    def handle_events(self):
         for event in self.game.events:
             if event.type == SWITCH_LVL:
                 self.switch_lvl(event.name)
+
+    def step(self, dt: float):
         if self.current_lvl is not None:
-            self.current_lvl.update(dt)
+            self.current_lvl.update(dt, self.game.camera.get_viewport())
 
     def switch_lvl(self, name: str):
-        if self.current_lvl is not None:
-            self.cache(self.current_lvl)
-        self.current_lvl = self.load_lvl(name)
+        """Swaps in a preloaded level if there is one, the outgoing level is saved in the background and kept ready"""
+        old = self.current_lvl
+        if old is not None:
+            self._saving[old.name] = self._executor.submit(
+                self._write_cache, old.name, encode_state(old)
+            )
+        future = self._preloaded.pop(name, None)
+        if future is not None:
+            self.current_lvl = future.result()
+        else:
+            # loading here skips the worker queue, so the level's own save has to land first
+            saving = self._saving.pop(name, None)
+            if saving is not None:
+                saving.result()
+            self.current_lvl = self.load_lvl(name)
+        if old is not None and old is not self.current_lvl:
+            if old.name == name:
+                old.close()
+            else:
+                self._keep(old.name, old)
+        for neighbour in self.current_lvl.meta.get("preload", []):
+            self.preload(neighbour)
+
+    def preload(self, name: str) -> Future:
+        """Loads a level on the worker thread, so switching to it later is instant"""
+        if name in self._preloaded:
+            self._preloaded.move_to_end(name)
+            return self._preloaded[name]
+        if self.current_lvl is not None and name == self.current_lvl.name:
+            future = Future()
+            future.set_result(self.current_lvl)
+            return future
+        future = self._preloaded[name] = self._executor.submit(self.load_lvl, name)
+        self._evict()
+        return future
+
+    def is_preloaded(self, name: str) -> bool:
+        return name in self._preloaded and self._preloaded[name].done()
+
+    def _keep(self, name: str, lvl: Level):
+        future = Future()
+        future.set_result(lvl)
+        self._preloaded[name] = future
+        self._evict()
+
+    def _evict(self):
+        while len(self._preloaded) > MAX_PRELOADED:
+            _, future = self._preloaded.popitem(last=False)
+            if not future.cancel():
+                future.add_done_callback(_close_level)
 
     def load_lvl(self, name: str) -> Level:
-        if isdir(self.LVL_PATH + sep + "cache" + name):
-            entities = read_json(
-                self.LVL_PATH + sep + "cache" + name + sep + "entities.json"
+        folder = self.LVL_PATH + name + sep
+        tile_layer = None
+        if exists(folder + "no_tiles"):
+            source = read_file(folder + "entities.json", True)
+            entities = json.loads(source)
+            digest = digest_sources([source])
+        elif exists(folder + "stream"):
+            # the marker file can hold the streaming radius, in chunks
+            radius = read_file(folder + "stream").strip()
+            tile_layer = stream_tmx(
+                folder + "map.tmx",
+                folder + "tileset.tsx",
+                self.game,
+                int(radius) if radius else STREAM_RADIUS,
             )
+            # the map is only read chunk by chunk, so just the entities make up the digest
+            source = read_file(folder + "entities.json", True)
+            entities = json.loads(source)
+            digest = digest_sources([source])
         else:
-            entities = read_json(self.LVL_PATH + name + sep + "entities.json")
-
-        for i, e in enumerate(entities):
-            entities[i] = Entity(*e["rect"], e["name"], self.game, real=e["real"])
-
-        if exists(self.LVL_PATH + name + sep + "no_tiles"):
-            return Level(
+            compiled = CompiledLevel(
+                folder, self.LVL_PATH + "caches" + sep + name + LEVEL_CACHE_EXT
+            )
+            tile_layer = make_layer(
+                compiled.tile_w,
+                compiled.tile_h,
+                compiled.ids,
+                compiled.origin,
+                compiled.tile_sources,
+                compiled.solid,
+                self.game,
+                folder + "tileset.tsx",
+            )
+            entities = compiled.entities
+            digest = compiled.digest
+
+        # each level gets its own store, so levels loaded on the worker never share rows with the current one
+        store = EntityStore(len(entities))
+        entities = [
+            Entity(*e["rect"], e["name"], self.game, real=e["real"], store=store)
+            for e in entities
+        ]
+        # e.g. {"preload": ["1", "2"], "active_radius": 256, "band_radius": 1024}
+        meta = read_json(folder + "meta.json") if exists(folder + "meta.json") else {}
+
+        if tile_layer is None:
+            lvl = Level(
                 name,
                 pygame.Vector2(2048, 2048),
                 pygame.Vector2(1024, 1024),
                 [],
                 entities,
+                meta=meta,
+                active_radius=meta.get("active_radius"),
+                band_radius=meta.get("band_radius"),
+                store=store,
+                digest=digest,
+            )
+        else:
+            if isinstance(tile_layer, StreamingTileLayer):
+                # a streamed world can be far larger than the view, so the grid is kept coarse
+                cell_size = pygame.Vector2(
+                    tile_layer.tile_w * tile_layer.chunk_w,
+                    tile_layer.tile_h * tile_layer.chunk_h,
+                )
+                tile_layer.load_area(self.game.camera.get_viewport())
+            else:
+                cell_size = pygame.Vector2(
+                    tile_layer.tile_w * GRID_CELL_TILES,
+                    tile_layer.tile_h * GRID_CELL_TILES,
+                )
+            bounds = tile_layer.rect
+            size = pygame.Vector2(
+                math.ceil(max(bounds.right, 1) / cell_size.x) * cell_size.x,
+                math.ceil(max(bounds.bottom, 1) / cell_size.y) * cell_size.y,
+            )
+            lvl = Level(
+                name,
+                size,
+                cell_size,
+                [],
+                entities,
+                tile_layer=tile_layer,
+                meta=meta,
+                active_radius=meta.get("active_radius"),
+                band_radius=meta.get("band_radius"),
+                store=store,
+                digest=digest,
             )
 
-        ts_data = ET.parse(self.LVL_PATH + name + sep + "tileset.tsx")
-        map_data = ET.parse(self.LVL_PATH + name + sep + "map.tmx")
-        cell_size = pygame.Vector2(
-            int(map_data.getroot().attrib["width"]),
-            int(map_data.getroot().attrib["height"]),
-        )
-        size = cell_size.elementwise() * pygame.Vector2(
-            int(map_data.getroot().attrib["tilewidth"]),
-            int(map_data.getroot().attrib["tileheight"]),
-        )
+        if exists(self.state_path(name)):
+            apply_state(lvl, read_file(self.state_path(name), True), self.game)
+        return lvl
 
-        if map_data.getroot()[1][0].attrib["encoding"] != "csv":
-            raise FileTypeError(
-                "Data at"
-                + self.LVL_PATH
-                + sep
-                + name
-                + sep
-                + "map.tmx"
-                + " is not in a csv format"
-            )
-        tiles = []
-        tile_map = {}
-        tile_size = pygame.Vector2(
-            int(ts_data.getroot().attrib["tilewidth"]),
-            int(ts_data.getroot().attrib["tileheight"]),
-        )
-        for tile in ts_data.getroot():
-            if tile.tag == "tile":
-                tile_map[tile.attrib["id"]] = tile[0].attrib["source"]
-        print(tile_map)
-        for chunk in map_data.getroot()[1][0]:
-            tile_pos = list(csv.reader(chunk.text.split("\n")[1:-1]))
-            chunk_pos = pygame.Vector2(int(chunk.attrib["x"]), int(chunk.attrib["y"]))
-            for x, row in enumerate(tile_pos):
-                for y, tile_id in enumerate(row):
-                    if tile_id != "0" and tile_id:
-                        tiles.append(
-                            Tile(
-                                int((chunk_pos.x + x) * tile_size.x),
-                                int((chunk_pos.y + y) * tile_size.y),
-                                int(tile_size.x),
-                                int(tile_size.y),
-                                tile_map[tile_id].split(sep)[-1].split(".")[0],
-                                tile_map[tile_id],
-                                self.game,
-                            )
-                        )
-
-        return Level(name, size, cell_size, tiles, entities)
+    def state_path(self, name: str) -> str:
+        return self.LVL_PATH + "caches" + sep + name + LEVEL_STATE_EXT
 
     def cache(self, lvl: Level):
-        data = []
-        for e in lvl.entities:
-            data.append(e.to_json_object())
-        write_json(
-            self.LVL_PATH + sep + "cache" + sep + lvl.name + sep + "entities.json", data
-        )
+        """Saves what changed in a level since it was authored, see levelcache.encode_state()"""
+        self._write_cache(lvl.name, encode_state(lvl))
+
+    def _write_cache(self, name: str, data: bytes):
+        write_file_atomic(self.state_path(name), data, True)
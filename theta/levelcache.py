@@ -0,0 +1,278 @@
+import hashlib
+import mmap
+import os
+import struct
+from enum import IntEnum
+
+import numpy as np
+
+from .tilemap import read_tmx
+from .utils import read_file, read_json, write_file_atomic
+
+LEVEL_CACHE_EXT = ".lvl"
+LEVEL_CACHE_MAGIC = b"THLV"
+LEVEL_CACHE_VERSION = 2
+LEVEL_SOURCES = ("map.tmx", "tileset.tsx", "entities.json")
+
+# magic, version, sha1, source mtimes, tile size, origin, rows, cols, tile types, entities
+_header = struct.Struct("<4sH20s3q6i2I")
+_tile_type = struct.Struct("<?H")  # solid, length of the image source
+# rect, real, length of the name; the rect is stored as doubles, entities.json may hold floats
+_entity = struct.Struct("<4d?H")
+
+
+def digest_sources(sources: list[bytes]) -> bytes:
+    """:returns: the sha1 of a level's source files, saved states are only applied to the level they were made from"""
+    digest = hashlib.sha1()
+    for source in sources:
+        digest.update(struct.pack("<Q", len(source)))
+        digest.update(source)
+    return digest.digest()
+
+
+class CompiledLevel:
+    """A level folder compiled into one binary file: tile ids, tileset table and entity records,
+    which is memory-mapped when it was built from the current sources and rebuilt when it wasn't
+    """
+
+    def __init__(self, folder: str, cache_path: str | None = None):
+        self.folder = folder
+        self.cache_path = cache_path
+        self.source_paths = [folder + name for name in LEVEL_SOURCES]
+        if not self._read_cache():
+            sources = [read_file(path, True) for path in self.source_paths]
+            (
+                self.tile_w,
+                self.tile_h,
+                self.ids,
+                self.origin,
+                self.tile_sources,
+                self.solid,
+            ) = read_tmx(*self.source_paths[:2])
+            self.entities = read_json(self.source_paths[2])
+            self.digest = digest_sources(sources)
+            self._write_cache()
+
+    def _mtimes(self) -> list[int]:
+        return [os.stat(path).st_mtime_ns for path in self.source_paths]
+
+    def _read_cache(self) -> bool:
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return False
+        with open(self.cache_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _header.size:
+                return False
+            # copy-on-write, so tiles can be edited without touching the file
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, digest, *header = _header.unpack_from(data)
+        mtimes, header = header[:3], header[3:]
+        if magic != LEVEL_CACHE_MAGIC or version != LEVEL_CACHE_VERSION:
+            return False
+        if mtimes != self._mtimes():
+            sources = [read_file(path, True) for path in self.source_paths]
+            if digest_sources(sources) != digest:
+                return False
+            try:  # contents are unchanged, only the files were touched
+                with open(self.cache_path, "r+b") as f:
+                    f.seek(struct.calcsize("<4sH20s"))
+                    f.write(struct.pack("<3q", *self._mtimes()))
+            except OSError:
+                pass
+
+        self.digest = digest
+        self.tile_w, self.tile_h, col0, row0, rows, cols, n_types, n_entities = header
+        self.origin = (col0, row0)
+        offset = _header.size
+        self.tile_sources = []
+        self.solid = []
+        for _ in range(n_types):
+            solid, length = _tile_type.unpack_from(data, offset)
+            offset += _tile_type.size
+            source = bytes(data[offset : offset + length]).decode()
+            offset += length
+            self.tile_sources.append(source or None)
+            self.solid.append(solid)
+        self.entities = []
+        for _ in range(n_entities):
+            x, y, w, h, real, length = _entity.unpack_from(data, offset)
+            offset += _entity.size
+            self.entities.append(
+                {
+                    "name": bytes(data[offset : offset + length]).decode(),
+                    # read back as the same numbers the source file holds
+                    "rect": [int(v) if v.is_integer() else v for v in (x, y, w, h)],
+                    "real": real,
+                }
+            )
+            offset += length
+        offset += -offset % 4
+        self.ids = np.frombuffer(data, np.int32, rows * cols, offset).reshape(
+            rows, cols
+        )
+        return True
+
+    def _write_cache(self):
+        if self.cache_path is None:
+            return
+        rows, cols = self.ids.shape
+        data = bytearray(
+            _header.pack(
+                LEVEL_CACHE_MAGIC,
+                LEVEL_CACHE_VERSION,
+                self.digest,
+                *self._mtimes(),
+                self.tile_w,
+                self.tile_h,
+                *self.origin,
+                rows,
+                cols,
+                len(self.tile_sources),
+                len(self.entities),
+            )
+        )
+        for source, solid in zip(self.tile_sources, self.solid):
+            source = (source or "").encode()
+            data += _tile_type.pack(solid, len(source)) + source
+        for entity in self.entities:
+            name = entity["name"].encode()
+            data += _entity.pack(*entity["rect"], entity["real"], len(name)) + name
+        data += bytes(-len(data) % 4)
+        data += np.ascontiguousarray(self.ids, np.int32).tobytes()
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            write_file_atomic(self.cache_path, bytes(data), True)
+        except OSError:  # a read-only data folder just means no cache
+            pass
+
+
+LEVEL_STATE_EXT = ".state"
+LEVEL_STATE_MAGIC = b"THST"
+LEVEL_STATE_VERSION = 2
+
+
+class StateRecord(IntEnum):
+    """State record kinds, every record is the difference from the authored level"""
+
+    ENTITY_MOVED = 1
+    ENTITY_ADDED = 2
+    ENTITY_REMOVED = 3
+    TILE_SET = 4
+
+
+ENTITY_MOVED, ENTITY_ADDED, ENTITY_REMOVED, TILE_SET = StateRecord
+
+# magic, version, digest of the level's sources, records
+_state_header = struct.Struct("<4sH20sI")
+_record = struct.Struct("<BI")  # kind, length of the payload
+_moved = struct.Struct("<I4d")  # uid, pos, vel, followed by the action
+_added = struct.Struct("<I2i4d?H")  # uid, size, pos, vel, real, length of the name
+_removed = struct.Struct("<I")  # uid
+_tile = struct.Struct("<2i")  # cell, followed by the tile name
+
+
+def _pack_record(kind: int, payload: bytes) -> bytes:
+    return _record.pack(kind, len(payload)) + payload
+
+
+def encode_state(lvl) -> bytes:
+    """:returns: every change from the authored level: moved, added and removed entities and edited tiles"""
+    records = []
+    present = set()
+    for e in lvl.entities:
+        present.add(e.uid)
+        pos, vel = e.pos, e.get_vel()
+        action = (e.action or "").encode()
+        authored = lvl.authored.get(e.uid)
+        if authored is None:
+            name = e.name.encode()
+            records.append(
+                _pack_record(
+                    ENTITY_ADDED,
+                    _added.pack(
+                        e.uid, e.rect.w, e.rect.h, *pos, *vel, e.is_real, len(name)
+                    )
+                    + name
+                    + action,
+                )
+            )
+        elif (pos.x, pos.y, e.action) != authored or vel:
+            records.append(
+                _pack_record(ENTITY_MOVED, _moved.pack(e.uid, *pos, *vel) + action)
+            )
+    for uid in lvl.authored.keys() - present:
+        records.append(_pack_record(ENTITY_REMOVED, _removed.pack(uid)))
+
+    layer = lvl.tile_layer
+    if layer is not None:
+        for (col, row), tile_id in layer.edits.items():
+            name = layer.get_name(tile_id) or ""
+            records.append(_pack_record(TILE_SET, _tile.pack(col, row) + name.encode()))
+        for (col, row), name in lvl.unknown_tiles.items():
+            if (col, row) not in layer.edits:
+                records.append(
+                    _pack_record(TILE_SET, _tile.pack(col, row) + name.encode())
+                )
+    return _state_header.pack(
+        LEVEL_STATE_MAGIC, LEVEL_STATE_VERSION, lvl.digest, len(records)
+    ) + b"".join(records)
+
+
+def apply_state(lvl, data: bytes, game) -> bool:
+    """Replays a saved state onto a freshly loaded level,
+    :returns: False if the data isn't a state of this level, e.g. because its sources were edited since it was saved
+    """
+    from .entity import Entity
+
+    if len(data) < _state_header.size:
+        return False
+    magic, version, digest, count = _state_header.unpack_from(data)
+    if magic != LEVEL_STATE_MAGIC or version != LEVEL_STATE_VERSION:
+        return False
+    # uid records would be replayed onto whichever entities now have those uids
+    if digest != lvl.digest:
+        return False
+    by_uid = {e.uid: e for e in lvl.entities}
+    offset = _state_header.size
+    for _ in range(count):
+        kind, length = _record.unpack_from(data, offset)
+        offset += _record.size
+        payload = data[offset : offset + length]
+        offset += length
+        match kind:
+            case StateRecord.ENTITY_MOVED:
+                uid, x, y, vx, vy = _moved.unpack_from(payload)
+                e = by_uid.get(uid)
+                if e is not None:
+                    action = payload[_moved.size :].decode()
+                    _restore(e, x, y, vx, vy, action)
+                    lvl.grid.move(e)
+            case StateRecord.ENTITY_ADDED:
+                uid, w, h, x, y, vx, vy, real, name_len = _added.unpack_from(payload)
+                name = payload[_added.size : _added.size + name_len].decode()
+                e = Entity(int(x), int(y), w, h, name, game, real=real, store=lvl.store)
+                e.uid = uid
+                _restore(e, x, y, vx, vy, payload[_added.size + name_len :].decode())
+                lvl.add_entity(e)
+            case StateRecord.ENTITY_REMOVED:
+                e = by_uid.get(_removed.unpack_from(payload)[0])
+                if e is not None:
+                    lvl.remove_entity(e)
+            case StateRecord.TILE_SET:
+                col, row = _tile.unpack_from(payload)
+                name = payload[_tile.size :].decode()
+                tile_id = lvl.tile_layer.get_id(name or None)
+                if tile_id is not None:
+                    lvl.tile_layer.set_tile(col, row, tile_id)
+                else:
+                    lvl.unknown_tiles[col, row] = name
+            # unknown kinds are skipped, their length is known
+    return True
+
+
+def _restore(e, x: float, y: float, vx: float, vy: float, action: str):
+    e.pos = (x, y)
+    e.prev_pos = (x - vx, y - vy)
+    e.rect.topleft = e.pos
+    if action and action in e.anims:
+        e.action = action
+        e.img = e.anims[action].get_img()
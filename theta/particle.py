@@ -1,10 +1,120 @@
 import math
-import random
+from collections import OrderedDict
 
+import numpy as np
 import pygame
 
+ALPHA_STEP = (
+    8  # alpha values are bucketed to multiples of this before a sprite is looked up
+)
+SPRITE_CACHE_SIZE = 4096
+MAX_PARTICLES = 10_000
+
+# what a ParticlePool does when it is full and more particles are spawned
+DROP_OLDEST = "oldest"
+DROP_NEWEST = "newest"
+GROW = "grow"
+
+_rng = np.random.default_rng()
+
+
+def _draw_particle(
+    colour: list[int, int, int] | tuple[int, int, int],
+    size: int,
+    shape="circle",
+    width=0,
+) -> pygame.Surface:
+    surf = pygame.Surface((2 * size, 2 * size), pygame.SRCALPHA)
+    match shape:
+        case "rect" | "rectangle" | "square" | "#" | "[]":
+            pygame.draw.rect(surf, colour, surf.get_rect(), width)
+        case _:
+            pygame.draw.circle(surf, colour, (size, size), size, width)
+    return surf
+
+
+def _shape_key(shape: str) -> str:
+    match shape:
+        case "rect" | "rectangle" | "square" | "#" | "[]":
+            return "rect"
+        case _:
+            return "circle"
+
+
+class SpriteCache:
+    """LRU cache of pre-rendered particle sprites, keyed by shape, colour, size, width and alpha bucket"""
+
+    def __init__(self, max_size: int = SPRITE_CACHE_SIZE, alpha_step: int = ALPHA_STEP):
+        self.max_size = max_size
+        self.alpha_step = alpha_step
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def bucket_alpha(self, alpha: int) -> int:
+        return (
+            255 if alpha >= 255 else max(alpha, 0) // self.alpha_step * self.alpha_step
+        )
+
+    def get(
+        self,
+        shape: str,
+        colour: list[int, int, int] | tuple[int, int, int],
+        size: int,
+        width=0,
+        alpha=255,
+    ) -> pygame.Surface:
+        key = (
+            _shape_key(shape),
+            tuple(colour),
+            max(int(size), 0),
+            width,
+            self.bucket_alpha(alpha),
+        )
+        surf = self._cache.get(key)
+        if surf is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return surf
+
+        self.misses += 1
+        surf = _draw_particle(key[1], key[2], key[0], width)
+        if key[4] != 255:
+            surf.set_alpha(key[4])
+        self._cache[key] = surf
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+sprite_cache = SpriteCache()
+
 
 class Particle:
+    __slots__ = (
+        "colour",
+        "pos",
+        "vel",
+        "size",
+        "shape",
+        "shrink",
+        "fade",
+        "width",
+        "gravity",
+        "is_alive",
+        "timer",
+        "total_time",
+        "surf",
+    )
+
     def __init__(
         self,
         colour: list[int, int, int] | tuple[int, int, int],
@@ -27,23 +137,10 @@ class Particle:
         self.fade = fade
         self.width = width
         self.gravity = gravity
-        self.surf = pygame.Surface((2 * size, 2 * size), pygame.SRCALPHA)
         self.is_alive = True
         self.timer = time_to_live
         self.total_time = time_to_live
-        match self.shape:
-            case "rect" | "rectangle" | "square" | "#" | "[]":
-                pygame.draw.rect(
-                    self.surf, self.colour, self.surf.get_rect(), self.width
-                )
-            case _:
-                pygame.draw.circle(
-                    self.surf,
-                    self.colour,
-                    (self.size, self.size),
-                    self.size,
-                    self.width,
-                )
+        self.surf = sprite_cache.get(self.shape, self.colour, self.size, self.width)
 
     def update(self, dt, vel_update=pygame.Vector2(0, 0)):
         self.vel += pygame.Vector2(vel_update.x, vel_update.y + self.gravity)
@@ -53,15 +150,104 @@ class Particle:
         else:
             size = self.size
         if self.fade:
-            self.surf.set_alpha(255 * self.timer // self.total_time)
+            alpha = 255 * self.timer // self.total_time
+        else:
+            alpha = 255
         if not self.timer:
             self.is_alive = False
         elif self.timer > 0:
             self.timer -= 1
-        self.surf = pygame.transform.scale(self.surf, (2 * size, 2 * size))
+        self.surf = sprite_cache.get(self.shape, self.colour, size, self.width, alpha)
+
+
+class ParticlePool:
+    """Fixed-capacity particle storage; rows [0, count) are live, dead rows are swap-removed"""
+
+    FIELDS = (
+        ("pos", (2,), np.float64),
+        ("vel", (2,), np.float64),
+        ("timer", (), np.int32),
+        ("sizes", (), np.int32),
+        ("alphas", (), np.int32),
+        ("colour_i", (), np.int32),
+        ("birth", (), np.int64),
+    )
+
+    def __init__(
+        self, max_particles: int = MAX_PARTICLES, overflow=DROP_OLDEST, capacity=64
+    ):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST, GROW):
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        self.max_particles = max_particles
+        self.overflow = overflow
+        self.count = 0
+        self.dropped = 0
+        self._serial = 0
+        self.capacity = 0
+        self._resize(max(1, min(capacity, max_particles)))
+
+    def __len__(self):
+        return self.count
+
+    def _resize(self, capacity: int):
+        for name, shape, dtype in self.FIELDS:
+            arr = np.zeros((capacity, *shape), dtype)
+            if self.capacity:
+                arr[: self.count] = getattr(self, name)[: self.count]
+            setattr(self, name, arr)
+        self.capacity = capacity
+
+    def spawn(self, amount: int) -> slice:
+        """Reserves `amount` rows (fewer if the pool is full and drops new particles) and returns them as a slice"""
+        if self.count + amount > self.capacity:
+            if self.capacity < self.max_particles or self.overflow == GROW:
+                capacity = max(2 * self.capacity, self.count + amount)
+                if self.overflow != GROW:
+                    capacity = min(capacity, self.max_particles)
+                self._resize(capacity)
+            overflow = self.count + amount - self.capacity
+            if overflow > 0:
+                self.dropped += overflow
+                if self.overflow == DROP_NEWEST:
+                    amount -= overflow
+                elif overflow >= self.count:
+                    amount = self.capacity
+                    self.count = 0
+                else:
+                    alive = np.ones(self.count, bool)
+                    alive[
+                        np.argpartition(self.birth[: self.count], overflow - 1)[
+                            :overflow
+                        ]
+                    ] = False
+                    self.kill(alive)
+
+        start = self.count
+        self.count += amount
+        self.birth[start : self.count] = np.arange(self._serial, self._serial + amount)
+        self._serial += amount
+        return slice(start, self.count)
+
+    def kill(self, alive: np.ndarray):
+        """Removes the rows that are False in `alive` by moving live rows from the end into the gaps"""
+        dead = np.flatnonzero(~alive)
+        if not len(dead):
+            return
+        count = self.count - len(dead)
+        holes = dead[dead < count]
+        sources = np.flatnonzero(alive[count:]) + count
+        for name, _, _ in self.FIELDS:
+            arr = getattr(self, name)
+            arr[holes] = arr[sources]
+        self.count = count
+
+    def clear(self):
+        self.count = 0
 
 
 class ParticleBurst:
+    """Particles are stored as rows of numpy arrays and integrated in one batched step per update"""
+
     def __init__(
         self,
         pos: pygame.Vector2,
@@ -78,8 +264,9 @@ class ParticleBurst:
         fade=True,
         gravity=0,
         spread=1,
+        max_particles=MAX_PARTICLES,
+        overflow=DROP_OLDEST,
     ):
-        self.particles = []
         self.starting_time = time_to_live
         self.time = time_to_live
         self.type = type
@@ -89,7 +276,6 @@ class ParticleBurst:
         self.shrinks = shrink
         self.fades = fade
         self.amount = amount
-        self.type = type
         self.speed = speed
         self.size = size
         self.shape = shape
@@ -99,142 +285,214 @@ class ParticleBurst:
         self.gravity = gravity
         self.spread = spread
         self.particle_time = particle_time_to_live
+
+        self.pool = ParticlePool(max_particles, overflow, max(amount, 64))
+
         if (
             self.amount >= 0
         ):  # if amount is negative, new particles are added every frame, else the specified amount is added at the beginning
-            match type:
-                case "fountain" | "pillar" | "|" | "!":
-                    for i in range(amount):
-                        self.particles.append(
-                            Particle(
-                                random.choice(self.colours),
-                                self.middle.copy(),
-                                pygame.Vector2(
-                                    (2 * random.random() - 1) * speed.x
-                                    + (2 * self.spread * random.random() - self.spread),
-                                    -2 * speed.y
-                                    + (2 * self.spread * random.random() - self.spread),
-                                ),
-                                size,
-                                particle_time_to_live,
-                                shape,
-                                width,
-                                shrink,
-                                fade,
-                                gravity,
-                            )
-                        )
-                case "beam" | "line" | "-" | "_":
-                    for i in range(amount):
-                        self.particles.append(
-                            Particle(
-                                random.choice(self.colours),
-                                self.middle.copy(),
-                                pygame.Vector2(-2 * speed.x, speed.y),
-                                size,
-                                particle_time_to_live,
-                                shape,
-                                width,
-                                shrink,
-                                fade,
-                                gravity,
-                            )
-                        )
-                case _:
-                    for i in range(amount):
-                        theta = random.random() * 2 * math.pi
-                        self.particles.append(
-                            Particle(
-                                random.choice(self.colours),
-                                pygame.Vector2(
-                                    self.middle.x
-                                    - size // 2
-                                    + (10 * random.random() - 5),
-                                    self.middle.y
-                                    - size // 2
-                                    + (10 * random.random() - 5),
-                                ),
-                                pygame.Vector2(
-                                    speed.x * math.cos(theta) * random.random()
-                                    + (2 * self.spread * random.random() - self.spread),
-                                    speed.y * math.sin(theta) * random.random()
-                                    + (2 * self.spread * random.random() - self.spread),
-                                ),
-                                size,
-                                particle_time_to_live,
-                                shape,
-                                width,
-                                shrink,
-                                fade,
-                                gravity,
-                            )
-                        )
+            self.emit(amount)
+
+    def __len__(self):
+        return self.pool.count
+
+    def emit(self, amount: int, jitter: bool = False):
+        if amount <= 0:
+            return
+        rows = self.pool.spawn(amount)
+        amount = rows.stop - rows.start
+        # angle, position jitter x/y, spread x/y, speed x/y
+        rand = _rng.random((amount, 7))
+        spread = 2 * self.spread * rand[:, 3:5] - self.spread
+        pos = self.pool.pos[rows]
+        vel = self.pool.vel[rows]
+        match self.type:
+            case "fountain" | "pillar" | "|" | "!":
+                pos[:] = self.middle
+                if jitter:
+                    pos += 10 * rand[:, 1:3] - 5 - self.size // 2
+                vel[:, 0] = (2 * rand[:, 0] - 1) * self.speed.x
+                vel[:, 1] = -2 * self.speed.y
+                vel += spread
+            case "beam" | "line" | "-" | "_":
+                pos[:] = self.middle
+                vel[:] = (-2 * self.speed.x, self.speed.y)
+            case _:
+                theta = rand[:, 0] * 2 * math.pi
+                pos[:] = self.middle
+                pos += 10 * rand[:, 1:3] - 5 - self.size // 2
+                vel[:, 0] = self.speed.x * np.cos(theta)
+                vel[:, 1] = self.speed.y * np.sin(theta)
+                vel *= rand[:, 5:7]
+                vel += spread
+
+        self.pool.timer[rows] = self.particle_time
+        self.pool.sizes[rows] = self.size
+        self.pool.alphas[rows] = 255
+        self.pool.colour_i[rows] = _rng.integers(0, len(self.colours), amount)
 
     def update(self, dt, vel_update=(0, 0)):
         if self.time > 0:
             self.time -= 1
-        for i, particle in enumerate(self.particles):
-            particle.update(dt, vel_update)
-            if not particle.is_alive:
-                self.particles.remove(particle)
-                del self.particles[i]
+
+        if self.pool.count:
+            vel = self.vel
+            timer = self.timer
+            vel[:, 0] += vel_update[0]
+            vel[:, 1] += vel_update[1] + self.gravity
+            self.pos[:] += vel * dt
+
+            # a negative particle_time never expires, so it keeps full size and alpha
+            if self.particle_time >= 0:
+                total = max(self.particle_time, 1)
+                if self.shrink:
+                    np.floor_divide(self.size * timer, total, out=self.sizes)
+                if self.fade:
+                    np.floor_divide(255 * timer, total, out=self.alphas)
+
+            alive = timer != 0
+            timer[timer > 0] -= 1
+            if not alive.all():
+                self.pool.kill(alive)
+
         if self.amount < 0 and self.time:
             match self.type:
                 case "burst" | "circle":
-                    theta = random.random() * 2 * math.pi
-                    self.particles.append(
-                        Particle(
-                            random.choice(self.colours),
-                            pygame.Vector2(
-                                self.middle.x
-                                - self.size // 2
-                                + (10 * random.random() - 5),
-                                self.middle.y
-                                - self.size // 2
-                                + (10 * random.random() - 5),
-                            ),
-                            pygame.Vector2(
-                                self.speed.x * math.cos(theta) * random.random()
-                                + (2 * self.spread * random.random() - self.spread),
-                                self.speed.y * math.sin(theta) * random.random()
-                                + (2 * self.spread * random.random() - self.spread),
-                            ),
-                            self.size,
-                            self.particle_time,
-                            self.shape,
-                            self.width,
-                            self.shrink,
-                            self.fade,
-                            self.gravity,
-                        )
-                    )
+                    self.emit(1)
                 case "fountain" | "pillar":
-                    self.particles.append(
-                        Particle(
-                            random.choice(self.colours),
-                            pygame.Vector2(
-                                self.middle.x
-                                - self.size // 2
-                                + (10 * random.random() - 5),
-                                self.middle.y
-                                - self.size // 2
-                                + (10 * random.random() - 5),
-                            ),
-                            pygame.Vector2(
-                                (2 * random.random() - 1) * self.speed.x
-                                + (2 * self.spread * random.random() - self.spread),
-                                -2 * self.speed.y
-                                + (2 * self.spread * random.random() - self.spread),
-                            ),
-                            self.size,
-                            self.particle_time,
-                            self.shape,
-                            self.width,
-                            self.shrink,
-                            self.fade,
-                            self.gravity,
-                        )
-                    )
-        if len(self.particles) >= 1_000:
-            for i in range(100):
-                del self.particles[i]
+                    self.emit(1, True)
+
+    def get_blits(self) -> list[tuple[pygame.Surface, tuple[float, float]]]:
+        if not self.pool.count:
+            return []
+        # only distinct (colour, size, alpha bucket) combinations go through the sprite cache
+        step = sprite_cache.alpha_step
+        sizes = np.clip(self.sizes, 0, self.size)
+        alphas = np.where(
+            self.alphas >= 255, 255, np.clip(self.alphas, 0, 255) // step * step
+        )
+        codes = (self.colour_i * (self.size + 1) + sizes) * 256 + alphas
+        keys, inverse = np.unique(codes, return_inverse=True)
+        surfs = []
+        for key in keys.tolist():
+            key, alpha = divmod(key, 256)
+            colour, size = divmod(key, self.size + 1)
+            surfs.append(
+                sprite_cache.get(
+                    self.shape, self.colours[colour], size, self.width, alpha
+                )
+            )
+        return list(
+            zip(
+                map(surfs.__getitem__, inverse.ravel().tolist()),
+                map(tuple, self.pos.tolist()),
+            )
+        )
+
+    def render(self, surf: pygame.Surface, offset=(0, 0)):
+        surf.blits(
+            [(img, (x + offset[0], y + offset[1])) for img, (x, y) in self.get_blits()],
+            0,
+        )
+
+    def render_to_game(self, game):
+        game.camera.render_batch(self.get_blits())
+
+    def get_bounds(self) -> pygame.Rect | None:
+        """:returns: the rect covering every live particle, or None if there are none"""
+        if not self.pool.count:
+            return None
+        pos = self.pos
+        extent = pos + 2 * self.sizes[:, None]
+        x, y = np.floor(pos.min(0)).tolist()
+        right, bottom = np.ceil(extent.max(0)).tolist()
+        return pygame.Rect(x, y, right - x + 1, bottom - y + 1)
+
+    @property
+    def is_alive(self) -> bool:
+        return bool(self.time) or self.pool.count > 0
+
+    @property
+    def pos(self) -> np.ndarray:
+        return self.pool.pos[: self.pool.count]
+
+    @property
+    def vel(self) -> np.ndarray:
+        return self.pool.vel[: self.pool.count]
+
+    @property
+    def timer(self) -> np.ndarray:
+        return self.pool.timer[: self.pool.count]
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return self.pool.sizes[: self.pool.count]
+
+    @property
+    def alphas(self) -> np.ndarray:
+        return self.pool.alphas[: self.pool.count]
+
+    @property
+    def colour_i(self) -> np.ndarray:
+        return self.pool.colour_i[: self.pool.count]
+
+
+class ParticleSystem:
+    """Owns every live emitter, updates them, and submits all their particles to the camera as one batch"""
+
+    def __init__(self, game):
+        self.game = game
+        self.emitters = []
+        self._bounds = {}
+
+    def __len__(self):
+        return sum(len(emitter) for emitter in self.emitters)
+
+    def add(self, emitter: ParticleBurst) -> ParticleBurst:
+        self.emitters.append(emitter)
+        return emitter
+
+    def emit(self, *args, **kwargs) -> ParticleBurst:
+        """Creates a ParticleBurst with the given arguments and adds it to the system"""
+        return self.add(ParticleBurst(*args, **kwargs))
+
+    def remove(self, emitter: ParticleBurst):
+        self.emitters.remove(emitter)
+        if (rect := self._bounds.pop(id(emitter), None)) is not None:
+            self.game.camera.add_update_rect(rect)
+
+    def clear(self):
+        self.game.camera.add_update_rects(list(self._bounds.values()))
+        self.emitters *= 0
+        self._bounds.clear()
+
+    def update(self, dt: float, vel_update=(0, 0)):
+        camera = self.game.camera
+        blits = []
+        dirty = []
+        alive = []
+        bounds = {}
+        for emitter in self.emitters:
+            emitter.update(dt, vel_update)
+            old_rect = self._bounds.get(id(emitter))
+            rect = emitter.get_bounds()
+            if rect is not None:
+                bounds[id(emitter)] = rect
+                dirty.append(rect if old_rect is None else rect.union(old_rect))
+                # only the last simulation tick of a frame is drawn
+                if not camera.muted:
+                    if camera.is_visible(rect):
+                        blits.extend(emitter.get_blits())
+                    else:
+                        camera.add_culled(len(emitter))
+            elif old_rect is not None:
+                dirty.append(old_rect)
+            if emitter.is_alive:
+                alive.append(emitter)
+
+        self.emitters = alive
+        self._bounds = bounds
+        if blits:
+            camera.render_batch(blits)
+        if dirty:
+            camera.add_update_rects(dirty)
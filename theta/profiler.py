@@ -0,0 +1,180 @@
+import functools
+import json
+import threading
+from time import perf_counter
+
+import numpy as np
+
+from .utils import write_file
+
+DEFAULT_CAPACITY = 65_536  # spans kept before the oldest are overwritten
+PERCENTILES = (50, 95, 99)
+
+
+class _Span:
+    __slots__ = ("profiler", "name_id", "start")
+
+    def __init__(self, profiler, name_id: int):
+        self.profiler = profiler
+        self.name_id = name_id
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._record(self.name_id, self.start, perf_counter())
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+class Profiler:
+    """Records named perf_counter spans into a fixed-size ring buffer, costs one attribute check when disabled"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, enabled: bool = False):
+        self.enabled = enabled
+        self.capacity = capacity
+        self._starts = np.zeros(capacity, np.float64)
+        self._ends = np.zeros(capacity, np.float64)
+        self._names = np.zeros(capacity, np.int32)
+        self._frames = np.zeros(capacity, np.int64)
+        self._threads = np.zeros(capacity, np.int64)
+        self._name_ids = {}
+        self._name_list = []
+        self._head = 0
+        self._frame = 0
+        self._origin = perf_counter()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._head, self.capacity)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name: str) -> _Span | _NullSpan:
+        """Use as `with profiler.span("name"):`, spans can be nested"""
+        if not self.enabled:
+            return _null_span
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self._name_list)
+            self._name_list.append(name)
+        return _Span(self, name_id)
+
+    def profile(self, name: str | None = None):
+        """Decorator which records every call of the function as a span, named after the function by default"""
+
+        def decorator(func):
+            label = name if name is not None else func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(label):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def next_frame(self):
+        self._frame += 1
+
+    def _record(self, name_id: int, start: float, end: float):
+        with self._lock:
+            i = self._head % self.capacity
+            self._starts[i] = start
+            self._ends[i] = end
+            self._names[i] = name_id
+            self._frames[i] = self._frame
+            self._threads[i] = threading.get_ident()
+            self._head += 1
+
+    def clear(self):
+        with self._lock:
+            self._head = 0
+
+    def _ordered(self) -> slice | np.ndarray:
+        """:returns: an index over the buffer, oldest span first"""
+        if self._head <= self.capacity:
+            return slice(0, self._head)
+        return np.roll(np.arange(self.capacity), -(self._head % self.capacity))
+
+    def get_durations(self, name: str) -> np.ndarray:
+        """:returns: the recorded durations of a span, in seconds, oldest first"""
+        if name not in self._name_ids:
+            return np.empty(0)
+        order = self._ordered()
+        durations = self._ends[order] - self._starts[order]
+        return durations[self._names[order] == self._name_ids[name]]
+
+    def summary(self, percentiles=PERCENTILES) -> dict[str, dict[str, float]]:
+        """:returns: the count, mean, max and percentiles of every span, in milliseconds"""
+        order = self._ordered()
+        names = self._names[order]
+        durations = (self._ends[order] - self._starts[order]) * 1000
+        summary = {}
+        for name_id in np.unique(names).tolist():
+            samples = durations[names == name_id]
+            stats = {
+                "count": len(samples),
+                "mean": float(samples.mean()),
+                "max": float(samples.max()),
+            }
+            for p, value in zip(
+                percentiles, np.percentile(samples, percentiles).tolist()
+            ):
+                stats[f"p{p}"] = value
+            summary[self._name_list[name_id]] = stats
+        return summary
+
+    def to_chrome_trace(self) -> dict:
+        """:returns: the recorded spans in the Chrome trace event format (chrome://tracing, Perfetto)"""
+        order = self._ordered()
+        threads = {}
+        events = []
+        for name_id, start, end, frame, thread in zip(
+            self._names[order].tolist(),
+            ((self._starts[order] - self._origin) * 1e6).tolist(),
+            ((self._ends[order] - self._origin) * 1e6).tolist(),
+            self._frames[order].tolist(),
+            self._threads[order].tolist(),
+        ):
+            events.append(
+                {
+                    "name": self._name_list[name_id],
+                    "ph": "X",
+                    "ts": start,
+                    "dur": end - start,
+                    "pid": 0,
+                    "tid": threads.setdefault(thread, len(threads)),
+                    "args": {"frame": frame},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str):
+        write_file(path, json.dumps(self.to_chrome_trace(), separators=(",", ":")))
+
+
+default_profiler = Profiler()
+span = default_profiler.span
+profile = default_profiler.profile
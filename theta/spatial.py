@@ -0,0 +1,119 @@
+import pygame
+
+
+class SpatialGrid:
+    """Uniform grid over a level; every object is stored in each cell its rect overlaps"""
+
+    def __init__(self, size: pygame.Vector2, cell_size: pygame.Vector2):
+        self.cell_w = int(cell_size.x)
+        self.cell_h = int(cell_size.y)
+        self.cols = max(1, int(size.x // cell_size.x))
+        self.rows = max(1, int(size.y // cell_size.y))
+        self.cells = [{} for _ in range(self.cols * self.rows)]  # id(obj): obj
+        # id(obj): (x0, y0, x1, y1), the inclusive cell range it is stored in
+        self._ranges = {}
+
+    def __len__(self):
+        return len(self._ranges)
+
+    def __contains__(self, obj) -> bool:
+        return id(obj) in self._ranges
+
+    def cell_range(self, rect: pygame.Rect) -> tuple[int, int, int, int]:
+        """:returns: the inclusive range of cells a rect overlaps, clamped to the grid"""
+        return (
+            min(max(rect.left // self.cell_w, 0), self.cols - 1),
+            min(max(rect.top // self.cell_h, 0), self.rows - 1),
+            min(max((rect.right - 1) // self.cell_w, 0), self.cols - 1),
+            min(max((rect.bottom - 1) // self.cell_h, 0), self.rows - 1),
+        )
+
+    def index(self, x: int, y: int) -> int:
+        return x + y * self.cols
+
+    def index_at_pos(self, pos: pygame.Vector2 | tuple[int, int]) -> int:
+        return self.index(
+            min(max(int(pos[0] // self.cell_w), 0), self.cols - 1),
+            min(max(int(pos[1] // self.cell_h), 0), self.rows - 1),
+        )
+
+    def indices_in_range(self, x0: int, y0: int, x1: int, y1: int) -> list[int]:
+        return [x + y * self.cols for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+
+    def indices_in_rect(self, rect: pygame.Rect) -> list[int]:
+        return self.indices_in_range(*self.cell_range(rect))
+
+    def insert(self, obj):
+        if id(obj) in self._ranges:
+            self.move(obj)
+            return
+        cell_range = self._ranges[id(obj)] = self.cell_range(obj.rect)
+        for i in self.indices_in_range(*cell_range):
+            self.cells[i][id(obj)] = obj
+
+    def remove(self, obj):
+        cell_range = self._ranges.pop(id(obj), None)
+        if cell_range is not None:
+            for i in self.indices_in_range(*cell_range):
+                del self.cells[i][id(obj)]
+
+    def move(self, obj) -> bool:
+        """Re-files an object after its rect changed, :returns: whether it changed cells"""
+        old = self._ranges.get(id(obj))
+        new = self.cell_range(obj.rect)
+        if old == new:
+            return False
+        if old is not None:
+            for i in self.indices_in_range(*old):
+                del self.cells[i][id(obj)]
+        self._ranges[id(obj)] = new
+        for i in self.indices_in_range(*new):
+            self.cells[i][id(obj)] = obj
+        return True
+
+    def clear(self):
+        for cell in self.cells:
+            cell.clear()
+        self._ranges.clear()
+
+    def _candidates(self, rect: pygame.Rect) -> dict:
+        x0, y0, x1, y1 = self.cell_range(rect)
+        if x0 == x1 and y0 == y1:
+            return self.cells[x0 + y0 * self.cols]
+        found = {}
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                found.update(self.cells[x + y * self.cols])
+        return found
+
+    def query_rect(self, rect: pygame.Rect) -> list:
+        """:returns: every object whose rect overlaps `rect`"""
+        rect = pygame.Rect(rect)
+        return [
+            obj for obj in self._candidates(rect).values() if rect.colliderect(obj.rect)
+        ]
+
+    def query_point(self, pos: pygame.Vector2 | tuple[int, int]) -> list:
+        """:returns: every object whose rect contains `pos`"""
+        return [
+            obj
+            for obj in self.cells[self.index_at_pos(pos)].values()
+            if obj.rect.collidepoint(pos)
+        ]
+
+    def query_radius(
+        self, pos: pygame.Vector2 | tuple[int, int], radius: float
+    ) -> list:
+        """:returns: every object whose rect comes within `radius` of `pos`"""
+        x, y = pos[0], pos[1]
+        r2 = radius * radius
+        found = []
+        for obj in self._candidates(
+            pygame.Rect(x - radius, y - radius, 2 * radius + 1, 2 * radius + 1)
+        ).values():
+            rect = obj.rect
+            dx = x - min(max(x, rect.left), rect.right)
+            dy = y - min(max(y, rect.top), rect.bottom)
+            if dx * dx + dy * dy <= r2:
+                found.append(obj)
+        return found
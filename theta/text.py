@@ -2,6 +2,7 @@ import os
 
 import pygame
 
+from .gfx import load_image
 from .utils import clip, ForbiddenCharacterError, read_file, write_file
 
 
@@ -9,8 +10,7 @@ class Font:
     def __init__(
         self, file_path, order_path, bar_colour=(128, 128, 128), colourkey=(0, 0, 0)
     ):
-        self.fnt_img = pygame.image.load(file_path).convert()
-        self.fnt_img.set_colorkey(colourkey)
+        self.fnt_img = load_image(file_path, colorkey=colourkey)
         self.bar_colour = bar_colour
         self.imgs = []
         self.distances = [0]
@@ -0,0 +1,677 @@
+import mmap
+import queue
+import re
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from os import sep
+from typing import BinaryIO
+
+import numpy as np
+import pygame
+
+from . import camera
+from .gfx import load_image
+from .utils import FileTypeError
+
+EMPTY = 0
+GID_MASK = 0x1FFFFFFF  # Tiled keeps flip flags in the top three bits of a gid
+CHUNK_SIZE = 16  # width and height of a baked chunk, in tiles
+MAX_BAKED_CHUNKS = 256  # more are kept while more than this are on screen at once
+STREAM_RADIUS = 1  # chunks streamed in beyond the edge of the view
+
+_CHUNK_RE = re.compile(rb"<chunk\s([^>]*)>(.*?)</chunk>", re.S)
+_DATA_RE = re.compile(rb"<data\s([^>]*)>")
+_TILESET_RE = re.compile(rb"<tileset\s([^>]*)>")
+_ATTR_RE = re.compile(rb'(\w+)="([^"]*)"')
+
+
+class TileLayer:
+    """Tile ids in a dense (rows, cols) array, every tile type has one surface shared by all of its placements"""
+
+    def __init__(
+        self,
+        tile_w: int,
+        tile_h: int,
+        ids: np.ndarray,
+        images: list[pygame.Surface | None],
+        names: list[str],
+        game,
+        solid: np.ndarray | None = None,
+        origin: tuple[int, int] = (0, 0),
+        tileset_path: str | None = None,
+    ):
+        self.tile_w = tile_w
+        self.tile_h = tile_h
+        self.ids = ids if ids.dtype == np.int32 else ids.astype(np.int32)
+        # indexed by tile id, id 0 is the empty tile
+        self.images = images
+        self.names = names
+        # types in the tileset which the map doesn't use are added the first time get_id() is asked for them
+        self.tileset_path = tileset_path
+        self.game = game
+        self.solid = (
+            np.ones(len(images), bool) if solid is None else np.asarray(solid, bool)
+        )
+        self.solid[EMPTY] = False
+        self.col0, self.row0 = origin  # the grid cell of ids[0, 0]
+        # (col, row): tile id, every cell changed since the layer was loaded
+        self.edits = {}
+        # (chunk x, chunk y): baked surface, or None if the chunk is empty
+        self._chunks = OrderedDict()
+
+    def __len__(self):
+        return int(np.count_nonzero(self.ids))
+
+    @property
+    def cols(self) -> int:
+        return self.ids.shape[1]
+
+    @property
+    def rows(self) -> int:
+        return self.ids.shape[0]
+
+    @property
+    def rect(self) -> pygame.Rect:
+        """:returns: the area the layer covers, in world coordinates"""
+        return pygame.Rect(
+            self.col0 * self.tile_w,
+            self.row0 * self.tile_h,
+            self.cols * self.tile_w,
+            self.rows * self.tile_h,
+        )
+
+    def cell_at(self, pos: pygame.Vector2 | tuple[int, int]) -> tuple[int, int]:
+        return int(pos[0] // self.tile_w), int(pos[1] // self.tile_h)
+
+    def in_bounds(self, col: int, row: int) -> bool:
+        return 0 <= col - self.col0 < self.cols and 0 <= row - self.row0 < self.rows
+
+    def get(self, col: int, row: int) -> int:
+        """:returns: the tile id at a grid cell, EMPTY outside the layer"""
+        if not self.in_bounds(col, row):
+            return EMPTY
+        return int(self.ids[row - self.row0, col - self.col0])
+
+    def tile_at(self, pos: pygame.Vector2 | tuple[int, int]) -> int:
+        return self.get(*self.cell_at(pos))
+
+    def is_solid(self, col: int, row: int) -> bool:
+        return bool(self.solid[self.get(col, row)])
+
+    def are_solid(self, cols: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """is_solid() over arrays of cells, :returns: a bool array"""
+        cols = np.asarray(cols, np.intp) - self.col0
+        rows = np.asarray(rows, np.intp) - self.row0
+        inside = (cols >= 0) & (cols < self.cols) & (rows >= 0) & (rows < self.rows)
+        solid = np.zeros(cols.shape, bool)
+        solid[inside] = self.solid[self.ids[rows[inside], cols[inside]]]
+        return solid
+
+    def get_name(self, tile_id: int) -> str | None:
+        return self.names[tile_id]
+
+    def get_id(self, name: str | None) -> int | None:
+        """:returns: the id of a tile type by name, None names the empty tile"""
+        if name in self.names:
+            return self.names.index(name)
+        if self.tileset_path is None:
+            return None
+        _, _, sources, solid = _read_tileset(self.tileset_path, 1)
+        for gid, source in sources.items():
+            if _tile_name(source) == name:
+                return self.add_type(name, load_image(f"data{sep}{source}"), solid[gid])
+        return None
+
+    def get_img(self, tile_id: int) -> pygame.Surface | None:
+        return self.images[tile_id]
+
+    def add_type(self, name: str, img: pygame.Surface, solid: bool = True) -> int:
+        """:returns: the id of the new tile type"""
+        self.images.append(img)
+        self.names.append(name)
+        self.solid = np.append(self.solid, solid)
+        return len(self.images) - 1
+
+    def set_tile(self, col: int, row: int, tile_id: int):
+        if not self.in_bounds(col, row):
+            raise IndexError(f"Cell ({col}, {row}) is outside the tile layer")
+        self.ids[row - self.row0, col - self.col0] = tile_id
+        self.edits[col, row] = tile_id
+        self._chunks.pop(
+            ((col - self.col0) // CHUNK_SIZE, (row - self.row0) // CHUNK_SIZE), None
+        )
+        self.game.camera.add_update_rect(
+            pygame.Rect(col * self.tile_w, row * self.tile_h, self.tile_w, self.tile_h)
+        )
+
+    def region(self, rect: pygame.Rect) -> tuple[np.ndarray, int, int]:
+        """:returns: a view of the ids under a world rect, and the grid cell of its top left"""
+        rect = pygame.Rect(rect)
+        x0 = max(rect.left // self.tile_w - self.col0, 0)
+        y0 = max(rect.top // self.tile_h - self.row0, 0)
+        x1 = min(-(-rect.right // self.tile_w) - self.col0, self.cols)
+        y1 = min(-(-rect.bottom // self.tile_h) - self.row0, self.rows)
+        if x1 <= x0 or y1 <= y0:
+            return np.empty((0, 0), np.int32), x0 + self.col0, y0 + self.row0
+        return self.ids[y0:y1, x0:x1], x0 + self.col0, y0 + self.row0
+
+    def get_blits(self, rect: pygame.Rect) -> list[tuple[pygame.Surface, tuple]]:
+        """:returns: the blits of every tile under a world rect"""
+        ids, col, row = self.region(rect)
+        rows, cols = np.nonzero(ids)
+        images = self.images
+        return [
+            (images[tile_id], (x * self.tile_w, y * self.tile_h))
+            for tile_id, x, y in zip(
+                ids[rows, cols].tolist(),
+                (cols + col).tolist(),
+                (rows + row).tolist(),
+            )
+        ]
+
+    def _bake_chunk(self, x: int, y: int) -> pygame.Surface | None:
+        ids = self.ids[
+            y * CHUNK_SIZE : (y + 1) * CHUNK_SIZE, x * CHUNK_SIZE : (x + 1) * CHUNK_SIZE
+        ]
+        rows, cols = np.nonzero(ids)
+        if not len(rows):
+            return None
+        surf = pygame.Surface(
+            (ids.shape[1] * self.tile_w, ids.shape[0] * self.tile_h), pygame.SRCALPHA
+        )
+        images = self.images
+        surf.blits(
+            [
+                (images[tile_id], (col * self.tile_w, row * self.tile_h))
+                for tile_id, col, row in zip(
+                    ids[rows, cols].tolist(), cols.tolist(), rows.tolist()
+                )
+            ],
+            0,
+        )
+        return surf
+
+    def get_chunk(self, x: int, y: int) -> pygame.Surface | None:
+        """:returns: the baked surface of a chunk, baking it the first time it is needed"""
+        surf = self._get_chunk(x, y)
+        self._evict(MAX_BAKED_CHUNKS)
+        return surf
+
+    def _get_chunk(self, x: int, y: int) -> pygame.Surface | None:
+        key = (x, y)
+        if key in self._chunks:
+            self._chunks.move_to_end(key)
+            return self._chunks[key]
+        surf = self._chunks[key] = self._bake_chunk(x, y)
+        return surf
+
+    def _evict(self, keep: int):
+        """Drops the least recently used chunks until `keep` are left"""
+        while len(self._chunks) > keep:
+            self._chunks.popitem(last=False)
+
+    def get_chunk_blits(self, rect: pygame.Rect) -> list[tuple[pygame.Surface, tuple]]:
+        """:returns: the blits of every non-empty chunk under a world rect"""
+        rect = pygame.Rect(rect)
+        chunk_w = CHUNK_SIZE * self.tile_w
+        chunk_h = CHUNK_SIZE * self.tile_h
+        left = self.col0 * self.tile_w
+        top = self.row0 * self.tile_h
+        x0 = max((rect.left - left) // chunk_w, 0)
+        y0 = max((rect.top - top) // chunk_h, 0)
+        x1 = min(-(-(rect.right - left) // chunk_w), -(-self.cols // CHUNK_SIZE))
+        y1 = min(-(-(rect.bottom - top) // chunk_h), -(-self.rows // CHUNK_SIZE))
+        blits = []
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                surf = self._get_chunk(x, y)
+                if surf is not None:
+                    blits.append((surf, (left + x * chunk_w, top + y * chunk_h)))
+        # the chunks just used are the most recent, so only ones off screen are dropped
+        self._evict(max(MAX_BAKED_CHUNKS, (x1 - x0) * (y1 - y0)))
+        return blits
+
+    def invalidate(self):
+        """Drops every baked chunk, e.g. after the tile images changed"""
+        self._chunks.clear()
+
+    def update(self, surf: pygame.Surface = None):
+        if surf is not None:
+            surf.blits(self.get_chunk_blits(self.rect), 0)
+        else:
+            self.game.camera.render_batch(
+                self.get_chunk_blits(self.game.camera.get_viewport()), camera.TILES
+            )
+
+    def close(self):
+        pass
+
+
+def _parse_csv(data: ET.Element) -> np.ndarray:
+    return np.fromstring(data.text or "", np.int64, sep=",") & GID_MASK
+
+
+def _read_gids(map_path: str) -> tuple[np.ndarray, tuple[int, int], ET.Element]:
+    """:returns: the gids of a map's first tile layer, the grid cell of its top left and the map root"""
+    root = ET.parse(map_path).getroot()
+    data = root.find("layer").find("data")
+    if data.attrib.get("encoding") != "csv":
+        raise FileTypeError(f"Data at {map_path} is not in a csv format")
+    chunks = data.findall("chunk")
+    if not chunks:
+        layer = root.find("layer")
+        gids = _parse_csv(data).reshape(
+            int(layer.attrib["height"]), int(layer.attrib["width"])
+        )
+        return gids, (0, 0), root
+
+    bounds = [
+        (
+            int(chunk.attrib["x"]),
+            int(chunk.attrib["y"]),
+            int(chunk.attrib["width"]),
+            int(chunk.attrib["height"]),
+        )
+        for chunk in chunks
+    ]
+    col0 = min(x for x, _, _, _ in bounds)
+    row0 = min(y for _, y, _, _ in bounds)
+    gids = np.zeros(
+        (
+            max(y + h for _, y, _, h in bounds) - row0,
+            max(x + w for x, _, w, _ in bounds) - col0,
+        ),
+        np.int64,
+    )
+    for chunk, (x, y, w, h) in zip(chunks, bounds):
+        gids[y - row0 : y - row0 + h, x - col0 : x - col0 + w] = _parse_csv(
+            chunk
+        ).reshape(h, w)
+    return gids, (col0, row0), root
+
+
+def _is_solid(tile: ET.Element) -> bool:
+    for prop in tile.iter("property"):
+        if prop.attrib.get("name") == "solid":
+            return prop.attrib.get("value", "true") == "true"
+    return True
+
+
+def _read_tileset(
+    tileset_path: str, firstgid: int
+) -> tuple[int, int, dict[int, str], dict[int, bool]]:
+    """:returns: the tile size, and the image source and solidity of every gid in a tileset"""
+    ts_root = ET.parse(tileset_path).getroot()
+    sources = {}
+    solid = {}
+    for tile in ts_root.iter("tile"):
+        gid = int(tile.attrib["id"]) + firstgid
+        sources[gid] = tile.find("image").attrib["source"]
+        solid[gid] = _is_solid(tile)
+    return (
+        int(ts_root.attrib["tilewidth"]),
+        int(ts_root.attrib["tileheight"]),
+        sources,
+        solid,
+    )
+
+
+def _tile_name(source: str) -> str:
+    return source.split("/")[-1].split(".")[0]
+
+
+def read_tmx(
+    map_path: str, tileset_path: str
+) -> tuple[int, int, np.ndarray, tuple[int, int], list[str | None], list[bool]]:
+    """Reads the first tile layer of a Tiled map without loading any images,
+    :returns: the tile size, the tile ids, the grid cell of their top left, and the image source and solidity of each id
+    """
+    gids, origin, map_root = _read_gids(map_path)
+    firstgid = int(map_root.find("tileset").attrib.get("firstgid", 1))
+    tile_w, tile_h, sources, solid_ids = _read_tileset(tileset_path, firstgid)
+
+    used, ids = np.unique(gids, return_inverse=True)
+    used = used.tolist()
+    if used[0] != EMPTY:
+        used.insert(0, EMPTY)
+        ids += 1
+
+    table = [None]
+    solid = [False]
+    for gid in used[1:]:
+        if gid not in sources:
+            raise FileTypeError(f"Tile {gid} in {map_path} is not in {tileset_path}")
+        table.append(sources[gid])
+        solid.append(solid_ids[gid])
+    return tile_w, tile_h, ids.reshape(gids.shape), origin, table, solid
+
+
+def make_layer(
+    tile_w: int,
+    tile_h: int,
+    ids: np.ndarray,
+    origin: tuple[int, int],
+    sources: list[str | None],
+    solid: list[bool],
+    game,
+    tileset_path: str | None = None,
+) -> TileLayer:
+    """Builds a TileLayer from the output of read_tmx(), loading one image per tile type"""
+    return TileLayer(
+        tile_w,
+        tile_h,
+        ids,
+        [None] + [load_image(f"data{sep}{source}") for source in sources[1:]],
+        [None] + [_tile_name(source) for source in sources[1:]],
+        game,
+        np.array(solid, bool),
+        origin,
+        tileset_path,
+    )
+
+
+def load_tmx(map_path: str, tileset_path: str, game) -> TileLayer:
+    """Reads the first tile layer of a Tiled map, only the tile types it uses are loaded"""
+    return make_layer(*read_tmx(map_path, tileset_path), game, tileset_path)
+
+
+class StreamingTileLayer:
+    """Tile layer of an infinite map whose chunks are read from the map file by a worker thread as the camera nears them;
+    tile ids are the map's gids, and chunks that aren't loaded read as EMPTY"""
+
+    def __init__(
+        self,
+        map_path: str,
+        chunks: dict[tuple[int, int], tuple[int, int, int, int]],
+        chunk_w: int,
+        chunk_h: int,
+        tile_w: int,
+        tile_h: int,
+        sources: dict[int, str],
+        solid: dict[int, bool],
+        game,
+        radius: int = STREAM_RADIUS,
+    ):
+        self.map_path = map_path
+        # (chunk x, chunk y): (start, end, width, height) of its csv data in the map file
+        self.chunks = chunks
+        self.chunk_w = chunk_w
+        self.chunk_h = chunk_h
+        self.tile_w = tile_w
+        self.tile_h = tile_h
+        self.sources = sources
+        self.solid = solid
+        self.game = game
+        self.radius = radius
+
+        # gid: surface, loaded the first time a chunk using it is baked
+        self.images = {}
+        # (col, row): tile id, every cell changed since the layer was loaded
+        self.edits = {}
+        self._loaded = {}  # (chunk x, chunk y): ids
+        self._baked = {}
+        self._edited = set()  # edited chunks stay loaded
+        self._pending = set()
+        self._wanted = frozenset()
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._worker = threading.Thread(target=self._work, daemon=True)
+        self._worker.start()
+
+    def __len__(self):
+        return sum(int(np.count_nonzero(ids)) for ids in self._loaded.values())
+
+    @property
+    def rect(self) -> pygame.Rect:
+        """:returns: the area all of the map's chunks cover, in world coordinates"""
+        xs = [x for x, _ in self.chunks]
+        ys = [y for _, y in self.chunks]
+        return pygame.Rect(
+            min(xs) * self.chunk_w * self.tile_w,
+            min(ys) * self.chunk_h * self.tile_h,
+            (max(xs) - min(xs) + 1) * self.chunk_w * self.tile_w,
+            (max(ys) - min(ys) + 1) * self.chunk_h * self.tile_h,
+        )
+
+    def cell_at(self, pos: pygame.Vector2 | tuple[int, int]) -> tuple[int, int]:
+        return int(pos[0] // self.tile_w), int(pos[1] // self.tile_h)
+
+    def get(self, col: int, row: int) -> int:
+        """:returns: the tile id at a grid cell, EMPTY if its chunk isn't loaded"""
+        x, y = col // self.chunk_w, row // self.chunk_h
+        ids = self._loaded.get((x, y))
+        if ids is None:
+            return EMPTY
+        return int(ids[row - y * self.chunk_h, col - x * self.chunk_w])
+
+    def tile_at(self, pos: pygame.Vector2 | tuple[int, int]) -> int:
+        return self.get(*self.cell_at(pos))
+
+    def is_solid(self, col: int, row: int) -> bool:
+        tile_id = self.get(col, row)
+        return tile_id != EMPTY and self.solid.get(tile_id, True)
+
+    def is_loaded(self, x: int, y: int) -> bool:
+        return (x, y) in self._loaded
+
+    def get_name(self, tile_id: int) -> str | None:
+        return _tile_name(self.sources[tile_id]) if tile_id in self.sources else None
+
+    def get_id(self, name: str | None) -> int | None:
+        """:returns: the id of a tile type by name, None names the empty tile"""
+        if name is None:
+            return EMPTY
+        for tile_id, source in self.sources.items():
+            if _tile_name(source) == name:
+                return tile_id
+        return None
+
+    def get_img(self, tile_id: int) -> pygame.Surface | None:
+        if tile_id == EMPTY:
+            return None
+        if tile_id not in self.images:
+            self.images[tile_id] = load_image(f"data{sep}{self.sources[tile_id]}")
+        return self.images[tile_id]
+
+    def set_tile(self, col: int, row: int, tile_id: int):
+        """Chunks which aren't loaded are read first, and cells outside of the map add a new chunk"""
+        key = col // self.chunk_w, row // self.chunk_h
+        if key not in self._loaded:
+            if key in self.chunks:
+                self._loaded[key] = self._read_chunk(key)
+            else:
+                self._loaded[key] = np.zeros((self.chunk_h, self.chunk_w), np.int32)
+        self._loaded[key][
+            row - key[1] * self.chunk_h, col - key[0] * self.chunk_w
+        ] = tile_id
+        self._edited.add(key)
+        self.edits[col, row] = tile_id
+        self._baked.pop(key, None)
+        self.game.camera.add_update_rect(
+            pygame.Rect(col * self.tile_w, row * self.tile_h, self.tile_w, self.tile_h)
+        )
+
+    def _read_chunk(
+        self, key: tuple[int, int], file: BinaryIO | None = None
+    ) -> np.ndarray:
+        start, end, w, h = self.chunks[key]
+        if file is None:
+            with open(self.map_path, "rb") as file:
+                file.seek(start)
+                data = file.read(end - start)
+        else:
+            file.seek(start)
+            data = file.read(end - start)
+        return (
+            (np.fromstring(data.decode("ascii"), np.int64, sep=",") & GID_MASK)
+            .astype(np.int32)
+            .reshape(h, w)
+        )
+
+    def _work(self):
+        with open(self.map_path, "rb") as file:
+            while (key := self._requests.get()) is not None:
+                if key in self._wanted:
+                    self._results.put((key, self._read_chunk(key, file)))
+                else:
+                    self._results.put((key, None))
+
+    def _chunk_range(self, rect: pygame.Rect) -> set[tuple[int, int]]:
+        """:returns: the keys of every chunk of the map under a world rect"""
+        chunk_w = self.chunk_w * self.tile_w
+        chunk_h = self.chunk_h * self.tile_h
+        return {
+            (x, y)
+            for y in range(rect.top // chunk_h, -(-rect.bottom // chunk_h))
+            for x in range(rect.left // chunk_w, -(-rect.right // chunk_w))
+            if (x, y) in self.chunks
+        }
+
+    def _area(self, rect: pygame.Rect, radius: int) -> pygame.Rect:
+        return pygame.Rect(rect).inflate(
+            2 * radius * self.chunk_w * self.tile_w,
+            2 * radius * self.chunk_h * self.tile_h,
+        )
+
+    def load_area(self, rect: pygame.Rect):
+        """Reads every chunk under a world rect on this thread, e.g. for the first view of a level"""
+        with open(self.map_path, "rb") as file:
+            for key in self._chunk_range(pygame.Rect(rect)):
+                if key not in self._loaded:
+                    self._loaded[key] = self._read_chunk(key, file)
+
+    def stream(self, view: pygame.Rect):
+        """Requests the chunks within `radius` chunks of the view, installs the ones the worker finished
+        and unloads those that left the view by more than a chunk"""
+        wanted = self._chunk_range(self._area(view, self.radius))
+        self._wanted = frozenset(wanted)
+        for key in wanted:
+            if key not in self._loaded and key not in self._pending:
+                self._pending.add(key)
+                self._requests.put(key)
+
+        while True:
+            try:
+                key, ids = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending.discard(key)
+            if ids is not None and key not in self._loaded:
+                self._loaded[key] = ids
+                self.game.camera.add_update_rect(self._chunk_rect(key))
+
+        keep = self._chunk_range(self._area(view, self.radius + 1))
+        for key in [key for key in self._loaded if key not in keep]:
+            if key not in self._edited:
+                del self._loaded[key]
+                self._baked.pop(key, None)
+
+    def _chunk_rect(self, key: tuple[int, int]) -> pygame.Rect:
+        return pygame.Rect(
+            key[0] * self.chunk_w * self.tile_w,
+            key[1] * self.chunk_h * self.tile_h,
+            self.chunk_w * self.tile_w,
+            self.chunk_h * self.tile_h,
+        )
+
+    def _bake_chunk(self, key: tuple[int, int]) -> pygame.Surface | None:
+        ids = self._loaded[key]
+        rows, cols = np.nonzero(ids)
+        if not len(rows):
+            return None
+        surf = pygame.Surface(
+            (ids.shape[1] * self.tile_w, ids.shape[0] * self.tile_h), pygame.SRCALPHA
+        )
+        surf.blits(
+            [
+                (self.get_img(tile_id), (col * self.tile_w, row * self.tile_h))
+                for tile_id, col, row in zip(
+                    ids[rows, cols].tolist(), cols.tolist(), rows.tolist()
+                )
+            ],
+            0,
+        )
+        return surf
+
+    def get_chunk_blits(self, rect: pygame.Rect) -> list[tuple[pygame.Surface, tuple]]:
+        """:returns: the blits of every loaded, non-empty chunk under a world rect"""
+        rect = pygame.Rect(rect)
+        chunk_w = self.chunk_w * self.tile_w
+        chunk_h = self.chunk_h * self.tile_h
+        blits = []
+        for y in range(rect.top // chunk_h, -(-rect.bottom // chunk_h)):
+            for x in range(rect.left // chunk_w, -(-rect.right // chunk_w)):
+                key = (x, y)
+                if key not in self._loaded:
+                    continue
+                if key not in self._baked:
+                    self._baked[key] = self._bake_chunk(key)
+                if self._baked[key] is not None:
+                    blits.append((self._baked[key], (x * chunk_w, y * chunk_h)))
+        return blits
+
+    def invalidate(self):
+        self._baked.clear()
+
+    def update(self, surf: pygame.Surface = None):
+        if surf is not None:
+            surf.blits(self.get_chunk_blits(self.rect), 0)
+        else:
+            view = self.game.camera.get_viewport()
+            self.stream(view)
+            self.game.camera.render_batch(self.get_chunk_blits(view), camera.TILES)
+
+    def close(self):
+        """Stops the worker thread"""
+        self._requests.put(None)
+
+
+def _attrs(raw: bytes) -> dict[str, str]:
+    return {key.decode(): value.decode() for key, value in _ATTR_RE.findall(raw)}
+
+
+def stream_tmx(
+    map_path: str, tileset_path: str, game, radius: int = STREAM_RADIUS
+) -> StreamingTileLayer | TileLayer:
+    """Indexes the byte offsets of every chunk in an infinite Tiled map without parsing them,
+    maps which aren't chunked are loaded whole with load_tmx()"""
+    with (
+        open(map_path, "rb") as f,
+        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        tileset = _attrs(_TILESET_RE.search(mm).group(1))
+        if _attrs(_DATA_RE.search(mm).group(1)).get("encoding") != "csv":
+            raise FileTypeError(f"Data at {map_path} is not in a csv format")
+        found = [
+            (_attrs(m.group(1)), m.start(2), m.end(2)) for m in _CHUNK_RE.finditer(mm)
+        ]
+    if not found:
+        return load_tmx(map_path, tileset_path, game)
+
+    chunk_w = int(found[0][0]["width"])
+    chunk_h = int(found[0][0]["height"])
+    chunks = {
+        (int(attrs["x"]) // chunk_w, int(attrs["y"]) // chunk_h): (
+            start,
+            end,
+            int(attrs["width"]),
+            int(attrs["height"]),
+        )
+        for attrs, start, end in found
+    }
+    tile_w, tile_h, sources, solid = _read_tileset(
+        tileset_path, int(tileset.get("firstgid", 1))
+    )
+    return StreamingTileLayer(
+        map_path,
+        chunks,
+        chunk_w,
+        chunk_h,
+        tile_w,
+        tile_h,
+        sources,
+        solid,
+        game,
+        radius,
+    )
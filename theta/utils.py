@@ -1,5 +1,6 @@
 import json
 import math
+import os
 
 import pygame
 
@@ -17,9 +18,17 @@ def write_file(path: str, data: str | bytes, binary: bool = False):
         f.write(data)
 
 
+def write_file_atomic(path: str, data: str | bytes, binary: bool = False):
+    """Writes the data to a temporary file next to `path` and renames it over `path`,
+    so readers see either the old file or the new one, never half of one"""
+    with open(path + ".tmp", "wb" if binary else "w") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
 def write_json(path: str, data, indent: int = 1):
     """Writes python objects (lists, tuples, dicts) into a JSON format at a given path"""
-    with open(path, "x") as f:
+    with open(path, "w") as f:
         f.write(json.dumps(data, indent=indent))
 
 
@@ -194,6 +203,19 @@ def two_point_rect(
     )
 
 
+def merge_rects(rects: list[pygame.Rect], gap: int = 1) -> list[pygame.Rect]:
+    """:returns: a list of rects covering `rects`, where rects that overlap or are within `gap` of each other are merged"""
+    merged = []
+    for rect in sorted(rects, key=lambda r: r[0]):
+        rect = pygame.Rect(rect)
+        if rect.w <= 0 or rect.h <= 0:
+            continue
+        while (i := rect.inflate(2 * gap, 2 * gap).collidelist(merged)) != -1:
+            rect.union_ip(merged.pop(i))
+        merged.append(rect)
+    return merged
+
+
 class FileTypeError(Exception):
     def __init__(self, type):
         self.type = type